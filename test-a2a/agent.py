@@ -1,14 +1,19 @@
-"""Simple Test A2A Agent using Azure OpenAI."""
+"""Simple Test A2A Agent using Azure OpenAI (or a local fake model)."""
 
-import asyncio
 import logging
-import os
 from collections.abc import AsyncIterable
 from typing import Any
 
 from dotenv import load_dotenv
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_openai import AzureChatOpenAI
+from history import History
+from latency import LatencyProfile, default_profile
+from llm_backends import make_llm
+from llm_gateway import GatewayChatModel
+from metrics import CACHE_ENTRIES, SESSIONS, InstrumentedChatModel
+from response_cache import ResponseCache, model_settings, replay
+from snapshot import SESSION, SnapshotFile
+from tracing import TRACER, span
 
 load_dotenv()
 # Also load from parent directory's .env.local
@@ -20,34 +25,20 @@ logger = logging.getLogger(__name__)
 class TestAgent:
     """A simple test agent that responds to user queries."""
 
-    def __init__(self):
-        """Initialize the test agent with Azure OpenAI."""
-        # Get Azure OpenAI credentials from environment
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        azure_api_key = os.getenv("AZURE_API_KEY")
-        azure_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-5-mini")
-
-        # Fallback: construct endpoint from resource name if not set
-        if not azure_endpoint:
-            resource_name = os.getenv("AZURE_RESOURCE_NAME")
-            if resource_name:
-                azure_endpoint = f"https://{resource_name}.openai.azure.com"
-
-        if not azure_api_key or not azure_endpoint:
-            raise ValueError(
-                "Azure OpenAI configuration is required. "
-                "Set AZURE_API_KEY and AZURE_OPENAI_ENDPOINT (or AZURE_RESOURCE_NAME) "
-                "in your .env file or ../.env.local"
-            )
+    def __init__(self, llm: Any | None = None):
+        """Initialize the test agent with the configured LLM backend.
 
-        self.llm = AzureChatOpenAI(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            azure_deployment=azure_deployment,
-            api_version="2025-04-01-preview",
-            temperature=1.0,  # GPT-5-mini only supports default temperature (1.0)
-            streaming=True,
-        )
+        Args:
+            llm: Chat model to use instead of the ``LLM_BACKEND`` one
+        """
+        # Azure OpenAI by default; LLM_BACKEND=fake for offline load testing
+        # (wrapped for TTFT, token rate and call duration in /metrics, behind
+        # the process-wide gateway: RPM/TPM budgets, fair queuing, 429 backoff)
+        llm = llm if llm is not None else make_llm()
+        self.llm = GatewayChatModel(InstrumentedChatModel(llm))
+        # Exact-match answers to repeated prompts (RESPONSE_CACHE_SIZE, off by default)
+        self.response_cache = ResponseCache.from_env()
+        self.model_settings = model_settings(llm)
 
         self.system_prompt = SystemMessage(
             content=(
@@ -57,63 +48,93 @@ class TestAgent:
             )
         )
 
-        # Store conversation history per session
-        self.conversations: dict[str, list] = {}
-
-    async def invoke(self, user_input: str, session_id: str) -> dict[str, Any]:
+        # Store conversation history per session (texts only; the system
+        # prompt is added when a prompt is assembled)
+        self.conversations: dict[str, History] = {}
+        # Previous run's snapshot, restored per session on first access
+        # (attached by snapshot.Snapshotter when SNAPSHOT_PATH is set)
+        self.snapshot: SnapshotFile | None = None
+
+        # Injected latency before LLM calls (LATENCY_PROFILE, none by default)
+        self.latency = default_profile()
+
+        # Stage spans for trace_view.py (TRACE_FILE, off by default)
+        TRACER.configure_from_env()
+
+        # Sizes exported at scrape time
+        SESSIONS.set_function(lambda: len(self.conversations))
+        CACHE_ENTRIES.labels("response").set_function(lambda: len(self.response_cache))
+
+    async def invoke(
+        self,
+        user_input: str,
+        session_id: str,
+        latency: LatencyProfile | None = None,
+        cache: bool = True,
+    ) -> dict[str, Any]:
         """Handle synchronous tasks.
 
         Args:
             user_input: User input message
             session_id: Unique identifier for the session
+            latency: Per-request latency profile (defaults to the server's)
+            cache: Use the response cache (if enabled) for this request
 
         Returns:
             dict: Response with content, completion status, and input requirement
         """
-        # Get or create conversation history
-        if session_id not in self.conversations:
-            self.conversations[session_id] = [self.system_prompt]
-
-        messages = self.conversations[session_id] + [HumanMessage(content=user_input)]
-
-        # Simulate longer task processing time
-        logger.info("Starting 5-second delay to simulate longer task...")
-        await asyncio.sleep(5.0)
-        logger.info("Delay completed, starting LLM call...")
-
-        # Get response
-        response = await self.llm.ainvoke(messages)
+        messages = self._history(session_id).to_messages(self.system_prompt, HumanMessage(content=user_input))
+        key = self.response_cache.key(messages, self.model_settings, bypass=not cache, mode="invoke")
+        cached = self.response_cache.get(key)
+
+        if cached is not None:
+            content = "".join(cached)
+        else:
+            # Injected latency for tail-latency experiments (none by default)
+            delay = await (latency or self.latency).sleep()
+            if delay:
+                logger.info("Injected %.3fs latency before LLM call", delay)
+
+            # Get response
+            with span("llm.invoke") as s:
+                response = await self.llm.ainvoke(messages)
+                content = response.content
+                s.set(chars=len(content))
+            self.response_cache.put(key, [content])
 
         # Update conversation history
-        self.conversations[session_id].append(HumanMessage(content=user_input))
-        self.conversations[session_id].append(response)
+        self._history(session_id).add_turn(user_input, content)
 
         # Determine if task is complete
-        is_complete = self._is_task_complete(response.content)
+        is_complete = self._is_task_complete(content)
 
         return {
-            "content": response.content,
+            "content": content,
             "is_task_complete": is_complete,
             "require_user_input": not is_complete,
         }
 
     async def stream(
-        self, user_input: str, session_id: str
+        self,
+        user_input: str,
+        session_id: str,
+        latency: LatencyProfile | None = None,
+        cache: bool = True,
     ) -> AsyncIterable[dict[str, Any]]:
         """Handle streaming tasks.
 
         Args:
             user_input: User input message
             session_id: Unique identifier for the session
+            latency: Per-request latency profile (defaults to the server's)
+            cache: Use the response cache (if enabled) for this request
 
         Yields:
             dict: Streaming response chunks
         """
-        # Get or create conversation history
-        if session_id not in self.conversations:
-            self.conversations[session_id] = [self.system_prompt]
-
-        messages = self.conversations[session_id] + [HumanMessage(content=user_input)]
+        messages = self._history(session_id).to_messages(self.system_prompt, HumanMessage(content=user_input))
+        key = self.response_cache.key(messages, self.model_settings, bypass=not cache)
+        cached = self.response_cache.get(key)
 
         # Yield initial status
         yield {
@@ -122,26 +143,32 @@ class TestAgent:
             "require_user_input": False,
         }
 
-        # Simulate longer task processing time
-        logger.info("Starting 5-second delay to simulate longer task...")
-        await asyncio.sleep(5.0)
-        logger.info("Delay completed, starting LLM streaming...")
+        if cached is None:
+            # Injected latency for tail-latency experiments (none by default)
+            delay = await (latency or self.latency).sleep()
+            if delay:
+                logger.info("Injected %.3fs latency before LLM call", delay)
 
-        # Stream the response
+        # Stream the response (a cache hit replays the stored chunks)
         full_response = ""
-        async for chunk in self.llm.astream(messages):
-            if isinstance(chunk, AIMessage) and chunk.content:
-                full_response += chunk.content
-                yield {
-                    "content": chunk.content,
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "is_streaming_chunk": True,
-                }
+        chunks: list[str] = []
+        with span("llm.stream") as s:
+            async for chunk in replay(cached) if cached is not None else self.llm.astream(messages):
+                if isinstance(chunk, AIMessage) and chunk.content:
+                    full_response += chunk.content
+                    chunks.append(chunk.content)
+                    yield {
+                        "content": chunk.content,
+                        "is_task_complete": False,
+                        "require_user_input": False,
+                        "is_streaming_chunk": True,
+                    }
+            s.set(chars=len(full_response), cached=cached is not None)
+        if cached is None:
+            self.response_cache.put(key, chunks)
 
         # Update conversation history
-        self.conversations[session_id].append(HumanMessage(content=user_input))
-        self.conversations[session_id].append(AIMessage(content=full_response))
+        self._history(session_id).add_turn(user_input, full_response)
 
         # Final response is always considered complete
         # The task is done when we've received the full LLM response
@@ -177,6 +204,14 @@ class TestAgent:
         response_lower = response.lower()
         return any(indicator in response_lower for indicator in completion_indicators)
 
+    def _history(self, session_id: str) -> History:
+        """The session's history, restored from the snapshot or created on first use."""
+        history = self.conversations.get(session_id)
+        if history is None:
+            restored = self.snapshot.load_session(session_id) if self.snapshot is not None else None
+            history = self.conversations[session_id] = restored or History()
+        return history
+
     def clear_conversation(self, session_id: str) -> None:
         """Clear conversation history for a session.
 
@@ -185,3 +220,5 @@ class TestAgent:
         """
         if session_id in self.conversations:
             del self.conversations[session_id]
+        if self.snapshot is not None:
+            self.snapshot.discard(SESSION, session_id)
@@ -1,16 +1,35 @@
 """Agent Executor for the Test A2A Agent."""
 
 import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events.event_queue import EventQueue
-from a2a.types import TaskState, TaskStatus, TaskStatusUpdateEvent
+from a2a.server.events.event_queue import Event, EventQueue
+from a2a.types import Task, TaskState, TaskStatus, TaskStatusUpdateEvent
 from a2a.utils import new_agent_text_message, new_task
+from admission import AdmissionController, Overloaded
 from agent import TestAgent
+from event_log import EventLog
+from fast_send import is_blocking_send
+from latency import LatencyProfile, parse_profile, per_request_enabled
+from llm_gateway import llm_session
+from log_config import Sampler
+from metrics import (
+    ACTIVE_TASKS,
+    EVENT_QUEUE_DEPTH,
+    TASK_DURATION,
+    TASK_EVENTS,
+    TASK_FIRST_EVENT,
+)
+from tracing import span
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-partial debug lines are sampled: streaming emits one partial per token
+_partial_sample = Sampler(int(os.getenv("LOG_PARTIAL_SAMPLE_EVERY", "50")))
+
 
 class TestAgentExecutor(AgentExecutor):
     """Executor for the Test A2A Agent."""
@@ -18,6 +37,32 @@ class TestAgentExecutor(AgentExecutor):
     def __init__(self):
         """Initialize the executor with the test agent."""
         self.agent = TestAgent()
+        # Replayable events per task for tasks/resubscribe
+        self.event_log = EventLog.from_env()
+        # Per-class concurrency and load shedding (every task here is chat)
+        self.admission = AdmissionController.from_env()
+
+    def _get_latency_profile(self, context: RequestContext) -> LatencyProfile | None:
+        """Per-request latency profile from ``latency_profile`` message metadata.
+
+        Ignored unless the server opted in (``LATENCY_PER_REQUEST``).
+        """
+        if not per_request_enabled():
+            return None
+        metadata = (context.message.metadata if context.message else None) or {}
+        spec = metadata.get("latency_profile")
+        if not spec:
+            return None
+        try:
+            return parse_profile(str(spec))
+        except ValueError as e:
+            logger.warning("Ignoring latency_profile metadata: %s", e)
+            return None
+
+    def _use_response_cache(self, context: RequestContext) -> bool:
+        """False if the message metadata sets ``"response_cache": false``."""
+        metadata = (context.message.metadata if context.message else None) or {}
+        return metadata.get("response_cache") is not False
 
     async def execute(
         self,
@@ -30,26 +75,84 @@ class TestAgentExecutor(AgentExecutor):
             context: Request context with user input
             event_queue: Queue for sending events
         """
-        query = context.get_user_input()
-        task = context.current_task
+        # Blocking message/send: one invoke and one final status (see fast_send.py)
+        blocking = is_blocking_send(context)
+        kind = "send" if blocking else "stream"
+        started = time.perf_counter()
+        first_update = True
+        events = 0
+
+        async def emit(event: Event) -> None:
+            nonlocal first_update, events
+            EVENT_QUEUE_DEPTH.observe(event_queue.queue.qsize())
+            TASK_EVENTS.labels(type(event).__name__).inc()
+            events += 1
+            if first_update and not isinstance(event, Task):
+                first_update = False
+                elapsed = time.perf_counter() - started
+                TASK_FIRST_EVENT.labels(kind).observe(elapsed)
+                root.set(first_update_ms=round(elapsed * 1000, 3))
+            self.event_log.append(context.task_id, event)
+            await event_queue.enqueue_event(event)
+
+        # Root span of the task's trace; the agent's LLM span nests under it
+        with span("task", task_id=context.task_id, context_id=context.context_id, kind=kind) as root:
+            self.event_log.start(context.task_id)
+            ACTIVE_TASKS.inc()
+            try:
+                # Create task if it doesn't exist; queued tasks are visible to the client
+                task = context.current_task
+                if not task:
+                    task = new_task(context.message)
+                    await emit(task)
+                # LLM calls queue fairly per session in the gateway
+                async with self.admission.slot("chat"):
+                    with llm_session(task.context_id):
+                        if blocking:
+                            await self._answer(context, task, emit)
+                        else:
+                            await self._execute(context, task, emit)
+            except Overloaded as e:
+                logger.warning("Shedding task %s: %s", task.id, e, extra={"task_id": task.id})
+                await self._reject(task, e, emit)
+            finally:
+                ACTIVE_TASKS.dec()
+                self.event_log.finish(context.task_id)
+                TASK_DURATION.labels(kind).observe(time.perf_counter() - started)
+                root.set(events=events)
+
+    async def _execute(
+        self, context: RequestContext, task: Task, emit: Callable[[Event], Awaitable[None]]
+    ) -> None:
+        """Run the agent and translate its partials into A2A events.
 
-        # Create task if it doesn't exist
-        if not task:
-            task = new_task(context.message)
-            await event_queue.enqueue_event(task)
+        Args:
+            context: Request context with user input
+            task: The task (already enqueued)
+            emit: Enqueues one event
+        """
+        query = context.get_user_input()
 
         #  Collect full response
         full_response = ""
 
         # Stream agent responses - consume ALL events
-        async for partial in self.agent.stream(query, task.context_id):
+        latency = self._get_latency_profile(context)
+        async for partial in self.agent.stream(
+            query, task.context_id, latency=latency, cache=self._use_response_cache(context)
+        ):
             is_done = partial.get("is_task_complete", False)
             require_input = partial.get("require_user_input", False)
             text_content = partial.get("content", "")
             is_streaming = partial.get("is_streaming_chunk", False)
             is_final = partial.get("is_final", False)
 
-            logger.info(f"Partial: is_final={is_final}, is_streaming={is_streaming}, content_len={len(text_content)}")
+            if _partial_sample() and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Partial #%d: is_final=%s, is_streaming=%s, content_len=%d",
+                    _partial_sample.count, is_final, is_streaming, len(text_content),
+                    extra={"task_id": task.id},
+                )
 
             # Accumulate streaming chunks
             if is_streaming and text_content:
@@ -57,10 +160,10 @@ class TestAgentExecutor(AgentExecutor):
             elif is_final:
                 # This is the last event - save it
                 full_response = text_content if text_content else full_response
-                logger.info(f"Got final event, full response length: {len(full_response)}")
+                logger.debug("Got final event, full response length: %d", len(full_response))
             elif require_input:
                 # Waiting for user input
-                await event_queue.enqueue_event(
+                await emit(
                     TaskStatusUpdateEvent(
                         status=TaskStatus(
                             state=TaskState.input_required,
@@ -77,7 +180,7 @@ class TestAgentExecutor(AgentExecutor):
                 )
             else:
                 # Working state
-                await event_queue.enqueue_event(
+                await emit(
                     TaskStatusUpdateEvent(
                         status=TaskStatus(
                             state=TaskState.working,
@@ -95,15 +198,46 @@ class TestAgentExecutor(AgentExecutor):
 
         # After consuming all events, send ONLY the final status (no separate message)
         # Include the response text in the final status message
-        logger.info(f"Loop complete. Sending final status with response. Response length: {len(full_response)}")
+        logger.info(
+            "Task %s complete, response length: %d", task.id, len(full_response),
+            extra={"task_id": task.id, "context_id": task.context_id},
+        )
+
+        await self._complete(task, full_response, emit)
+
+    async def _answer(
+        self, context: RequestContext, task: Task, emit: Callable[[Event], Awaitable[None]]
+    ) -> None:
+        """Answer a blocking ``message/send`` with one LLM call and one final status.
 
-        # Send final completion status with the full response in the message
-        await event_queue.enqueue_event(
+        Args:
+            context: Request context with user input
+            task: The task (already enqueued)
+            emit: Enqueues one event
+        """
+        response = await self.agent.invoke(
+            context.get_user_input(),
+            task.context_id,
+            latency=self._get_latency_profile(context),
+            cache=self._use_response_cache(context),
+        )
+        logger.info(
+            "Task %s complete, response length: %d", task.id, len(response["content"]),
+            extra={"task_id": task.id, "context_id": task.context_id},
+        )
+        # Completed like a streamed answer, whatever invoke's input heuristic says
+        await self._complete(task, response["content"], emit)
+
+    async def _complete(
+        self, task: Task, text: str, emit: Callable[[Event], Awaitable[None]]
+    ) -> None:
+        """Send the final completion status with the full response in the message."""
+        await emit(
             TaskStatusUpdateEvent(
                 status=TaskStatus(
                     state=TaskState.completed,
                     message=new_agent_text_message(
-                        full_response if full_response else "Task completed successfully.",
+                        text if text else "Task completed successfully.",
                         task.context_id,
                         task.id,
                     ),
@@ -113,7 +247,23 @@ class TestAgentExecutor(AgentExecutor):
                 task_id=task.id,
             )
         )
-        logger.info("Final status with response enqueued (final=True)")
+
+    async def _reject(
+        self, task: Task, error: Overloaded, emit: Callable[[Event], Awaitable[None]]
+    ) -> None:
+        """End a shed task as ``rejected``; clients may retry after ``retry_after`` seconds."""
+        await emit(
+            TaskStatusUpdateEvent(
+                status=TaskStatus(
+                    state=TaskState.rejected,
+                    message=new_agent_text_message(str(error), task.context_id, task.id),
+                ),
+                final=True,
+                context_id=task.context_id,
+                task_id=task.id,
+                metadata={"retryable": True, "retry_after": error.retry_after},
+            )
+        )
 
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
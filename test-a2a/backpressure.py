@@ -0,0 +1,165 @@
+"""Bounded per-task event queues with a backpressure policy.
+
+The executor produces events as fast as the LLM streams; a slow or stalled
+SSE client drains them slower. Each task's queue (and every tapped child
+queue) holds at most ``EVENT_QUEUE_SIZE`` events, and ``EVENT_QUEUE_POLICY``
+decides what happens to progress events, i.e. non-final ``working`` status
+updates, while the consumer lags:
+
+``block``
+    The producer waits for room (the SDK's behavior).
+``coalesce``
+    A new progress event replaces the one still waiting in the queue, so a
+    lagging consumer only sees the latest progress. Blocks when full.
+``drop``
+    When the queue is full, the oldest waiting progress event (or, if there
+    is none, the new one) is discarded. Blocks when full of other events.
+
+Artifacts, ``input_required`` and final status updates are never dropped.
+Every event stays in the event log, so a client can fetch what was skipped
+with ``tasks/resubscribe`` (see event_log.py).
+"""
+
+import os
+import time
+
+from a2a.server.events import EventQueue, InMemoryQueueManager
+from a2a.server.events.event_queue import Event
+from a2a.types import TaskState, TaskStatusUpdateEvent
+from metrics import EVENT_QUEUE_BLOCKED, EVENT_QUEUE_HIGH_WATER, EVENTS_COALESCED
+
+POLICIES = ("block", "coalesce", "drop")
+
+
+def _check_policy(policy: str) -> None:
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown event queue policy {policy!r} (expected one of {', '.join(POLICIES)})")
+
+
+def is_progress(event: Event) -> bool:
+    """Whether a later event supersedes `event` (non-final ``working`` status)."""
+    return (
+        isinstance(event, TaskStatusUpdateEvent)
+        and not event.final
+        and event.status.state == TaskState.working
+    )
+
+
+class BoundedEventQueue(EventQueue):
+    """Event queue that applies a backpressure policy to progress events."""
+
+    def __init__(self, max_queue_size: int = 256, policy: str = "coalesce"):
+        """Initialize the queue.
+
+        Args:
+            max_queue_size: Events buffered before the policy applies
+            policy: One of ``block``, ``coalesce`` or ``drop``
+
+        Raises:
+            ValueError: Unknown policy or non-positive size
+        """
+        _check_policy(policy)
+        super().__init__(max_queue_size)
+        self.policy = policy
+        self.high_water = 0
+        # progress events replaced or dropped in this queue
+        self.coalesced = 0
+
+    def _remove_progress(self, newest: bool) -> bool:
+        """Remove one waiting progress event; False if there is none.
+
+        Each queue has a single producer (the executor, or the parent queue),
+        so no put is waiting while this runs.
+        """
+        # asyncio.Queue has no removal API; its items live in a deque
+        pending = self.queue._queue  # type: ignore[attr-defined]
+        for event in reversed(pending) if newest else pending:
+            if is_progress(event):
+                pending.remove(event)
+                # the removed event will never be dequeued and marked done
+                self.queue.task_done()
+                return True
+        return False
+
+    def _superseded(self) -> None:
+        self.coalesced += 1
+        EVENTS_COALESCED.labels(self.policy).inc()
+
+    def _admit(self, event: Event) -> bool:
+        """Apply the policy before enqueuing `event`; False to drop `event` itself."""
+        if self.policy == "coalesce" and is_progress(event):
+            if self._remove_progress(newest=True):
+                self._superseded()
+        elif self.policy == "drop" and self.queue.full():
+            if self._remove_progress(newest=False):
+                self._superseded()
+            elif is_progress(event):
+                self._superseded()
+                return False
+        return True
+
+    async def enqueue_event(self, event: Event) -> None:
+        """Enqueue `event` under the policy, then pass it on to child queues."""
+        if not self.is_closed() and not self._admit(event):
+            # child queues apply their own policy
+            for child in self._children:
+                await child.enqueue_event(event)
+            return
+        if self.queue.full():
+            started = time.perf_counter()
+            await super().enqueue_event(event)
+            EVENT_QUEUE_BLOCKED.inc(time.perf_counter() - started)
+        else:
+            await super().enqueue_event(event)
+        self.high_water = max(self.high_water, self.queue.qsize())
+
+    def tap(self) -> "BoundedEventQueue":
+        """Child queue with the same size and policy."""
+        queue = BoundedEventQueue(self.queue.maxsize, self.policy)
+        self._children.append(queue)
+        return queue
+
+    async def close(self, immediate: bool = False) -> None:
+        """Close the queue and record its high-water mark."""
+        was_closed = self.is_closed()
+        await super().close(immediate)
+        if not was_closed:
+            EVENT_QUEUE_HIGH_WATER.observe(self.high_water)
+
+
+class BoundedQueueManager(InMemoryQueueManager):
+    """In-memory queue manager that creates bounded event queues."""
+
+    def __init__(self, max_queue_size: int = 256, policy: str = "coalesce"):
+        """Initialize the manager.
+
+        Args:
+            max_queue_size: Events buffered per queue
+            policy: Backpressure policy (``block``, ``coalesce`` or ``drop``)
+
+        Raises:
+            ValueError: Unknown policy or non-positive size
+        """
+        super().__init__()
+        # fail at startup rather than on the first task
+        _check_policy(policy)
+        if max_queue_size <= 0:
+            raise ValueError("EVENT_QUEUE_SIZE must be greater than 0")
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+
+    @classmethod
+    def from_env(cls) -> "BoundedQueueManager":
+        """From ``EVENT_QUEUE_SIZE`` and ``EVENT_QUEUE_POLICY``."""
+        return cls(
+            max_queue_size=int(os.getenv("EVENT_QUEUE_SIZE", "256")),
+            policy=os.getenv("EVENT_QUEUE_POLICY", "coalesce"),
+        )
+
+    async def create_or_tap(self, task_id: str) -> EventQueue:
+        async with self._lock:
+            queue = self._task_queue.get(task_id)
+            if queue is not None:
+                return queue.tap()
+            queue = self._task_queue[task_id] = BoundedEventQueue(self.max_queue_size, self.policy)
+            return queue
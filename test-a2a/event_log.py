@@ -0,0 +1,192 @@
+"""Replayable per-task event log for resumable streams.
+
+Every event the executor enqueues is also appended to its task's log with a
+sequence number, stamped into the event's ``metadata["seq"]`` (the task
+object itself is sequence 0 and is not stamped). A client whose
+``message/stream`` connection dropped calls ``tasks/resubscribe`` with
+``metadata.offset`` set to the last ``seq`` it received: the events after it
+are replayed from the log, then live events follow until the task stops.
+Logs of finished tasks stay replayable for ``EVENT_LOG_TTL`` seconds.
+
+Memory is bounded by ``EVENT_LOG_MAX_EVENTS`` per task (a ring buffer: a
+client further behind than that sees a gap in ``seq``) and by
+``EVENT_LOG_MAX_TOTAL`` events across all tasks: finished logs are evicted
+first, oldest first; running tasks only lose their oldest events (again a
+gap in ``seq``), so their followers and sequence numbers are never reset.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncGenerator, AsyncIterator
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events.event_queue import Event
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import InvalidParamsError, Task, TaskIdParams
+from a2a.utils.errors import ServerError
+
+
+class TaskEventLog:
+    """Ring buffer of one task's events with sequence numbers."""
+
+    __slots__ = ("events", "next_seq", "finished_at", "_changed")
+
+    def __init__(self, max_events: int):
+        self.events: deque[tuple[int, Event]] = deque(maxlen=max_events)
+        self.next_seq = 0
+        self.finished_at: float | None = None
+        self._changed = asyncio.Event()
+
+    def append(self, event: Event) -> int:
+        seq = self.next_seq
+        self.next_seq += 1
+        self.events.append((seq, event))
+        self._notify()
+        return seq
+
+    def finish(self) -> None:
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self) -> None:
+        # wake current followers; later ones wait on a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self, after: int) -> AsyncIterator[tuple[int, Event]]:
+        """Events with ``seq > after``, then live ones until the task stops."""
+        next_seq = after + 1
+        while True:
+            changed = self._changed
+            # seqs in the buffer are contiguous, so the next event is found by
+            # index (re-read after every yield: the buffer moves meanwhile)
+            while self.events and next_seq < self.next_seq:
+                seq, event = self.events[max(0, next_seq - self.events[0][0])]
+                next_seq = seq + 1
+                yield seq, event
+            if self.finished_at is not None:
+                return
+            await changed.wait()
+
+
+class EventLog:
+    """Per-task event logs with per-task, total and TTL limits."""
+
+    def __init__(self, max_events: int = 2000, max_total: int = 200_000, ttl: float = 300.0):
+        """Initialize the store.
+
+        Args:
+            max_events: Events kept per task (oldest dropped first)
+            max_total: Events kept across all tasks
+            ttl: Seconds a finished task's log stays replayable
+        """
+        self.max_events = max_events
+        self.max_total = max_total
+        self.ttl = ttl
+        self._logs: OrderedDict[str, TaskEventLog] = OrderedDict()
+        self.total = 0
+
+    @classmethod
+    def from_env(cls) -> "EventLog":
+        """From ``EVENT_LOG_MAX_EVENTS``, ``EVENT_LOG_MAX_TOTAL`` and ``EVENT_LOG_TTL``."""
+        return cls(
+            max_events=int(os.getenv("EVENT_LOG_MAX_EVENTS", "2000")),
+            max_total=int(os.getenv("EVENT_LOG_MAX_TOTAL", "200000")),
+            ttl=float(os.getenv("EVENT_LOG_TTL", "300")),
+        )
+
+    def get(self, task_id: str) -> TaskEventLog | None:
+        log = self._logs.get(task_id)
+        if log is not None and log.finished_at is not None and time.monotonic() - log.finished_at > self.ttl:
+            self._drop(task_id)
+            return None
+        return log
+
+    def start(self, task_id: str) -> TaskEventLog:
+        """The task's log, created or reopened for another execution."""
+        log = self.get(task_id)
+        if log is None:
+            self._prune()
+            log = self._logs[task_id] = TaskEventLog(self.max_events)
+        log.finished_at = None
+        return log
+
+    def append(self, task_id: str, event: Event) -> int:
+        """Log `event` and stamp its sequence number into its metadata."""
+        log = self._logs.get(task_id) or self.start(task_id)
+        full = len(log.events) == log.events.maxlen
+        if isinstance(event, Task):
+            # the task store updates the enqueued task in place; replays
+            # start from the task as it was first sent
+            seq = log.append(event.model_copy(deep=True))
+        else:
+            seq = log.append(event)
+            event.metadata = {**(event.metadata or {}), "seq": seq}
+        if not full:
+            self.total += 1
+            if self.total > self.max_total:
+                self._prune(keep=task_id)
+        return seq
+
+    def finish(self, task_id: str) -> None:
+        log = self._logs.get(task_id)
+        if log is not None:
+            log.finish()
+
+    def _drop(self, task_id: str) -> None:
+        log = self._logs.pop(task_id)
+        self.total -= len(log.events)
+        log.finish()  # release followers
+
+    def _prune(self, keep: str | None = None) -> None:
+        now = time.monotonic()
+        for task_id, log in list(self._logs.items()):
+            if log.finished_at is not None and now - log.finished_at > self.ttl:
+                self._drop(task_id)
+        for task_id, log in list(self._logs.items()):
+            if self.total <= self.max_total:
+                return
+            if task_id != keep and log.finished_at is not None:
+                self._drop(task_id)
+        # still over: trim running logs from their oldest events, keeping
+        # each log's latest event (never evict them; see module docstring)
+        for log in list(self._logs.values()):
+            while self.total > self.max_total and len(log.events) > 1:
+                log.events.popleft()
+                self.total -= 1
+
+    def __len__(self) -> int:
+        return len(self._logs)
+
+
+class ResumableRequestHandler(DefaultRequestHandler):
+    """Request handler whose ``tasks/resubscribe`` replays from the event log."""
+
+    def __init__(self, *args, event_log: EventLog, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.event_log = event_log
+
+    async def on_resubscribe_to_task(
+        self,
+        params: TaskIdParams,
+        context: ServerCallContext | None = None,
+    ) -> AsyncGenerator[Event]:
+        """Replay events after ``metadata.offset``, then follow live events.
+
+        Without an offset only live events are sent, as before. Tasks whose
+        log has expired fall back to the default (live-only) behavior.
+        """
+        log = self.event_log.get(params.id)
+        if log is None:
+            async for event in super().on_resubscribe_to_task(params, context):
+                yield event
+            return
+        offset = (params.metadata or {}).get("offset")
+        try:
+            after = int(offset) if offset is not None else log.next_seq - 1
+        except (TypeError, ValueError):
+            raise ServerError(error=InvalidParamsError(message=f"metadata.offset must be an integer, got {offset!r}"))
+        async for _, event in log.follow(after):
+            yield event
@@ -0,0 +1,41 @@
+"""Fast path for blocking ``message/send``.
+
+A client calling ``message/send`` (without ``blocking: false``) waits for
+the final task and never sees the intermediate status updates the executor
+streams. :class:`FastSendRequestHandler` marks such requests in the call
+context, and the executor answers them with one ``TestAgent.invoke`` call
+and a single final status update: no per-chunk work, no "Processing..."
+statuses through the event queue, event log and task store.
+
+Streams, non-blocking sends (polled with ``tasks/get``) and sends with a
+push notification config (notified of every update) keep the streaming path.
+"""
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.context import ServerCallContext
+from a2a.types import Message, MessageSendParams, Task
+from idempotency import IdempotentRequestHandler
+
+# ServerCallContext.state key set on blocking message/send requests
+BLOCKING_SEND = "blocking_send"
+
+
+def is_blocking_send(context: RequestContext) -> bool:
+    """True if the request is a blocking ``message/send`` marked by the handler."""
+    call_context = context.call_context
+    return bool(call_context and call_context.state.get(BLOCKING_SEND))
+
+
+class FastSendRequestHandler(IdempotentRequestHandler):
+    """Request handler that marks blocking ``message/send`` calls for the executor."""
+
+    async def on_message_send(
+        self,
+        params: MessageSendParams,
+        context: ServerCallContext | None = None,
+    ) -> Message | Task:
+        config = params.configuration
+        if not (config and (config.blocking is False or config.push_notification_config)):
+            context = context or ServerCallContext()
+            context.state[BLOCKING_SEND] = True
+        return await super().on_message_send(params, context)
@@ -0,0 +1,196 @@
+"""Idempotent ``message/send`` and ``message/stream`` keyed on messageId.
+
+Clients retry a request that timed out with the same message (same
+``messageId`` and ``contextId``). The first request runs the agent. A
+duplicate arriving while that task is still running, or up to
+``IDEMPOTENCY_TTL`` seconds after it finished, does not run the agent again:
+
+- ``message/stream`` replays the original task's events from the event log
+  (see event_log.py) and follows it live until it stops
+- ``message/send`` waits for the original task like a blocking send would
+  (or returns its current state for ``blocking: false``). The result is
+  rebuilt from the event log, so it does not depend on the original client
+  still being connected
+
+Duplicates absorbed are counted in ``a2a_duplicate_messages_total``.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events.event_queue import Event
+from a2a.server.tasks import InMemoryTaskStore, TaskManager
+from a2a.types import Message, MessageSendParams, Task
+from event_log import ResumableRequestHandler, TaskEventLog
+from metrics import DUPLICATE_MESSAGES
+
+Key = tuple[str, str]
+
+
+@dataclass
+class _Entry:
+    # resolves to the task id, or None if the original request failed to start
+    task_id: asyncio.Future
+    expires: float = math.inf  # set when the task finishes
+
+
+class IdempotencyCache:
+    """(contextId, messageId) -> task id, while running and for `ttl` after."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10_000):
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds a finished task answers duplicates (0 disables the cache)
+            max_entries: Entries kept (finished ones dropped first, oldest first)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Key, _Entry] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "IdempotencyCache":
+        """From ``IDEMPOTENCY_TTL`` and ``IDEMPOTENCY_MAX_ENTRIES``."""
+        return cls(
+            ttl=float(os.getenv("IDEMPOTENCY_TTL", "300")),
+            max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000")),
+        )
+
+    @staticmethod
+    def key(message: Message) -> Key:
+        return message.context_id or "", message.message_id
+
+    def claim(self, key: Key) -> _Entry | None:
+        """The entry of an earlier request with `key`, or None after claiming it."""
+        if self.ttl <= 0:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > time.monotonic():
+            return entry
+        self._entries[key] = _Entry(asyncio.get_running_loop().create_future())
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._prune()
+        return None
+
+    def resolve(self, key: Key, task_id: str) -> None:
+        """Record the task started for `key`."""
+        entry = self._entries.get(key)
+        if entry is not None and not entry.task_id.done():
+            entry.task_id.set_result(task_id)
+
+    def release(self, key: Key) -> None:
+        """Forget `key` (its request failed before a task started)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None and not entry.task_id.done():
+            entry.task_id.set_result(None)
+
+    def finish(self, key: Key) -> None:
+        """Start the TTL of `key`'s entry (its task stopped running)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.expires = time.monotonic() + self.ttl
+
+    def _prune(self) -> None:
+        """Drop expired entries, then the oldest finished ones (running tasks stay)."""
+        now = time.monotonic()
+        excess = len(self._entries) - self.max_entries
+        for k, e in list(self._entries.items()):
+            if e.expires <= now or (excess > 0 and e.expires != math.inf):
+                del self._entries[k]
+                excess -= 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+async def _replayed_task(log: TaskEventLog, wait: bool) -> Task | None:
+    """The task as its logged events leave it (after it stops, if `wait`)."""
+    # a scratch store: applying the events must not touch the real task
+    manager = TaskManager(task_id=None, context_id=None, task_store=InMemoryTaskStore(), initial_message=None)
+    if wait:
+        events = [event async for _, event in log.follow(-1)]
+    else:
+        events = [event for _, event in log.events]
+    for event in events:
+        if not isinstance(event, Message):
+            await manager.save_task_event(event.model_copy(deep=True))
+    return await manager.get_task()
+
+
+class IdempotentRequestHandler(ResumableRequestHandler):
+    """Request handler that answers retried messages from the original task."""
+
+    def __init__(self, *args, idempotency: IdempotencyCache, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.idempotency = idempotency
+
+    async def _duplicate_of(self, params: MessageSendParams) -> str | None:
+        """Task id of an earlier request for the same message, if any."""
+        entry = self.idempotency.claim(self.idempotency.key(params.message))
+        if entry is None:
+            return None
+        state = "in_flight" if entry.expires == math.inf else "completed"
+        task_id = await entry.task_id
+        if task_id is not None:
+            DUPLICATE_MESSAGES.labels(state).inc()
+        return task_id
+
+    async def _setup_message_execution(self, params: MessageSendParams, context: ServerCallContext | None = None):
+        key = self.idempotency.key(params.message)
+        try:
+            setup = await super()._setup_message_execution(params, context)
+        except BaseException:
+            self.idempotency.release(key)
+            raise
+        task_id, producer_task = setup[1], setup[4]
+        # open the log now: a duplicate may look for it before the executor runs
+        self.event_log.start(task_id)
+        self.idempotency.resolve(key, task_id)
+
+        def finished(_: asyncio.Task) -> None:
+            # also covers an executor that failed before closing its log
+            self.event_log.finish(task_id)
+            self.idempotency.finish(key)
+
+        producer_task.add_done_callback(finished)
+        return setup
+
+    async def on_message_send(
+        self,
+        params: MessageSendParams,
+        context: ServerCallContext | None = None,
+    ) -> Message | Task:
+        task_id = await self._duplicate_of(params)
+        if task_id is not None:
+            log = self.event_log.get(task_id)
+            blocking = not (params.configuration and params.configuration.blocking is False)
+            task = await _replayed_task(log, blocking) if log is not None else await self.task_store.get(task_id)
+            if task is not None:
+                return task
+        return await super().on_message_send(params, context)
+
+    async def on_message_send_stream(
+        self,
+        params: MessageSendParams,
+        context: ServerCallContext | None = None,
+    ) -> AsyncGenerator[Event]:
+        task_id = await self._duplicate_of(params)
+        if task_id is not None:
+            log = self.event_log.get(task_id)
+            if log is not None:
+                async for _, event in log.follow(-1):
+                    yield event
+                return
+            task = await self.task_store.get(task_id)
+            if task is not None:
+                yield task
+                return
+        async for event in super().on_message_send_stream(params, context):
+            yield event
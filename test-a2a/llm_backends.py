@@ -0,0 +1,177 @@
+"""Pluggable chat model backends for the Test A2A Agent.
+
+``LLM_BACKEND=azure`` (default) uses Azure OpenAI. ``LLM_BACKEND=fake`` uses
+a deterministic local model with configurable latency, throughput, output
+length and error injection, so the servers can be load-tested and profiled
+without a model deployment.
+"""
+
+import asyncio
+import functools
+import math
+import os
+import random
+import zlib
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+LLM_BACKENDS = ("azure", "fake")
+
+_VOCABULARY = (
+    "the model reports that results improve when the system caches data and "
+    "streams tokens to clients while requests queue behind slower upstream "
+    "calls so latency depends on load rate size and network conditions"
+).split()
+
+
+class FakeLLMError(RuntimeError):
+    """Error injected by :class:`FakeChatModel`."""
+
+
+@dataclass
+class FakeLLMConfig:
+    """Timing and output shape of the fake model.
+
+    Attributes:
+        ttft: Seconds before the first token
+        tokens_per_sec: Token rate after the first token (0 = no delay)
+        output_tokens: Median number of output tokens
+        output_sigma: Log-normal sigma of the output length (0 = fixed length)
+        error_rate: Probability that a call fails (before or during streaming)
+        seed: Base seed; outputs are a function of the seed and the prompt
+    """
+
+    ttft: float = 0.3
+    tokens_per_sec: float = 50.0
+    output_tokens: int = 120
+    output_sigma: float = 0.5
+    error_rate: float = 0.0
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMConfig":
+        """Build a config from ``FAKE_LLM_*`` environment variables."""
+        return cls(
+            ttft=float(os.getenv("FAKE_LLM_TTFT_MS", "300")) / 1000,
+            tokens_per_sec=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "50")),
+            output_tokens=int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "120")),
+            output_sigma=float(os.getenv("FAKE_LLM_OUTPUT_SIGMA", "0.5")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+
+class FakeChatModel:
+    """Deterministic stand-in for a LangChain chat model.
+
+    Implements the ``ainvoke``/``astream`` subset the agent uses. The same
+    prompt always yields the same text, length and error decision.
+    """
+
+    def __init__(self, config: FakeLLMConfig | None = None):
+        """Initialize the fake model.
+
+        Args:
+            config: Timing and output settings (defaults from the environment)
+        """
+        self.config = config or FakeLLMConfig.from_env()
+
+    def _plan(self, messages: Sequence[BaseMessage]) -> tuple[list[str], int | None]:
+        """Pick output tokens and an optional failure position for a prompt."""
+        prompt = "\x1e".join(str(m.content) for m in messages)
+        rng = random.Random(self.config.seed ^ zlib.crc32(prompt.encode()))
+        n = self.config.output_tokens
+        if self.config.output_sigma > 0:
+            n = round(n * math.exp(rng.gauss(0.0, self.config.output_sigma)))
+        n = max(1, min(n, 4096))
+        tokens = [rng.choice(_VOCABULARY) + " " for _ in range(n)]
+        fail_at = None
+        if rng.random() < self.config.error_rate:
+            # Half of the failures happen before the first token, half mid-stream
+            fail_at = 0 if rng.random() < 0.5 else rng.randrange(1, n + 1)
+        return tokens, fail_at
+
+    async def astream(
+        self, messages: Sequence[BaseMessage], **kwargs: Any
+    ) -> AsyncIterator[AIMessageChunk]:
+        """Stream tokens with the configured time-to-first-token and rate."""
+        tokens, fail_at = self._plan(messages)
+        delay = 1.0 / self.config.tokens_per_sec if self.config.tokens_per_sec > 0 else 0.0
+        await asyncio.sleep(self.config.ttft)
+        for i, token in enumerate(tokens):
+            if i == fail_at:
+                raise FakeLLMError(f"injected failure after {i} token(s)")
+            if i and delay:
+                await asyncio.sleep(delay)
+            yield AIMessageChunk(content=token)
+        if fail_at == len(tokens):
+            raise FakeLLMError(f"injected failure after {len(tokens)} token(s)")
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs: Any) -> AIMessage:
+        """Return the full response after the simulated generation time."""
+        content = ""
+        async for chunk in self.astream(messages):
+            content += chunk.content
+        return AIMessage(content=content)
+
+
+@functools.cache
+def _azure_llm() -> Any:
+    """The Azure OpenAI chat model from environment configuration.
+
+    One client per process: agents share its connection pool, and the LLM
+    gateway (llm_gateway.py) is the only place that retries failed calls (429s
+    and transient errors).
+    """
+    from langchain_openai import AzureChatOpenAI
+
+    # Get Azure OpenAI credentials from environment
+    azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    azure_api_key = os.getenv("AZURE_API_KEY")
+    azure_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-5-mini")
+
+    # Fallback: construct endpoint from resource name if not set
+    if not azure_endpoint:
+        resource_name = os.getenv("AZURE_RESOURCE_NAME")
+        if resource_name:
+            azure_endpoint = f"https://{resource_name}.openai.azure.com"
+
+    if not azure_api_key or not azure_endpoint:
+        raise ValueError(
+            "Azure OpenAI configuration is required. "
+            "Set AZURE_API_KEY and AZURE_OPENAI_ENDPOINT (or AZURE_RESOURCE_NAME) "
+            "in your .env file or ../.env.local, or set LLM_BACKEND=fake"
+        )
+
+    return AzureChatOpenAI(
+        azure_endpoint=azure_endpoint,
+        api_key=azure_api_key,
+        azure_deployment=azure_deployment,
+        api_version="2025-04-01-preview",
+        temperature=1.0,  # GPT-5-mini only supports default temperature (1.0)
+        streaming=True,
+        max_retries=0,
+    )
+
+
+def make_llm(backend: str | None = None) -> Any:
+    """Create the chat model for the selected backend.
+
+    Args:
+        backend: ``"azure"`` or ``"fake"``; defaults to ``LLM_BACKEND`` or azure
+
+    Returns:
+        A chat model exposing ``ainvoke`` and ``astream``
+
+    Raises:
+        ValueError: Unknown backend or missing Azure configuration
+    """
+    backend = (backend or os.getenv("LLM_BACKEND", "azure")).lower()
+    if backend == "fake":
+        return FakeChatModel()
+    if backend == "azure":
+        return _azure_llm()
+    raise ValueError(f"Unknown LLM backend {backend!r}; expected one of {LLM_BACKENDS}")
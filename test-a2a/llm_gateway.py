@@ -0,0 +1,393 @@
+"""Process-wide gateway in front of the chat model.
+
+Every LLM call (chat, map and reduce steps, bulk jobs) goes through one
+:class:`LLMGateway` per process, which enforces:
+
+- a concurrency limit (``LLM_CONCURRENCY``)
+- request and token budgets per minute (``LLM_RPM``, ``LLM_TPM``; 0 = no
+  limit) as token buckets. A call is charged its prompt estimate (characters
+  / 4) plus ``LLM_EXPECTED_OUTPUT_TOKENS``, then corrected by the usage the
+  model reports (or the streamed text) when it finishes
+- fair queuing: waiting calls are grouped by session (the A2A context id,
+  set by the executor with :func:`llm_session`) and served round-robin, so
+  one session's map step cannot starve another session's chat reply
+- 429 handling: a rate-limited response pauses the gateway for its
+  ``Retry-After`` (or an exponential backoff), drains the buckets and retries
+  the call through the queue, up to ``LLM_MAX_RETRIES`` times
+- transient errors (408, 409, 5xx, connection failures and timeouts) retry
+  the same call after its own exponential backoff, without pausing others,
+  also up to ``LLM_MAX_RETRIES`` times (the Azure client does not retry)
+
+Time spent queued is reported as ``llm_gateway_wait_seconds``; the model's
+own latency metrics (``llm_call_duration_seconds``, TTFT) exclude it.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from metrics import LLM_GATEWAY_QUEUED, LLM_GATEWAY_WAIT, LLM_RATE_LIMITED
+
+# Session of the LLM calls made by the current task (fair-queuing key)
+_session: ContextVar[str] = ContextVar("llm_session", default="")
+
+# Backoff after a 429 without Retry-After: 1 s doubling up to a minute
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 60.0
+
+# Backoff between retries of a transient error: 0.5 s doubling up to 8 s
+_RETRY_BASE = 0.5
+_RETRY_MAX = 8.0
+
+
+@contextmanager
+def llm_session(session_id: str) -> Iterator[None]:
+    """Attribute LLM calls made inside the block to `session_id`."""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Rough prompt size: 4 characters per token plus per-message overhead."""
+    return sum(len(str(m.content)) // 4 + 4 for m in messages)
+
+
+def _status(error: BaseException) -> int | None:
+    response = getattr(error, "response", None)
+    return getattr(error, "status_code", None) or getattr(response, "status_code", None)
+
+
+def rate_limit_delay(error: BaseException) -> float | None:
+    """Seconds to back off if `error` is a 429, None for other errors.
+
+    0.0 means rate-limited without a usable ``Retry-After``.
+    """
+    if _status(error) != 429:
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if ms := headers.get("retry-after-ms"):
+            return float(ms) / 1000
+        value = (headers.get("retry-after") or "").strip()
+        if not value:
+            return 0.0
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for errors worth retrying as-is: 408, 409, 5xx and connection failures.
+
+    The same set the OpenAI client retries (besides 429, which the gateway
+    handles with :func:`rate_limit_delay`).
+    """
+    status = _status(error)
+    if isinstance(status, int):
+        return status in (408, 409) or status >= 500
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    # openai.APIConnectionError (and APITimeoutError) without importing openai
+    return any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__)
+
+
+class TokenBucket:
+    """Budget of `per_minute` units, refilled continuously."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (after a refill)."""
+        # a call larger than the whole budget waits for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Charge `amount` (may be negative to refund; the level can go below 0)."""
+        self.level = min(self.capacity, self.level - amount)
+
+
+@dataclass
+class _Waiter:
+    tokens: int
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class Lease:
+    """A granted call; set `used` to the actual token count when known."""
+
+    __slots__ = ("tokens", "used")
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.used: int | None = None
+
+
+class LLMGateway:
+    """Concurrency, RPM/TPM budgets and fair queuing for LLM calls."""
+
+    def __init__(
+        self,
+        rpm: float = 0,
+        tpm: float = 0,
+        concurrency: int = 32,
+        max_retries: int = 3,
+        expected_output_tokens: int = 512,
+    ) -> None:
+        """Initialize the gateway.
+
+        Args:
+            rpm: Requests per minute (0 = unlimited)
+            tpm: Prompt plus output tokens per minute (0 = unlimited)
+            concurrency: Calls in flight at once
+            max_retries: Retries of a call answered with 429 or a transient error
+            expected_output_tokens: Output tokens charged up front per call
+        """
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.expected_output_tokens = expected_output_tokens
+        self._sessions: dict[str, deque[_Waiter]] = {}
+        self._ready: deque[str] = deque()  # sessions with waiters, round-robin order
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._backoff = 0.0
+        self._wakeup: asyncio.TimerHandle | None = None
+        self.rate_limited = 0
+        LLM_GATEWAY_QUEUED.set_function(self.queued)
+
+    @classmethod
+    def from_env(cls) -> "LLMGateway":
+        """From ``LLM_RPM``, ``LLM_TPM``, ``LLM_CONCURRENCY``, ``LLM_MAX_RETRIES``
+        and ``LLM_EXPECTED_OUTPUT_TOKENS``."""
+        return cls(
+            rpm=float(os.getenv("LLM_RPM", "0")),
+            tpm=float(os.getenv("LLM_TPM", "0")),
+            concurrency=int(os.getenv("LLM_CONCURRENCY", "32")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            expected_output_tokens=int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "512")),
+        )
+
+    def queued(self) -> int:
+        return sum(1 for q in self._sessions.values() for w in q if not w.future.done())
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a call of `tokens` fits the budgets (0 = now)."""
+        wait = max(0.0, self._blocked_until - now)
+        for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+        return wait
+
+    def _pump(self) -> None:
+        self._wakeup = None
+        now = time.monotonic()
+        while self._ready and self._in_flight < self.concurrency:
+            session = self._ready[0]
+            waiters = self._sessions[session]
+            while waiters and waiters[0].future.done():
+                waiters.popleft()  # cancelled while queued
+            if not waiters:
+                self._ready.popleft()
+                del self._sessions[session]
+                continue
+            wait = self._wait_time(waiters[0].tokens, now)
+            if wait > 0:
+                # the next session in turn waits for budget; nobody overtakes it
+                loop = asyncio.get_running_loop()
+                self._wakeup = loop.call_later(wait, self._pump)
+                return
+            waiter = waiters.popleft()
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(min(waiter.tokens, self.tokens.capacity))
+            self._in_flight += 1
+            waiter.future.set_result(None)
+            self._ready.rotate(-1)
+
+    def _schedule(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._pump()
+
+    def _release(self, lease: Lease | None) -> None:
+        self._in_flight -= 1
+        if lease is not None and lease.used is not None and self.tokens is not None:
+            self.tokens.take(lease.used - min(lease.tokens, self.tokens.capacity))
+        self._schedule()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int) -> AsyncIterator[Lease]:
+        """Wait for the budgets and a concurrency slot; hold the slot for the block."""
+        session = _session.get()
+        waiter = _Waiter(tokens, asyncio.get_running_loop().create_future())
+        queue = self._sessions.get(session)
+        if queue is None:
+            queue = self._sessions[session] = deque()
+            self._ready.append(session)
+        queue.append(waiter)
+        self._schedule()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(None)  # slot was granted as we got cancelled
+            raise
+        LLM_GATEWAY_WAIT.observe(time.perf_counter() - waiter.queued_at)
+        lease = Lease(tokens)
+        try:
+            yield lease
+        finally:
+            self._release(lease)
+
+    def throttle(self, retry_after: float) -> None:
+        """Pause all calls after a 429 and empty the budgets."""
+        self.rate_limited += 1
+        LLM_RATE_LIMITED.inc()
+        if retry_after <= 0:
+            self._backoff = min(_BACKOFF_MAX, self._backoff * 2 or _BACKOFF_BASE)
+            retry_after = self._backoff * random.uniform(0.5, 1.0)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.level = min(bucket.level, 0.0)
+
+    def succeeded(self) -> None:
+        self._backoff = 0.0
+
+    def stats(self) -> dict[str, float | None]:
+        """Queue, in-flight and budget levels (None for unlimited budgets)."""
+        now = time.monotonic()
+        return {
+            "queued": self.queued(),
+            "sessions_waiting": len(self._ready),
+            "in_flight": self._in_flight,
+            "rate_limited": self.rate_limited,
+            "blocked_for": round(max(0.0, self._blocked_until - now), 3),
+            "rpm_available": round(self.requests.level, 1) if self.requests else None,
+            "tpm_available": round(self.tokens.level, 1) if self.tokens else None,
+        }
+
+
+_GATEWAY: LLMGateway | None = None
+
+
+def gateway() -> LLMGateway:
+    """The process-wide gateway (configured from the environment on first use)."""
+    global _GATEWAY
+    if _GATEWAY is None:
+        _GATEWAY = LLMGateway.from_env()
+    return _GATEWAY
+
+
+def _usage(message: AIMessage | AIMessageChunk | None) -> int | None:
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+class GatewayChatModel:
+    """Chat model whose calls go through an :class:`LLMGateway`."""
+
+    def __init__(self, inner: Any, llm_gateway: LLMGateway | None = None):
+        """Initialize the wrapper.
+
+        Args:
+            inner: Chat model exposing ``ainvoke`` and ``astream``
+            llm_gateway: Gateway to use (the process-wide one by default)
+        """
+        self.inner = inner
+        self.gateway = llm_gateway or gateway()
+
+    def _cost(self, messages: Sequence[BaseMessage]) -> tuple[int, int]:
+        prompt = estimate_tokens(messages)
+        return prompt, prompt + self.gateway.expected_output_tokens
+
+    def _backoff(self, error: Exception, retries: int) -> float | None:
+        """Seconds to sleep before retrying after `error`, None to give up.
+
+        A 429 throttles the whole gateway (the retry then waits in the queue);
+        a transient error backs off only this call.
+        """
+        if retries == self.gateway.max_retries:
+            return None
+        delay = rate_limit_delay(error)
+        if delay is not None:
+            self.gateway.throttle(delay)
+            return 0.0
+        if is_transient(error):
+            return min(_RETRY_MAX, _RETRY_BASE * 2**retries) * random.uniform(0.5, 1.0)
+        return None
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs: Any) -> Any:
+        prompt, cost = self._cost(messages)
+        retries = 0
+        while True:
+            async with self.gateway.slot(cost) as lease:
+                try:
+                    response = await self.inner.ainvoke(messages, **kwargs)
+                except Exception as e:
+                    delay = self._backoff(e, retries)
+                    if delay is None:
+                        raise
+                else:
+                    self.gateway.succeeded()
+                    lease.used = _usage(response) or prompt + len(str(response.content)) // 4
+                    return response
+            # back off outside the slot so other calls can use it
+            retries += 1
+            await asyncio.sleep(delay)
+
+    async def astream(self, messages: Sequence[BaseMessage], **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream through the gateway; failures are retried only before the first chunk."""
+        prompt, cost = self._cost(messages)
+        retries = 0
+        while True:
+            async with self.gateway.slot(cost) as lease:
+                chunks = 0
+                chars = 0
+                usage = None
+                try:
+                    async for chunk in self.inner.astream(messages, **kwargs):
+                        chunks += 1
+                        chars += len(str(chunk.content))
+                        usage = _usage(chunk) or usage
+                        yield chunk
+                except Exception as e:
+                    delay = None if chunks else self._backoff(e, retries)
+                    if delay is None:
+                        raise
+                else:
+                    self.gateway.succeeded()
+                    lease.used = usage or prompt + chars // 4
+                    return
+            retries += 1
+            await asyncio.sleep(delay)
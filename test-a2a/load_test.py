@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""Concurrent load generator and latency benchmark for A2A servers.
+
+Drives ``message/send`` and/or ``message/stream`` with either a closed-loop
+model (N sessions, each sending its next message as soon as the previous one
+finishes) or an open-loop model (Poisson arrivals at a fixed rate regardless
+of how fast the server answers), and records per request:
+
+- time to first event (first SSE event, or the response for message/send)
+- time to answer (first event carrying answer content: an artifact update,
+  or a completed / input-required status with its message)
+- total latency
+
+The agents accumulate the streamed tokens into the final status instead of
+sending them as they arrive, so no client-side time to first token exists:
+time to answer is usually the final event and close to total latency. The
+model's own TTFT is ``llm_time_to_first_token_seconds`` in ``/metrics``.
+
+Results (p50/p90/p99/max, events/sec, error rates) are printed and written
+as JSON so runs can be compared between commits::
+
+    uv run python load_test.py --arrival closed --concurrency 20 --duration 30 \\
+        --output results.json
+    uv run python load_test.py --arrival open --rate 10 --compare results.json
+"""
+
+import asyncio
+import json
+import random
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+from uuid import uuid4
+
+import click
+import httpx
+
+DEFAULT_PROMPTS = (
+    "What is quantum computing?",
+    "Give me three tips for writing clean code.",
+    "Explain the difference between REST and GraphQL.",
+)
+ANSWER_STATES = {"completed", "input-required"}
+FAILED_STATES = {"failed", "rejected", "canceled"}
+
+
+@dataclass
+class Sample:
+    """One request's outcome and timings (seconds from send)."""
+
+    mode: str
+    ok: bool
+    total: float
+    ttfe: float | None = None
+    tta: float | None = None  # time to answer (not first token, see module docstring)
+    events: int = 0
+    error: str | None = None
+
+
+@dataclass
+class Run:
+    """Collected samples plus wall-clock bounds of the measured window."""
+
+    samples: list[Sample] = field(default_factory=list)
+    started: float = 0.0
+    finished: float = 0.0
+    dropped: int = 0
+
+
+def _payload(method: str, text: str, context_id: str, metadata: dict[str, Any]) -> dict[str, Any]:
+    message: dict[str, Any] = {
+        "role": "user",
+        "parts": [{"kind": "text", "text": text}],
+        "messageId": uuid4().hex,
+        "contextId": context_id,
+    }
+    if metadata:
+        message["metadata"] = metadata
+    return {
+        "jsonrpc": "2.0",
+        "id": str(uuid4()),
+        "method": method,
+        "params": {"message": message},
+    }
+
+
+def _is_answer(result: dict[str, Any]) -> bool:
+    """Whether an event carries answer content (see module docstring)."""
+    kind = result.get("kind")
+    if kind == "artifact-update":
+        return True
+    if kind in ("status-update", "task"):
+        status = result.get("status") or {}
+        return status.get("state") in ANSWER_STATES and bool(status.get("message"))
+    return kind == "message"
+
+
+def _failed(result: dict[str, Any]) -> str | None:
+    state = (result.get("status") or {}).get("state")
+    return f"task {state}" if state in FAILED_STATES else None
+
+
+async def send_blocking(
+    client: httpx.AsyncClient, url: str, text: str, context_id: str, metadata: dict[str, Any]
+) -> Sample:
+    """Send one blocking ``message/send`` request."""
+    start = time.perf_counter()
+    try:
+        r = await client.post(url, json=_payload("message/send", text, context_id, metadata))
+        elapsed = time.perf_counter() - start
+        r.raise_for_status()
+        body = r.json()
+        if "error" in body:
+            return Sample("send", False, elapsed, error=f"rpc {body['error'].get('code')}")
+        result = body.get("result") or {}
+        error = _failed(result)
+        return Sample("send", error is None, elapsed, elapsed, elapsed, 1, error)
+    except Exception as e:
+        return Sample("send", False, time.perf_counter() - start, error=type(e).__name__)
+
+
+async def send_streaming(
+    client: httpx.AsyncClient, url: str, text: str, context_id: str, metadata: dict[str, Any]
+) -> Sample:
+    """Send one ``message/stream`` request and time its SSE events."""
+    start = time.perf_counter()
+    sample = Sample("stream", True, 0.0)
+    try:
+        async with client.stream(
+            "POST",
+            url,
+            json=_payload("message/stream", text, context_id, metadata),
+            headers={"Accept": "text/event-stream"},
+        ) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                now = time.perf_counter() - start
+                sample.events += 1
+                if sample.ttfe is None:
+                    sample.ttfe = now
+                body = json.loads(line[5:])
+                if "error" in body:
+                    sample.ok, sample.error = False, f"rpc {body['error'].get('code')}"
+                    break
+                result = body.get("result") or {}
+                if sample.tta is None and _is_answer(result):
+                    sample.tta = now
+                if error := _failed(result):
+                    sample.ok, sample.error = False, error
+    except Exception as e:
+        sample.ok, sample.error = False, type(e).__name__
+    sample.total = time.perf_counter() - start
+    return sample
+
+
+async def _one(
+    client: httpx.AsyncClient, url: str, mode: str, text: str, context_id: str, metadata: dict[str, Any]
+) -> Sample:
+    if mode == "stream":
+        return await send_streaming(client, url, text, context_id, metadata)
+    return await send_blocking(client, url, text, context_id, metadata)
+
+
+async def closed_loop(
+    client: httpx.AsyncClient,
+    url: str,
+    modes: list[str],
+    prompts: list[str],
+    concurrency: int,
+    duration: float,
+    metadata: dict[str, Any],
+) -> Run:
+    """N sessions, each issuing its next request when the previous one ends."""
+    run = Run(started=time.perf_counter())
+    deadline = run.started + duration
+
+    async def session(idx: int) -> None:
+        context_id = str(uuid4())
+        turn = 0
+        while time.perf_counter() < deadline:
+            mode = modes[(idx + turn) % len(modes)]
+            text = prompts[(idx + turn) % len(prompts)]
+            run.samples.append(await _one(client, url, mode, text, context_id, metadata))
+            turn += 1
+
+    await asyncio.gather(*(session(i) for i in range(concurrency)))
+    run.finished = time.perf_counter()
+    return run
+
+
+async def open_loop(
+    client: httpx.AsyncClient,
+    url: str,
+    modes: list[str],
+    prompts: list[str],
+    rate: float,
+    duration: float,
+    max_inflight: int,
+    metadata: dict[str, Any],
+    seed: int,
+) -> Run:
+    """Poisson arrivals at `rate` req/s, independent of response times."""
+    rng = random.Random(seed)
+    run = Run(started=time.perf_counter())
+    deadline = run.started + duration
+    inflight: set[asyncio.Task] = set()
+    n = 0
+
+    async def request(i: int) -> None:
+        run.samples.append(
+            await _one(client, url, modes[i % len(modes)], prompts[i % len(prompts)], str(uuid4()), metadata)
+        )
+
+    next_at = run.started
+    while True:
+        next_at += rng.expovariate(rate)
+        if next_at >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if len(inflight) >= max_inflight:
+            run.dropped += 1  # client-side guard, reported as "dropped"
+            continue
+        task = asyncio.create_task(request(n))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+        n += 1
+
+    if inflight:
+        await asyncio.wait(inflight)
+    run.finished = time.perf_counter()
+    return run
+
+
+def _percentiles(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+    values = sorted(values)
+
+    def pct(p: float) -> float:
+        return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+    return {
+        "p50": round(pct(50), 4),
+        "p90": round(pct(90), 4),
+        "p99": round(pct(99), 4),
+        "max": round(values[-1], 4),
+        "mean": round(sum(values) / len(values), 4),
+    }
+
+
+def summarize(run: Run) -> dict[str, Any]:
+    """Aggregate samples per mode into latency percentiles and rates."""
+    wall = max(run.finished - run.started, 1e-9)
+    out: dict[str, Any] = {"wall_seconds": round(wall, 3), "dropped": run.dropped, "modes": {}}
+    for mode in sorted({s.mode for s in run.samples}):
+        samples = [s for s in run.samples if s.mode == mode]
+        ok = [s for s in samples if s.ok]
+        errors: dict[str, int] = {}
+        for s in samples:
+            if s.error:
+                errors[s.error] = errors.get(s.error, 0) + 1
+        events = sum(s.events for s in samples)
+        out["modes"][mode] = {
+            "requests": len(samples),
+            "errors": len(samples) - len(ok),
+            "error_rate": round((len(samples) - len(ok)) / len(samples), 4),
+            "error_kinds": errors,
+            "requests_per_sec": round(len(samples) / wall, 3),
+            "events_per_sec": round(events / wall, 3),
+            "events_per_request": round(events / len(samples), 2),
+            "total": _percentiles([s.total for s in ok]),
+            "ttfe": _percentiles([s.ttfe for s in ok if s.ttfe is not None]),
+            "tta": _percentiles([s.tta for s in ok if s.tta is not None]),
+        }
+    return out
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(current: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Print relative change of p50/p99 latencies and error rate per mode."""
+    click.echo(f"\nCompared with baseline {baseline.get('commit') or '?'}:")
+    for mode, cur in current["summary"]["modes"].items():
+        base = baseline.get("summary", {}).get("modes", {}).get(mode)
+        if not base:
+            continue
+        for metric in ("total", "ttfe", "tta"):
+            for p in ("p50", "p99"):
+                a, b = (base.get(metric) or {}).get(p), (cur.get(metric) or {}).get(p)
+                if a and b:
+                    click.echo(f"  {mode:6} {metric:5} {p}: {a:.4f}s -> {b:.4f}s ({(b - a) / a:+.1%})")
+        click.echo(f"  {mode:6} error rate: {base['error_rate']:.2%} -> {cur['error_rate']:.2%}")
+
+
+@click.command()
+@click.option("--url", default="http://localhost:9999", help="A2A server base URL")
+@click.option("--mode", type=click.Choice(["send", "stream", "both"]), default="both")
+@click.option("--arrival", type=click.Choice(["closed", "open"]), default="closed")
+@click.option("--concurrency", default=10, type=int, help="Sessions (closed loop)")
+@click.option("--rate", default=5.0, type=float, help="Arrivals per second (open loop)")
+@click.option("--max-inflight", default=1000, type=int, help="Open-loop in-flight cap")
+@click.option("--duration", default=30.0, type=float, help="Seconds to generate load")
+@click.option("--prompt", "prompts", multiple=True, help="Prompt(s) to cycle through")
+@click.option("--latency-profile", default=None, help="latency_profile metadata to send (server needs LATENCY_PER_REQUEST=1)")
+@click.option("--timeout", default=120.0, type=float, help="Per-request timeout (s)")
+@click.option("--seed", default=0, type=int, help="Seed for open-loop arrivals")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write results JSON here")
+@click.option("--compare", type=click.Path(exists=True, dir_okay=False), help="Baseline JSON")
+def main(
+    url: str,
+    mode: str,
+    arrival: str,
+    concurrency: int,
+    rate: float,
+    max_inflight: int,
+    duration: float,
+    prompts: tuple[str, ...],
+    latency_profile: str | None,
+    timeout: float,
+    seed: int,
+    output: str | None,
+    compare: str | None,
+) -> None:
+    """Benchmark an A2A server under concurrent load."""
+    modes = ["send", "stream"] if mode == "both" else [mode]
+    prompt_list = list(prompts or DEFAULT_PROMPTS)
+    metadata = {"latency_profile": latency_profile} if latency_profile else {}
+
+    async def go() -> Run:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=max(concurrency, 20))
+        async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+            if arrival == "closed":
+                return await closed_loop(client, url, modes, prompt_list, concurrency, duration, metadata)
+            return await open_loop(
+                client, url, modes, prompt_list, rate, duration, max_inflight, metadata, seed
+            )
+
+    click.echo(f"Driving {url} ({arrival} loop, {'/'.join(modes)}) for {duration:.0f}s...")
+    run = asyncio.run(go())
+    result = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "url": url,
+            "modes": modes,
+            "arrival": arrival,
+            "concurrency": concurrency if arrival == "closed" else None,
+            "rate": rate if arrival == "open" else None,
+            "duration": duration,
+            "prompts": prompt_list,
+            "latency_profile": latency_profile,
+        },
+        "summary": summarize(run),
+        "samples": [asdict(s) for s in run.samples],
+    }
+    click.echo(json.dumps(result["summary"], indent=2))
+    if output:
+        with open(output, "w") as f:
+            json.dump(result, f, indent=2)
+        click.echo(f"Wrote {output}")
+    if compare:
+        with open(compare) as f:
+            _compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Memory accounting for a running server.
+
+``GET /debug/memory`` (behind ``ADMIN_TOKEN``) reports approximate deep sizes
+of what the process keeps per conversation, per task in the task store, per
+push notification config and per cache. With ``tracemalloc=snapshot`` it also
+lists the top allocation sites and, from the second snapshot on, the growth
+since the previous one.
+
+Sizes are ``sys.getsizeof`` summed over the reachable containers, model
+fields and slots of each object: good for ranking sessions and stores, not
+an exact RSS breakdown. tracemalloc starts on the first snapshot request
+(or at startup with ``TRACEMALLOC_FRAMES``) and only sees allocations made
+after it started.
+"""
+
+import asyncio
+import os
+import sys
+import tracemalloc
+from collections import deque
+from types import FunctionType, MethodType, ModuleType
+from typing import Any
+
+from admin import admin_error
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+# Attributes of TestAgent holding cached data, reported when present
+CACHE_ATTRS = ("page_cache", "summary_cache", "chunk_index")
+
+_LEAVES = (str, bytes, bytearray, int, float, complex, bool, type(None))
+# never walked into: shared runtime objects reachable from locks and clients
+_SKIP = (type, ModuleType, FunctionType, MethodType, asyncio.AbstractEventLoop)
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate bytes reachable from `obj` (each object counted once)."""
+    seen: set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _SKIP):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, _LEAVES):
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        else:
+            attrs = getattr(o, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for name in getattr(type(o), "__slots__", ()):
+                value = getattr(o, name, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+def _top(sizes: dict[str, int], top: int) -> list[dict[str, Any]]:
+    return [{"id": key, "bytes": n} for key, n in sorted(sizes.items(), key=lambda kv: -kv[1])[:top]]
+
+
+class MemoryInspector:
+    """Accounts the agent's sessions and caches and the server's stores."""
+
+    def __init__(self, agent: Any, task_store: Any = None, push_config_store: Any = None):
+        """Initialize the inspector.
+
+        Args:
+            agent: TestAgent whose conversations and caches are reported
+            task_store: In-memory task store (``.tasks`` dict), if any
+            push_config_store: In-memory push notification config store, if any
+                (its per-task config lists are measured)
+        """
+        self.agent = agent
+        self.task_store = task_store
+        self.push_config_store = push_config_store
+        self._snapshot: tracemalloc.Snapshot | None = None
+        frames = int(os.getenv("TRACEMALLOC_FRAMES", "0"))
+        if frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def _session_index_bytes(self, session_id: str) -> int:
+        index = getattr(self.agent, "chunk_index", None)
+        return index.session_nbytes(session_id) if index is not None else 0
+
+    def accounting(self, top: int = 20) -> dict[str, Any]:
+        """Approximate bytes per session, task, push config store and cache."""
+        sessions = {
+            sid: deep_sizeof(history) + self._session_index_bytes(sid)
+            for sid, history in list(self.agent.conversations.items())
+        }
+        tasks = (
+            {tid: deep_sizeof(task) for tid, task in list(self.task_store.tasks.items())}
+            if self.task_store is not None and hasattr(self.task_store, "tasks")
+            else {}
+        )
+        # the chunk index keeps its own byte count; walking it would be slow
+        caches = {
+            name: cache.nbytes if hasattr(cache, "nbytes") else deep_sizeof(cache)
+            for name in CACHE_ATTRS
+            if (cache := getattr(self.agent, name, None)) is not None
+        }
+        report: dict[str, Any] = {
+            "sessions": {"count": len(sessions), "bytes": sum(sessions.values()), "top": _top(sessions, top)},
+            "tasks": {"count": len(tasks), "bytes": sum(tasks.values()), "top": _top(tasks, top)},
+            "caches": caches,
+        }
+        if self.push_config_store is not None:
+            configs = getattr(self.push_config_store, "_push_notification_infos", {})
+            report["push_configs"] = {"tasks": len(configs), "bytes": deep_sizeof(configs)}
+        return report
+
+    def snapshot(self, top: int = 20) -> dict[str, Any]:
+        """Top allocation sites, plus the diff against the previous snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            return {"tracing": "started", "note": "allocations are tracked from now; request another snapshot"}
+        snap = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        report: dict[str, Any] = {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"site": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                for stat in snap.statistics("lineno")[:top]
+            ],
+        }
+        if self._snapshot is not None:
+            report["diff"] = [
+                {"site": str(stat.traceback), "bytes": stat.size, "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in snap.compare_to(self._snapshot, "lineno")[:top]
+            ]
+        self._snapshot = snap
+        return report
+
+    async def endpoint(self, request: Request) -> JSONResponse:
+        """``GET /debug/memory`` handler (``Authorization: Bearer $ADMIN_TOKEN``).
+
+        Query parameters: ``top`` (default 20) and ``tracemalloc``
+        (``snapshot`` to add allocation sites, ``stop`` to end tracing).
+        """
+        if (error := admin_error(request)) is not None:
+            return error
+        try:
+            top = int(request.query_params.get("top", "20"))
+        except ValueError:
+            return JSONResponse({"error": "top must be an integer"}, status_code=400)
+        report = self.accounting(top)
+        action = request.query_params.get("tracemalloc")
+        if action == "snapshot":
+            report["tracemalloc"] = self.snapshot(top)
+        elif action == "stop":
+            tracemalloc.stop()
+            self._snapshot = None
+            report["tracemalloc"] = {"tracing": "stopped"}
+        return JSONResponse(report)
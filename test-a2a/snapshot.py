@@ -0,0 +1,336 @@
+"""Warm-restart snapshots of conversation histories and tasks.
+
+With ``SNAPSHOT_PATH`` set, the server writes every session's history and
+every task in the task store to one binary file periodically
+(``SNAPSHOT_INTERVAL`` seconds) and on graceful shutdown. On startup only the
+file's index is read, so the server takes traffic immediately; a session or
+task is decoded the first time it is accessed. Records not accessed since
+the last restart, and loaded ones unchanged since the last snapshot, are
+copied byte for byte into the next snapshot; only new and changed sessions
+and tasks are encoded again.
+
+File layout (integers little-endian)::
+
+    b"A2ASNAP1"
+    records         zlib-compressed JSON: a session's alternating texts,
+                    or a task as A2A JSON
+    index           per record: kind (b"s"/b"t"), u16 key length, key,
+                    u64 offset, u32 length
+    footer          u64 index offset, u32 record count, b"A2ASNAP1"
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import Task
+from history import History
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"A2ASNAP1"
+SESSION, TASK = b"s", b"t"
+_ENTRY = struct.Struct("<QI")
+_FOOTER = struct.Struct("<QI8s")
+
+
+class SnapshotFile:
+    """Lazily decoded records of one snapshot file."""
+
+    def __init__(self, path: str | Path):
+        """Open `path` and read its index (records are read on demand).
+
+        Raises:
+            ValueError: The file is not a complete snapshot
+        """
+        self.path = Path(path)
+        self._file: BinaryIO = self.path.open("rb")
+        # records are read on the loop (restores) and by the snapshot writer thread
+        self._lock = threading.Lock()
+        # cleared while a new snapshot was being written; re-applied to it
+        self.discarded: set[tuple[bytes, str]] = set()
+        # records also held in memory, as stored in this file
+        self._loaded: dict[tuple[bytes, str], tuple[int, int]] = {}
+        try:
+            self._pending = self._read_index()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _read_index(self) -> dict[tuple[bytes, str], tuple[int, int]]:
+        f = self._file
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.path} is not a snapshot")
+        f.seek(-_FOOTER.size, os.SEEK_END)
+        index_offset, count, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is truncated")
+        f.seek(index_offset)
+        pending = {}
+        for _ in range(count):
+            kind = f.read(1)
+            (key_len,) = struct.unpack("<H", f.read(2))
+            key = f.read(key_len).decode()
+            pending[(kind, key)] = _ENTRY.unpack(f.read(_ENTRY.size))
+        return pending
+
+    def __len__(self) -> int:
+        """Records not yet loaded."""
+        return len(self._pending)
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Compressed record as stored."""
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def take(self, kind: bytes, key: str) -> bytes | None:
+        """Decompressed record, removed from the pending set; None if absent."""
+        entry = self._pending.pop((kind, key), None)
+        if entry is None:
+            return None
+        self._loaded[(kind, key)] = entry
+        return zlib.decompress(self.read(*entry))
+
+    def keep(self, kind: bytes, key: str) -> None:
+        """Mark a record as held in memory (no longer pending)."""
+        entry = self._pending.pop((kind, key), None)
+        if entry is not None:
+            self._loaded[(kind, key)] = entry
+
+    def stored(self, kind: bytes, key: str) -> tuple[int, int] | None:
+        """(offset, length) of a record held in memory, as stored in this file."""
+        return self._loaded.get((kind, key))
+
+    def discard(self, kind: bytes, key: str) -> None:
+        """Forget a record (e.g. a cleared session)."""
+        self._pending.pop((kind, key), None)
+        self._loaded.pop((kind, key), None)
+        self.discarded.add((kind, key))
+
+    def pending(self) -> list[tuple[tuple[bytes, str], tuple[int, int]]]:
+        """(kind, key), (offset, length) of the records not loaded yet."""
+        return list(self._pending.items())
+
+    def load_session(self, session_id: str) -> History | None:
+        data = self.take(SESSION, session_id)
+        return History(json.loads(data)) if data is not None else None
+
+    def load_task(self, task_id: str) -> Task | None:
+        data = self.take(TASK, task_id)
+        return Task.model_validate_json(data) if data is not None else None
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def write_snapshot(
+    path: str | Path,
+    records: list[tuple[bytes, str, bytes]],
+    carried: SnapshotFile | None = None,
+    entries: list[tuple[tuple[bytes, str], tuple[int, int]]] | None = None,
+) -> None:
+    """Write `records` (kind, key, uncompressed data) atomically to `path`.
+
+    Records of `carried` listed in `entries` (by default, those still
+    pending) are copied over without decoding.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    index = []
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        for kind, key, data in records:
+            blob = zlib.compress(data, 1)
+            index.append((kind, key, f.tell(), len(blob)))
+            f.write(blob)
+        written = {(kind, key) for kind, key, _ in records}
+        if entries is None:
+            entries = carried.pending() if carried is not None else []
+        for (kind, key), entry in entries:
+            if (kind, key) in written:
+                continue
+            blob = carried.read(*entry)
+            index.append((kind, key, f.tell(), len(blob)))
+            f.write(blob)
+        index_offset = f.tell()
+        for kind, key, offset, length in index:
+            encoded = key.encode()
+            f.write(kind + struct.pack("<H", len(encoded)) + encoded + _ENTRY.pack(offset, length))
+        f.write(_FOOTER.pack(index_offset, len(index), MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SnapshotTaskStore(InMemoryTaskStore):
+    """In-memory task store that loads snapshotted tasks on first access."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.snapshot: SnapshotFile | None = None
+        # saved since the last snapshot (the SDK saves after every update)
+        self.dirty: set[str] = set()
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        self.dirty.add(task.id)
+        await super().save(task, context)
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        if task_id not in self.tasks and self.snapshot is not None:
+            task = self.snapshot.load_task(task_id)
+            if task is not None:
+                self.tasks.setdefault(task_id, task)
+        return await super().get(task_id, context)
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        if self.snapshot is not None:
+            self.snapshot.discard(TASK, task_id)
+        self.dirty.discard(task_id)
+        await super().delete(task_id, context)
+
+
+class Snapshotter:
+    """Restores and periodically snapshots the agent's sessions and the task store."""
+
+    def __init__(self, path: str | Path, agent: Any, task_store: SnapshotTaskStore, interval: float = 60.0):
+        """Initialize the snapshotter and attach the previous snapshot, if any.
+
+        Args:
+            path: Snapshot file
+            agent: TestAgent whose ``conversations`` are snapshotted
+            task_store: Task store to snapshot and restore into
+            interval: Seconds between periodic snapshots (0 = shutdown only)
+        """
+        self.path = Path(path)
+        self.agent = agent
+        self.task_store = task_store
+        self.interval = interval
+        # each session's history and length when last encoded (histories only grow)
+        self._written: dict[str, tuple[History, int]] = {}
+        self._attach()
+        if self.agent.snapshot is not None:
+            logger.info("Snapshot %s: %d records to restore on access", self.path, len(self.agent.snapshot))
+
+    @classmethod
+    def from_env(cls, agent: Any, task_store: SnapshotTaskStore) -> "Snapshotter | None":
+        """From ``SNAPSHOT_PATH`` and ``SNAPSHOT_INTERVAL``, or None if unset."""
+        path = os.getenv("SNAPSHOT_PATH")
+        if not path:
+            return None
+        return cls(path, agent, task_store, float(os.getenv("SNAPSHOT_INTERVAL", "60")))
+
+    def _attach(self) -> None:
+        previous: SnapshotFile | None = None
+        if self.path.exists():
+            try:
+                previous = SnapshotFile(self.path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning("Ignoring unreadable snapshot %s: %s", self.path, e)
+        old = self.agent.snapshot
+        self.agent.snapshot = self.task_store.snapshot = previous
+        if old is not None:
+            old.close()
+
+    def _collect(self, old: SnapshotFile | None, dirty: set[str]) -> tuple[
+        list[tuple[str, list[str]]],
+        list[tuple[bytes, str, bytes]],
+        list[tuple[tuple[bytes, str], tuple[int, int]]],
+        dict[str, tuple[History, int]],
+    ]:
+        """Split what is in memory into records to encode and records to copy from `old`.
+
+        Runs on the event loop, so the result is a consistent view; it takes
+        no longer than copying the changed sessions' text lists and encoding
+        the changed tasks.
+        """
+        copied = old.pending() if old is not None else []
+        sessions: list[tuple[str, list[str]]] = []
+        written: dict[str, tuple[History, int]] = {}
+        for sid, history in list(self.agent.conversations.items()):
+            entry = old.stored(SESSION, sid) if old is not None else None
+            written[sid] = (history, len(history))
+            last = self._written.get(sid)
+            if entry is not None and last is not None and last[0] is history and last[1] == len(history):
+                copied.append(((SESSION, sid), entry))
+            else:
+                sessions.append((sid, history.texts()))
+        tasks: list[tuple[bytes, str, bytes]] = []
+        for tid, task in list(self.task_store.tasks.items()):
+            entry = old.stored(TASK, tid) if old is not None else None
+            if entry is not None and tid not in dirty:
+                copied.append(((TASK, tid), entry))
+            else:
+                # the SDK updates tasks in place, so they are encoded here
+                # rather than in the writer thread
+                tasks.append((TASK, tid, task.model_dump_json(exclude_none=True).encode()))
+        return sessions, tasks, copied, written
+
+    def _write(
+        self,
+        sessions: list[tuple[str, list[str]]],
+        tasks: list[tuple[bytes, str, bytes]],
+        old: SnapshotFile | None,
+        copied: list[tuple[tuple[bytes, str], tuple[int, int]]],
+    ) -> None:
+        records = [(SESSION, sid, json.dumps(texts).encode()) for sid, texts in sessions]
+        write_snapshot(self.path, records + tasks, old, copied)
+
+    async def save(self) -> None:
+        """Write a snapshot, encoding only new and changed records."""
+        started = time.perf_counter()
+        old = self.agent.snapshot
+        dirty, self.task_store.dirty = self.task_store.dirty, set()
+        sessions, tasks, copied, written = self._collect(old, dirty)
+        try:
+            await asyncio.to_thread(self._write, sessions, tasks, old, copied)
+        except BaseException:
+            self.task_store.dirty |= dirty
+            raise
+        self._written = written
+        # Switch to the new file: what is in memory is not pending there, and
+        # what was cleared during the write must not come back
+        self._attach()
+        new = self.agent.snapshot
+        if new is not None:
+            for sid in list(self.agent.conversations):
+                new.keep(SESSION, sid)
+            for tid in list(self.task_store.tasks):
+                new.keep(TASK, tid)
+            for kind, key in old.discarded if old is not None else ():
+                new.discard(kind, key)
+            new.discarded.clear()
+        logger.info(
+            "Snapshot written to %s: %d records encoded (+%d copied) in %.1f ms",
+            self.path, len(sessions) + len(tasks), len(copied), (time.perf_counter() - started) * 1000,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception:
+                logger.exception("Periodic snapshot failed")
+
+    @asynccontextmanager
+    async def lifespan(self, app: Any) -> AsyncIterator[None]:
+        """Starlette lifespan: periodic snapshots, and a final one on shutdown."""
+        task = asyncio.create_task(self._run()) if self.interval > 0 else None
+        try:
+            yield
+        finally:
+            if task is not None:
+                task.cancel()
+            await self.save()
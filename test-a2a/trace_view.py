@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Render span traces written with ``TRACE_FILE``.
+
+Per-task waterfall (latest task, a given task id, or the N slowest)::
+
+    uv run python trace_view.py waterfall
+    uv run python trace_view.py waterfall --task <task id>
+    uv run python trace_view.py waterfall --slowest 3
+
+Stage percentiles across all recorded tasks::
+
+    uv run python trace_view.py stats
+"""
+
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import click
+
+BAR_WIDTH = 50
+
+
+def load_spans(path: Path) -> list[dict[str, Any]]:
+    """Spans from `path` and its rotated backups (``path.1``, ``path.2``, ...)."""
+    backups = []
+    while (backup := path.with_name(f"{path.name}.{len(backups) + 1}")).exists():
+        backups.append(backup)
+    spans = []
+    for f in [*reversed(backups), path]:  # oldest first
+        if not f.exists():
+            continue
+        for line in f.read_text().splitlines():
+            if line.strip():
+                spans.append(json.loads(line))
+    return spans
+
+
+def group_traces(spans: list[dict[str, Any]]) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+    """(root span, spans) per trace that has a root, oldest first."""
+    by_trace: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for s in spans:
+        by_trace[s["trace_id"]].append(s)
+    traces = []
+    for trace in by_trace.values():
+        root = next((s for s in trace if s["parent_id"] is None), None)
+        if root:
+            traces.append((root, trace))
+    traces.sort(key=lambda t: t[0]["start"])
+    return traces
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    k = (len(values) - 1) * p
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def render_waterfall(root: dict[str, Any], spans: list[dict[str, Any]]) -> str:
+    """Indented span tree with offset, duration and a proportional bar."""
+    children: dict[str | None, list[dict[str, Any]]] = defaultdict(list)
+    for s in spans:
+        children[s["parent_id"]].append(s)
+    total = max(root["duration_ms"], 1e-6)
+    attrs = root["attrs"]
+    lines = [
+        f"task {attrs.get('task_id')}  context {attrs.get('context_id')}  "
+        f"{root['duration_ms']:.1f} ms  {attrs.get('events', '?')} events"
+    ]
+
+    def walk(s: dict[str, Any], depth: int) -> None:
+        offset = (s["start"] - root["start"]) * 1000
+        left = int(BAR_WIDTH * offset / total)
+        width = max(1, int(BAR_WIDTH * s["duration_ms"] / total))
+        bar = " " * min(left, BAR_WIDTH - 1) + "█" * min(width, BAR_WIDTH - min(left, BAR_WIDTH - 1))
+        detail = s["attrs"].get("url") or s["attrs"].get("endpoint") or ""
+        label = ("  " * depth + s["name"] + (f" {detail}" if detail else ""))[:44]
+        err = "  !" + s["error"] if s.get("error") else ""
+        lines.append(f"{label:44} {offset:9.1f} {s['duration_ms']:9.1f}  |{bar:{BAR_WIDTH}}|{err}")
+        for c in sorted(children[s["span_id"]], key=lambda c: c["start"]):
+            walk(c, depth + 1)
+
+    lines.append(f"{'span':44} {'start ms':>9} {'dur ms':>9}")
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+def _trace_file(ctx: click.Context) -> Path:
+    return Path(ctx.obj["file"])
+
+
+@click.group()
+@click.option(
+    "--file",
+    default=lambda: os.getenv("TRACE_FILE", "traces.jsonl"),
+    show_default="TRACE_FILE or traces.jsonl",
+    help="Trace file (rotated backups are read too)",
+)
+@click.pass_context
+def cli(ctx: click.Context, file: str) -> None:
+    """Inspect recorded task traces."""
+    ctx.obj = {"file": file}
+
+
+@cli.command()
+@click.option("--task", "task_id", default=None, help="A2A task id (default: latest task)")
+@click.option("--slowest", default=0, type=int, help="Show the N slowest tasks instead")
+@click.pass_context
+def waterfall(ctx: click.Context, task_id: str | None, slowest: int) -> None:
+    """Per-task waterfall of stage spans."""
+    traces = group_traces(load_spans(_trace_file(ctx)))
+    if task_id:
+        traces = [t for t in traces if t[0]["attrs"].get("task_id") == task_id]
+    elif slowest:
+        traces = sorted(traces, key=lambda t: t[0]["duration_ms"], reverse=True)[:slowest]
+    else:
+        traces = traces[-1:]
+    if not traces:
+        raise click.ClickException("no matching traces")
+    click.echo("\n\n".join(render_waterfall(root, spans) for root, spans in traces))
+
+
+@cli.command()
+@click.pass_context
+def stats(ctx: click.Context) -> None:
+    """Duration percentiles per span name across all tasks."""
+    durations: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    for s in load_spans(_trace_file(ctx)):
+        durations[s["name"]].append(s["duration_ms"])
+        if s.get("error"):
+            errors[s["name"]] += 1
+    if not durations:
+        raise click.ClickException("no spans recorded")
+    click.echo(f"{'span':14} {'count':>7} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10} {'errors':>7}")
+    for name, values in sorted(durations.items(), key=lambda kv: -sum(kv[1])):
+        click.echo(
+            f"{name:14} {len(values):7} {_percentile(values, 0.5):10.1f} {_percentile(values, 0.9):10.1f} "
+            f"{_percentile(values, 0.99):10.1f} {max(values):10.1f} {errors[name]:7}"
+        )
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,179 @@
+"""Lightweight per-task span tracing with a rotating JSONL exporter.
+
+Spans nest through a context variable, so stages awaited inside a task (and
+tasks it spawns) become children of the executor's root span, which carries
+the A2A task and context ids. Outbound httpx requests get a W3C
+``traceparent`` header for the current span.
+
+Tracing is off unless ``TRACE_FILE`` is set; finished spans of a task are
+written together when its root span ends. ``trace_view.py`` renders per-task
+waterfalls and stage percentiles from the files.
+
+Each line is one span::
+
+    {"trace_id": ..., "span_id": ..., "parent_id": ..., "name": "fetch",
+     "start": <epoch s>, "duration_ms": ..., "attrs": {...}, "error": ...}
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+
+@dataclass
+class Span:
+    """One timed operation."""
+
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start: float
+    duration_ms: float = 0.0
+    attrs: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, **attrs: Any) -> None:
+        """Add attributes to the span."""
+        self.attrs.update(attrs)
+
+
+class _NoopSpan(Span):
+    """Yielded while tracing is disabled; ignores attributes."""
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan("", "", None, "", 0.0)
+
+
+class JsonlExporter:
+    """Appends spans to a JSONL file, rotating it at `max_bytes`."""
+
+    def __init__(self, path: str | Path, max_bytes: int = 10 * 1024 * 1024, backups: int = 3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                src.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    def export(self, spans: list[Span]) -> None:
+        data = "".join(json.dumps(asdict(s), separators=(",", ":")) + "\n" for s in spans)
+        with self._lock:
+            if self.path.exists() and self.path.stat().st_size + len(data) > self.max_bytes:
+                self._rotate()
+            with self.path.open("a") as f:
+                f.write(data)
+
+
+class Tracer:
+    """Creates spans and hands finished traces to an exporter."""
+
+    def __init__(self, exporter: JsonlExporter | None = None):
+        self.exporter = exporter
+        self._current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+        self._finished: dict[str, list[Span]] = {}
+        self._open: set[str] = set()
+
+    def configure_from_env(self) -> None:
+        """Export to ``TRACE_FILE`` (rotated at ``TRACE_MAX_BYTES``), or disable."""
+        path = os.getenv("TRACE_FILE")
+        self.exporter = (
+            JsonlExporter(
+                path,
+                max_bytes=int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024))),
+                backups=int(os.getenv("TRACE_BACKUPS", "3")),
+            )
+            if path
+            else None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current(self) -> Span | None:
+        """The innermost open span in this context."""
+        return self._current.get()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """Time the ``with`` block as a child of the current span (or a new trace)."""
+        if self.exporter is None:
+            yield _NOOP
+            return
+        parent = self._current.get()
+        s = Span(
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            name=name,
+            start=time.time(),
+            attrs=attrs,
+        )
+        if parent is None:
+            self._open.add(s.trace_id)
+        token = self._current.set(s)
+        started = time.perf_counter()
+        try:
+            yield s
+        except BaseException as e:
+            s.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            s.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            try:
+                self._current.reset(token)
+            except ValueError:
+                # closed from another context (e.g. an async generator finalized elsewhere)
+                pass
+            if parent is None:
+                self._open.discard(s.trace_id)
+            self._finish(s)
+
+    def _finish(self, s: Span) -> None:
+        if self.exporter is None:
+            return
+        if s.parent_id is None:
+            self.exporter.export([*self._finished.pop(s.trace_id, []), s])
+        elif s.trace_id in self._open:
+            self._finished.setdefault(s.trace_id, []).append(s)
+        else:
+            # outlived its root (e.g. a background fetch): write it on its own
+            self.exporter.export([s])
+
+    def headers(self) -> dict[str, str]:
+        """W3C trace context headers for the current span."""
+        s = self._current.get()
+        if s is None:
+            return {}
+        return {"traceparent": f"00-{s.trace_id}-{s.span_id}-01"}
+
+
+TRACER = Tracer()
+span = TRACER.span
+
+
+async def inject_headers(request: httpx.Request) -> None:
+    """httpx request hook adding ``traceparent`` for the current span."""
+    request.headers.update(TRACER.headers())
@@ -1,22 +1,34 @@
 """Test A2A Agent Server."""
 
 import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
 
 import click
 import httpx
 import uvicorn
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import (
     BasePushNotificationSender,
     InMemoryPushNotificationConfigStore,
-    InMemoryTaskStore,
 )
 from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 from agent_executor import TestAgentExecutor
+from backpressure import BoundedQueueManager
 from dotenv import load_dotenv
+from fast_send import FastSendRequestHandler
+from idempotency import IdempotencyCache
+from latency import parse_profile
+from llm_backends import LLM_BACKENDS
+from log_config import setup_logging
+from memory import MemoryInspector
+from metrics import metrics_endpoint
+from profiler import profile_endpoint, profile_lifespan
+from snapshot import Snapshotter, SnapshotTaskStore
+from starlette.applications import Starlette
+from starlette.routing import Route
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -25,26 +37,97 @@ load_dotenv()
 @click.command()
 @click.option("--host", default="localhost", help="Host to bind the server to")
 @click.option("--port", default=9998, type=int, help="Port to bind the server to")
-def main(host: str, port: int) -> None:
+@click.option(
+    "--llm-backend",
+    type=click.Choice(LLM_BACKENDS),
+    default=None,
+    help="Chat model backend (defaults to LLM_BACKEND or azure)",
+)
+@click.option(
+    "--latency-profile",
+    default=None,
+    help="Injected latency before LLM calls, e.g. none, fixed:5000, "
+    "lognormal:500:0.6, heavy-tail (defaults to LATENCY_PROFILE or none)",
+)
+@click.option(
+    "--latency-per-request",
+    is_flag=True,
+    default=False,
+    help="Honor latency_profile in message metadata (or set LATENCY_PER_REQUEST=1)",
+)
+@click.option(
+    "--profile",
+    "profile_seconds",
+    type=float,
+    default=None,
+    help="Sample the event loop for this many seconds after startup and write collapsed stacks",
+)
+@click.option(
+    "--profile-output",
+    default="profile.folded",
+    show_default=True,
+    help="Collapsed-stack file written by --profile (flamegraph.pl / speedscope input)",
+)
+def main(
+    host: str,
+    port: int,
+    llm_backend: str | None,
+    latency_profile: str | None,
+    latency_per_request: bool,
+    profile_seconds: float | None,
+    profile_output: str,
+) -> None:
     """Start the Test A2A Agent server.
 
     This server provides a simple AI assistant agent using Google's Gemini model.
     Configure your GOOGLE_API_KEY in a .env file before running.
     """
-    logger.info(f"Starting Test A2A Agent server on {host}:{port}")
+    setup_logging()
+    logger.info("Starting Test A2A Agent server on %s:%d", host, port)
+
+    if llm_backend:
+        os.environ["LLM_BACKEND"] = llm_backend
+    if latency_profile:
+        parse_profile(latency_profile)  # fail fast on a bad spec
+        os.environ["LATENCY_PROFILE"] = latency_profile
+    if latency_per_request:
+        os.environ["LATENCY_PER_REQUEST"] = "1"
 
     # Initialize HTTP client and notification stores
     httpx_client = httpx.AsyncClient()
     push_config_store = InMemoryPushNotificationConfigStore()
 
-    # Create request handler
-    request_handler = DefaultRequestHandler(
-        agent_executor=TestAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+    agent_executor = TestAgentExecutor()
+    task_store = SnapshotTaskStore()
+
+    # Create request handler (bounded event queues; tasks/resubscribe and
+    # retried messages replay from the executor's event log; blocking sends
+    # take the executor's non-streaming path)
+    request_handler = FastSendRequestHandler(
+        agent_executor=agent_executor,
+        task_store=task_store,
         push_config_store=push_config_store,
         push_sender=BasePushNotificationSender(httpx_client, push_config_store),
+        queue_manager=BoundedQueueManager.from_env(),
+        event_log=agent_executor.event_log,
+        idempotency=IdempotencyCache.from_env(),
     )
 
+    # Warm restarts: sessions and tasks from SNAPSHOT_PATH, restored on first access
+    snapshotter = Snapshotter.from_env(agent_executor.agent, task_store)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            if snapshotter is not None:
+                await stack.enter_async_context(snapshotter.lifespan(app))
+            if profile_seconds:
+                await stack.enter_async_context(profile_lifespan(profile_seconds, profile_output)(app))
+            yield
+
+    # Per-session/task/cache footprint for GET /debug/memory
+    memory = MemoryInspector(agent_executor.agent, task_store, push_config_store)
+
     # Build and run server
     server = A2AStarletteApplication(
         agent_card=get_agent_card(host, port),
@@ -52,9 +135,17 @@ def main(host: str, port: int) -> None:
     )
 
     uvicorn.run(
-        server.build(),
+        server.build(
+            routes=[
+                Route("/metrics", metrics_endpoint),
+                Route("/debug/profile", profile_endpoint),
+                Route("/debug/memory", memory.endpoint),
+            ],
+            lifespan=lifespan,
+        ),
         host=host,
         port=port,
+        log_config=None,  # uvicorn loggers propagate to the queued root handler
         timeout_keep_alive=120,  # Keep connections alive for 120 seconds
         timeout_graceful_shutdown=30,  # Allow 30 seconds for graceful shutdown
     )
@@ -70,7 +161,7 @@ def get_agent_card(host: str, port: int) -> AgentCard:
     Returns:
         AgentCard: The agent card describing capabilities
     """
-    capabilities = AgentCapabilities(streaming=True)
+    capabilities = AgentCapabilities(streaming=True, push_notifications=True)
 
     # Define agent skills
     currency_skill = AgentSkill(
@@ -103,6 +194,22 @@ def get_agent_card(host: str, port: int) -> AgentCard:
         ],
     )
 
+    bulk_summary_skill = AgentSkill(
+        id="bulk_link_summary",
+        name="Bulk link summarization",
+        description=(
+            "Submit a list of URLs (text starting with 'bulk', or a data part "
+            "with a 'urls' list) as one background job. Send it with "
+            "blocking=false and a push notification config: the task is "
+            "returned immediately, each summary is added as an artifact, and "
+            "completion is pushed with the job's throughput."
+        ),
+        tags=["summarize", "url", "bulk", "batch", "async"],
+        examples=[
+            "bulk summarize https://example.com/a https://example.com/b https://example.com/c",
+        ],
+    )
+
     # Build agent card
     agent_card = AgentCard(
         name="Test AI Assistant",
@@ -116,7 +223,7 @@ def get_agent_card(host: str, port: int) -> AgentCard:
         default_input_modes=["text"],
         default_output_modes=["text"],
         capabilities=capabilities,
-        skills=[currency_skill, link_reader_skill],
+        skills=[currency_skill, link_reader_skill, bulk_summary_skill],
     )
 
     return agent_card
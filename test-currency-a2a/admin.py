@@ -0,0 +1,21 @@
+"""Bearer-token gate for the ``/debug/*`` endpoints."""
+
+import hmac
+import os
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+
+def admin_error(request: Request) -> JSONResponse | None:
+    """Error response unless the request carries ``Bearer $ADMIN_TOKEN``.
+
+    Debug endpoints are disabled (404) while ``ADMIN_TOKEN`` is unset.
+    """
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        return JSONResponse({"error": "debug endpoints are disabled (ADMIN_TOKEN not set)"}, status_code=404)
+    header = request.headers.get("authorization", "")
+    if not hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    return None
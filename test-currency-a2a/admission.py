@@ -0,0 +1,184 @@
+"""Admission control and priority scheduling of tasks.
+
+Tasks are classified before they run (deterministic fast path, chat,
+summarization, bulk). Each class has a concurrency limit and a bound on how
+many tasks may wait; all classes share ``capacity`` running slots, handed
+out in priority order, so a burst of long summarizations can neither take
+every slot nor delay a currency conversion queued behind them. A task whose
+class queue is full is shed immediately with :class:`Overloaded`, which the
+executor turns into a ``rejected`` status carrying ``retry_after``.
+
+Limits and queue bounds come from ``ADMISSION_LIMITS`` and
+``ADMISSION_QUEUES`` (``class=n`` pairs, e.g. ``summarize=4,bulk=1``) and the
+shared slots from ``ADMISSION_CAPACITY``.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from metrics import ADMISSION_QUEUED, ADMISSION_SHED, ADMISSION_WAIT
+
+# Smoothing of the per-class run time used for retry_after hints
+_EWMA_ALPHA = 0.2
+
+
+@dataclass
+class TaskClass:
+    """A priority class (lower `priority` runs first)."""
+
+    name: str
+    priority: int
+    limit: int
+    max_queue: int
+    running: int = 0
+    avg_seconds: float = 1.0
+    waiters: deque[asyncio.Future] = field(default_factory=deque)
+
+    def queued(self) -> int:
+        return sum(1 for w in self.waiters if not w.done())
+
+
+# (name, priority, limit, max_queue)
+DEFAULT_CLASSES = (
+    ("fast", 0, 64, 256),
+    ("chat", 1, 16, 64),
+    ("summarize", 2, 8, 32),
+    ("bulk", 3, 2, 8),
+)
+
+
+class Overloaded(Exception):
+    """A task was shed because its class queue is full."""
+
+    def __init__(self, task_class: str, retry_after: int):
+        super().__init__(f"Server busy ({task_class} queue full), retry in {retry_after}s")
+        self.task_class = task_class
+        self.retry_after = retry_after
+
+
+def parse_pairs(spec: str) -> dict[str, int]:
+    """``"summarize=4,bulk=1"`` -> ``{"summarize": 4, "bulk": 1}``.
+
+    Raises:
+        ValueError: Malformed pair or unknown class
+    """
+    known = {name for name, *_ in DEFAULT_CLASSES}
+    pairs = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, sep, value = item.partition("=")
+        if not sep or name.strip() not in known:
+            raise ValueError(f"Bad admission setting {item!r} (classes: {', '.join(sorted(known))})")
+        pairs[name.strip()] = int(value)
+    return pairs
+
+
+class AdmissionController:
+    """Per-class concurrency limits and queues over shared running slots."""
+
+    def __init__(
+        self,
+        capacity: int = 64,
+        limits: dict[str, int] | None = None,
+        max_queues: dict[str, int] | None = None,
+    ) -> None:
+        """Initialize the controller.
+
+        Args:
+            capacity: Tasks running at once across all classes
+            limits: Per-class concurrency overrides
+            max_queues: Per-class waiting-task bounds (beyond them tasks are shed)
+        """
+        limits = limits or {}
+        max_queues = max_queues or {}
+        self.capacity = capacity
+        self.classes = {
+            name: TaskClass(name, priority, limits.get(name, limit), max_queues.get(name, max_queue))
+            for name, priority, limit, max_queue in DEFAULT_CLASSES
+        }
+        self._by_priority = sorted(self.classes.values(), key=lambda c: c.priority)
+        self._running = 0
+        for c in self.classes.values():
+            ADMISSION_QUEUED.labels(c.name).set_function(c.queued)
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """From ``ADMISSION_CAPACITY``, ``ADMISSION_LIMITS`` and ``ADMISSION_QUEUES``."""
+        return cls(
+            capacity=int(os.getenv("ADMISSION_CAPACITY", "64")),
+            limits=parse_pairs(os.getenv("ADMISSION_LIMITS", "")),
+            max_queues=parse_pairs(os.getenv("ADMISSION_QUEUES", "")),
+        )
+
+    def _pump(self) -> None:
+        """Grant free slots to waiters, highest priority class first."""
+        while self._running < self.capacity:
+            for c in self._by_priority:
+                while c.waiters and c.waiters[0].done():
+                    c.waiters.popleft()  # cancelled while queued
+                if c.waiters and c.running < c.limit:
+                    c.running += 1
+                    self._running += 1
+                    c.waiters.popleft().set_result(None)
+                    break
+            else:
+                return
+
+    def _release(self, c: TaskClass, held: float | None = None) -> None:
+        c.running -= 1
+        self._running -= 1
+        if held is not None:
+            c.avg_seconds += _EWMA_ALPHA * (held - c.avg_seconds)
+        self._pump()
+
+    def retry_after(self, c: TaskClass) -> int:
+        """Seconds until the class queue has likely drained by one limit's worth."""
+        return max(1, math.ceil(c.avg_seconds * (c.queued() + c.running) / max(1, c.limit)))
+
+    @asynccontextmanager
+    async def slot(self, task_class: str) -> AsyncIterator[None]:
+        """Wait for a running slot for `task_class` and hold it for the block.
+
+        Raises:
+            Overloaded: The class queue is full
+        """
+        c = self.classes[task_class]
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        c.waiters.append(fut)
+        queued_at = time.perf_counter()
+        self._pump()
+        if not fut.done() and c.queued() > c.max_queue:
+            # would have to wait behind a full queue: shed now
+            fut.cancel()
+            ADMISSION_SHED.labels(c.name).inc()
+            raise Overloaded(c.name, self.retry_after(c))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._release(c)  # slot was granted as we got cancelled
+            raise
+        started = time.perf_counter()
+        ADMISSION_WAIT.labels(c.name).observe(started - queued_at)
+        try:
+            yield
+        finally:
+            self._release(c, time.perf_counter() - started)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-class running and queued tasks."""
+        return {
+            c.name: {
+                "running": c.running,
+                "queued": c.queued(),
+                "limit": c.limit,
+                "max_queue": c.max_queue,
+                "avg_seconds": round(c.avg_seconds, 3),
+            }
+            for c in self._by_priority
+        }
@@ -1,18 +1,36 @@
-"""Simple Test A2A Agent using Azure OpenAI."""
+"""Simple Test A2A Agent using Azure OpenAI (or a local fake model)."""
 
 import asyncio
 import logging
 import os
+import time
 from collections.abc import AsyncIterable
 from decimal import Decimal
 from typing import Any
 
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_openai import AzureChatOpenAI
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
+from cache import TTLCache
+from cassette import Cassette
+from chunk_index import ChunkIndex
 from currency_converter import CurrencyConverter, parse_conversion_query
-from web_summarizer import LinkReader, find_url, chunk_text
+from dedup import DedupStats, MinHashDeduper, dedup_paragraphs
+from history import History
+from latency import LatencyProfile, default_profile
+from llm_backends import make_llm
+from llm_gateway import GatewayChatModel
+from metrics import (
+    CACHE_ENTRIES,
+    CHUNK_INDEX_BYTES,
+    SESSIONS,
+    STAGE_DURATION,
+    InstrumentedChatModel,
+)
+from response_cache import ResponseCache, model_settings, replay
+from snapshot import SESSION, SnapshotFile
+from tracing import TRACER, span
+from web_summarizer import ByteBudget, LinkReader, Page, chunk_text, find_urls
 
 load_dotenv()
 # Also load from parent directory's .env.local
@@ -24,34 +42,27 @@ logger = logging.getLogger(__name__)
 class TestAgent:
     """A simple test agent that responds to user queries."""
 
-    def __init__(self):
-        """Initialize the test agent with Azure OpenAI."""
-        # Get Azure OpenAI credentials from environment
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        azure_api_key = os.getenv("AZURE_API_KEY")
-        azure_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-5-mini")
-
-        # Fallback: construct endpoint from resource name if not set
-        if not azure_endpoint:
-            resource_name = os.getenv("AZURE_RESOURCE_NAME")
-            if resource_name:
-                azure_endpoint = f"https://{resource_name}.openai.azure.com"
-
-        if not azure_api_key or not azure_endpoint:
-            raise ValueError(
-                "Azure OpenAI configuration is required. "
-                "Set AZURE_API_KEY and AZURE_OPENAI_ENDPOINT (or AZURE_RESOURCE_NAME) "
-                "in your .env file or ../.env.local"
-            )
+    def __init__(self, cassette: Cassette | None = None, llm: Any | None = None):
+        """Initialize the test agent with the configured LLM backend.
 
-        self.llm = AzureChatOpenAI(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            azure_deployment=azure_deployment,
-            api_version="2025-04-01-preview",
-            temperature=1.0,  # GPT-5-mini only supports default temperature (1.0)
-            streaming=True,
-        )
+        Args:
+            cassette: Record/replay LLM and HTTP traffic (defaults to ``CASSETTE_MODE``)
+            llm: Chat model to use instead of the ``LLM_BACKEND`` one (e.g. a
+                FakeChatModel in tests)
+        """
+        # Record or replay LLM streams and upstream HTTP (off unless configured)
+        self.cassette = cassette if cassette is not None else Cassette.from_env()
+        transport = self.cassette.transport() if self.cassette is not None else None
+
+        # Azure OpenAI by default; LLM_BACKEND=fake for offline load testing
+        factory = (lambda: llm) if llm is not None else make_llm
+        llm = self.cassette.chat_model(factory) if self.cassette is not None else factory()
+        # TTFT, token rate and call duration for /metrics, behind the
+        # process-wide gateway (RPM/TPM budgets, fair queuing, 429 backoff)
+        self.llm = GatewayChatModel(InstrumentedChatModel(llm))
+        # Exact-match answers to repeated chat prompts (RESPONSE_CACHE_SIZE, off by default)
+        self.response_cache = ResponseCache.from_env()
+        self.model_settings = model_settings(llm)
 
         self.system_prompt = SystemMessage(
             content=(
@@ -61,73 +72,346 @@ class TestAgent:
             )
         )
 
-        # Store conversation history per session
-        self.conversations: dict[str, list] = {}
+        # Store conversation history per session (texts only; the system
+        # prompt is added when a prompt is assembled)
+        self.conversations: dict[str, History] = {}
+        # Previous run's snapshot, restored per session on first access
+        # (attached by snapshot.Snapshotter when SNAPSHOT_PATH is set)
+        self.snapshot: SnapshotFile | None = None
+
+        # Injected latency before LLM calls (LATENCY_PROFILE, none by default)
+        self.latency = default_profile()
         
         # Initialize currency converter and link reader
-        self.converter = CurrencyConverter()
-        self.link_reader = LinkReader()
-
-    async def _llm_summary(self, llm: AzureChatOpenAI, text: str) -> str:
-        """Generate a concise summary using the LLM."""
+        self.converter = CurrencyConverter(transport=transport)
+        self.link_reader = LinkReader(transport=transport)
+        # Near-duplicate filter applied to paragraphs and chunks before the map step
+        self.deduper = MinHashDeduper(
+            threshold=float(os.getenv("SUMMARY_DEDUP_THRESHOLD", "0.8"))
+        )
+        # Multi-URL mode: per-request page cap, fetch/map concurrency and byte budget
+        self.max_urls = int(os.getenv("SUMMARY_MAX_URLS", "5"))
+        self.fetch_concurrency = int(os.getenv("SUMMARY_FETCH_CONCURRENCY", "4"))
+        self.byte_budget = int(os.getenv("SUMMARY_BYTE_BUDGET", str(8 * 1024 * 1024)))
+        # Passages of recently summarized pages, for follow-up questions
+        self.chunk_index = ChunkIndex(
+            max_bytes=int(os.getenv("CHUNK_INDEX_MAX_BYTES", str(64 * 1024 * 1024))),
+            min_score=float(os.getenv("CHUNK_INDEX_MIN_SCORE", "0.15")),
+        )
+        self.retrieval_top_k = int(os.getenv("CHUNK_INDEX_TOP_K", "4"))
+        # Recently fetched pages and finished summaries, keyed by URL
+        self.page_cache: TTLCache[Page] = TTLCache(
+            max_entries=int(os.getenv("PAGE_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("PAGE_CACHE_TTL", "600")),
+        )
+        self.summary_cache: TTLCache[str] = TTLCache(
+            max_entries=int(os.getenv("SUMMARY_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("SUMMARY_CACHE_TTL", "3600")),
+        )
+        # Worker pool shared by all bulk summarization jobs
+        self.bulk_max_urls = int(os.getenv("BULK_MAX_URLS", "500"))
+        self.bulk_workers = asyncio.Semaphore(int(os.getenv("BULK_WORKERS", "8")))
+
+        # Stage spans for trace_view.py (TRACE_FILE, off by default)
+        TRACER.configure_from_env()
+
+        # Sizes exported at scrape time
+        SESSIONS.set_function(lambda: len(self.conversations))
+        CACHE_ENTRIES.labels("page").set_function(lambda: len(self.page_cache))
+        CACHE_ENTRIES.labels("summary").set_function(lambda: len(self.summary_cache))
+        CACHE_ENTRIES.labels("response").set_function(lambda: len(self.response_cache))
+        CHUNK_INDEX_BYTES.set_function(lambda: self.chunk_index.nbytes)
+
+    async def _llm_summary(
+        self, llm: GatewayChatModel, text: str, request: str | None = None, stage: str = "map"
+    ) -> str:
+        """Generate a concise summary using the LLM (`stage` is "map" or "reduce")."""
         sys = SystemMessage(content="You are a precise summarizer. Write a concise TL;DR, key bullets, and 1–2 short quotes. No fluff.")
-        human = HumanMessage(content=f"Summarize the following text:\n\n{text}\n\nReturn:\n- TL;DR (≤2 sentences)\n- 5–8 bullet points of key facts\n- 1–2 short quotes")
-        resp = await llm.ainvoke([sys, human])
+        ask = f"\n\nThe user asked: {request}" if request else ""
+        human = HumanMessage(content=f"Summarize the following text:\n\n{text}{ask}\n\nReturn:\n- TL;DR (≤2 sentences)\n- 5–8 bullet points of key facts\n- 1–2 short quotes")
+        with STAGE_DURATION.labels(stage).time(), span(stage, chars=len(text)):
+            resp = await llm.ainvoke([sys, human])
         return resp.content
 
-    async def invoke(self, user_input: str, session_id: str) -> dict[str, Any]:
+    async def _fetch_page(self, url: str, budget: ByteBudget | None = None) -> Page:
+        """Fetch and extract `url`, reusing a recent copy when there is one."""
+        page = self.page_cache.get(url)
+        if page is None:
+            page = await self.link_reader.fetch_and_extract(url, budget)
+            # pages cut short by the byte budget are not worth caching
+            if budget is None or not budget.exhausted:
+                self.page_cache.set(url, page)
+        return page
+
+    async def _summarize_url(self, url: str) -> str:
+        """Fetch, map and reduce a single page without progress updates."""
+        cached = self.summary_cache.get(url)
+        if cached is not None:
+            return cached
+        with span("page", url=url):
+            page = await self._fetch_page(url)
+            if not page.text or page.word_count < 50:
+                raise ValueError("no substantial article text")
+            chunks, _, _ = await asyncio.to_thread(self._prepare_chunks, page)
+            partials = [await self._llm_summary(self.llm, c) for c in chunks]
+            final_summary = await self._llm_summary(self.llm, "\n\n---\n\n".join(partials), stage="reduce")
+        title_line = f"**{page.title}**\n" if page.title else ""
+        out = f"{title_line}{final_summary}\n\nSource: {page.url}"
+        self.summary_cache.set(url, out)
+        return out
+
+    async def _finish_summary(
+        self, user_input: str, out: str, session_id: str
+    ) -> AsyncIterable[dict[str, Any]]:
+        """Stream a finished summary and record it in the session history."""
+        yield {"content": out, "is_task_complete": False, "require_user_input": False}
+
+        # Update conversation history
+        self._history(session_id).add_turn(user_input, out)
+
+        # Yield final completion status
+        yield {
+            "content": out,
+            "is_task_complete": True,
+            "require_user_input": False,
+            "is_final": True,
+        }
+
+    async def bulk_summarize(
+        self, urls: list[str], session_id: str
+    ) -> AsyncIterable[dict[str, Any]]:
+        """Summarize a list of URLs as a background job.
+
+        URLs are processed on the shared bulk worker pool, reusing the page
+        and summary caches. Each result is yielded as an artifact as soon as
+        it is ready; the final chunk reports throughput in URLs/minute.
+
+        Args:
+            urls: URLs to summarize
+            session_id: Unique identifier for the session
+
+        Yields:
+            dict: Progress, one artifact per URL, then the final report
+        """
+        urls = list(dict.fromkeys(urls))[: self.bulk_max_urls]
+        total = len(urls)
+        yield {"content": f"Accepted bulk job with {total} URL(s).", "is_task_complete": False, "require_user_input": False}
+
+        started = time.monotonic()
+        results: asyncio.Queue[tuple[str, str | None, str | None]] = asyncio.Queue()
+
+        async def work(url: str) -> None:
+            try:
+                async with self.bulk_workers:
+                    results.put_nowait((url, await self._summarize_url(url), None))
+            except Exception as e:
+                results.put_nowait((url, None, str(e) or type(e).__name__))
+
+        tasks = [asyncio.create_task(work(u)) for u in urls]
+        failed = 0
+        try:
+            for done in range(1, total + 1):
+                url, summary, error = await results.get()
+                if error is not None:
+                    failed += 1
+                yield {
+                    "content": f"[{done}/{total}] {'Failed' if error else 'Summarized'} {url}",
+                    "is_task_complete": False,
+                    "require_user_input": False,
+                    "artifact": {
+                        "name": url,
+                        "text": summary if error is None else f"Could not summarize: {error}",
+                        "description": "ok" if error is None else "failed",
+                    },
+                }
+        finally:
+            for t in tasks:
+                t.cancel()
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed * 60 if elapsed > 0 else 0.0
+        report = (
+            f"Bulk job finished: {total - failed}/{total} URL(s) summarized, {failed} failed, "
+            f"in {elapsed:.1f}s ({rate:.1f} URLs/min)."
+        )
+        logger.info(report)
+        yield {
+            "content": report,
+            "is_task_complete": True,
+            "require_user_input": False,
+            "is_final": True,
+        }
+
+    def _prepare_chunks(self, page: Page) -> tuple[list[str], DedupStats, DedupStats]:
+        """Dedup paragraphs, chunk, then dedup chunks for the map step.
+
+        CPU-bound (MinHash over every paragraph): callers run it in a thread.
+        """
+        with STAGE_DURATION.labels("chunk").time(), span("chunk", url=page.url) as s:
+            text, para_stats = dedup_paragraphs(page.text, self.deduper)
+            chunks = chunk_text(text, max_chars=6000)
+            chunks, chunk_stats = self.deduper.filter(chunks)
+            s.set(chunks=len(chunks), dropped=para_stats.dropped + chunk_stats.dropped)
+        skipped = para_stats.merge(chunk_stats)
+        if skipped.dropped:
+            logger.info(
+                "Dedup skipped %d paragraph(s) and %d chunk(s), ~%d tokens",
+                para_stats.dropped, chunk_stats.dropped, skipped.dropped_tokens,
+            )
+        return chunks, para_stats, chunk_stats
+
+    async def _stream_multi_url(
+        self, user_input: str, urls: list[str], session_id: str
+    ) -> AsyncIterable[dict[str, Any]]:
+        """Summarize several pages with one combined map-reduce.
+
+        Pages are fetched, extracted and mapped concurrently under a shared
+        byte budget, so total latency tracks the slowest page rather than the
+        sum of all pages. Progress is streamed per URL as it happens.
+
+        Args:
+            user_input: User input message
+            urls: Distinct URLs found in the message
+            session_id: Unique identifier for the session
+
+        Yields:
+            dict: Streaming response chunks
+        """
+        if len(urls) > self.max_urls:
+            yield {"content": f"Found {len(urls)} links; reading the first {self.max_urls}.", "is_task_complete": False, "require_user_input": False}
+            urls = urls[: self.max_urls]
+        total = len(urls)
+        yield {"content": f"Fetching {total} pages in parallel…", "is_task_complete": False, "require_user_input": False}
+
+        budget = ByteBudget(self.byte_budget)
+        fetch_sem = asyncio.Semaphore(self.fetch_concurrency)
+        map_sem = asyncio.Semaphore(self.fetch_concurrency)
+        progress: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        results: dict[int, tuple[Page, list[str]]] = {}
+
+        async def summarize_chunk(chunk: str) -> str:
+            async with map_sem:
+                return await self._llm_summary(self.llm, chunk)
+
+        async def process(idx: int, url: str) -> None:
+            with span("page", url=url, index=idx):
+                try:
+                    async with fetch_sem:
+                        page = await self._fetch_page(url, budget)
+                    if not page.text or page.word_count < 50:
+                        progress.put_nowait({"content": f"[{idx}/{total}] No substantial article text at {url}", "is_task_complete": False, "require_user_input": False})
+                        return
+                    chunks, _, _ = await asyncio.to_thread(self._prepare_chunks, page)
+                    self.chunk_index.add(session_id, page, "\n\n".join(chunks))
+                    progress.put_nowait({"content": f"[{idx}/{total}] Extracted ~{page.word_count} words from {url}; summarizing {len(chunks)} chunk(s)…", "is_task_complete": False, "require_user_input": False})
+                    partials = await asyncio.gather(*(summarize_chunk(c) for c in chunks))
+                    results[idx] = (page, list(partials))
+                    progress.put_nowait({"content": f"[{idx}/{total}] Summarized {page.title or url}", "is_task_complete": False, "require_user_input": False})
+                except Exception as e:
+                    progress.put_nowait({"content": f"[{idx}/{total}] Could not fetch/extract {url}: {e}", "is_task_complete": False, "require_user_input": False})
+                finally:
+                    progress.put_nowait(None)
+
+        tasks = [asyncio.create_task(process(i, u)) for i, u in enumerate(urls, start=1)]
+        try:
+            pending = total
+            while pending:
+                update = await progress.get()
+                if update is None:
+                    pending -= 1
+                    continue
+                yield update
+        finally:
+            for t in tasks:
+                t.cancel()
+
+        if not results:
+            yield {"content": "I couldn't find substantial article text to summarize.", "is_task_complete": False, "require_user_input": False}
+            return
+        if budget.exhausted:
+            logger.info("Byte budget of %d bytes exhausted; some pages were truncated", budget.limit)
+
+        # reduce step: one combined summary over all pages, in the user's order
+        yield {"content": f"Combining {len(results)} page summaries…", "is_task_complete": False, "require_user_input": False}
+        ordered = [results[i] for i in sorted(results)]
+        reduce_input = "\n\n---\n\n".join(
+            f"[{n}] {page.title or page.url}\n" + "\n\n".join(partials)
+            for n, (page, partials) in enumerate(ordered, start=1)
+        )
+        final_summary = await self._llm_summary(self.llm, reduce_input, request=user_input, stage="reduce")
+
+        sources = "\n".join(f"[{n}] {page.url}" for n, (page, _) in enumerate(ordered, start=1))
+        out = f"{final_summary}\n\nSources:\n{sources}"
+        async for update in self._finish_summary(user_input, out, session_id):
+            yield update
+
+    async def invoke(
+        self,
+        user_input: str,
+        session_id: str,
+        latency: LatencyProfile | None = None,
+        cache: bool = True,
+    ) -> dict[str, Any]:
         """Handle synchronous tasks.
 
         Args:
             user_input: User input message
             session_id: Unique identifier for the session
+            latency: Per-request latency profile (defaults to the server's)
+            cache: Use the response cache (if enabled) for chat answers
 
         Returns:
             dict: Response with content, completion status, and input requirement
         """
-        # Get or create conversation history
-        if session_id not in self.conversations:
-            self.conversations[session_id] = [self.system_prompt]
-
-        messages = self.conversations[session_id] + [HumanMessage(content=user_input)]
-
-        # Simulate longer task processing time
-        logger.info("Starting 5-second delay to simulate longer task...")
-        await asyncio.sleep(5.0)
-        logger.info("Delay completed, starting LLM call...")
-
-        # Get response
-        response = await self.llm.ainvoke(messages)
+        messages, _ = self._chat_messages(user_input, session_id)
+        key = self.response_cache.key(messages, self.model_settings, bypass=not cache, mode="invoke")
+        cached = self.response_cache.get(key)
+
+        if cached is not None:
+            content = "".join(cached)
+        else:
+            # Injected latency for tail-latency experiments (none by default)
+            delay = await (latency or self.latency).sleep()
+            if delay:
+                logger.info("Injected %.3fs latency before LLM call", delay)
+
+            # Get response
+            with span("llm.invoke") as s:
+                response = await self.llm.ainvoke(messages)
+                content = response.content
+                s.set(chars=len(content))
+            self.response_cache.put(key, [content])
 
         # Update conversation history
-        self.conversations[session_id].append(HumanMessage(content=user_input))
-        self.conversations[session_id].append(response)
+        self._history(session_id).add_turn(user_input, content)
 
         # Determine if task is complete
-        is_complete = self._is_task_complete(response.content)
+        is_complete = self._is_task_complete(content)
 
         return {
-            "content": response.content,
+            "content": content,
             "is_task_complete": is_complete,
             "require_user_input": not is_complete,
         }
 
     async def stream(
-        self, user_input: str, session_id: str
+        self,
+        user_input: str,
+        session_id: str,
+        latency: LatencyProfile | None = None,
+        cache: bool = True,
     ) -> AsyncIterable[dict[str, Any]]:
         """Handle streaming tasks.
 
         Args:
             user_input: User input message
             session_id: Unique identifier for the session
+            latency: Per-request latency profile (defaults to the server's)
+            cache: Use the response cache (if enabled) for chat answers
 
         Yields:
             dict: Streaming response chunks
         """
-        # Get or create conversation history
-        if session_id not in self.conversations:
-            self.conversations[session_id] = [self.system_prompt]
-
         # 1) Fast path: deterministic currency conversion
         parsed = parse_conversion_query(user_input)
         if parsed:
@@ -159,8 +443,7 @@ class TestAgent:
                 yield {"content": msg, "is_task_complete": False, "require_user_input": False}
                 
                 # Update conversation history
-                self.conversations[session_id].append(HumanMessage(content=user_input))
-                self.conversations[session_id].append(AIMessage(content=msg))
+                self._history(session_id).add_turn(user_input, msg)
                 
                 # Yield final completion status
                 yield {
@@ -175,11 +458,26 @@ class TestAgent:
                 # continue to LLM fallback
 
         # 2) Link Reader & TL;DR
-        url = find_url(user_input)
+        urls = find_urls(user_input)
+        if len(urls) > 1:
+            async for update in self._stream_multi_url(user_input, urls, session_id):
+                yield update
+            return
+        url = urls[0] if urls else None
         if url:
+            cached = self.summary_cache.get(url)
+            if cached is not None:
+                yield {"content": f"Using a recent summary of {url}…", "is_task_complete": False, "require_user_input": False}
+                page = self.page_cache.get(url)
+                if page is not None and not self.chunk_index.has_page(session_id, url):
+                    self.chunk_index.add(session_id, page)
+                async for update in self._finish_summary(user_input, cached, session_id):
+                    yield update
+                return
+
             yield {"content": f"Fetching and extracting article from {url}…", "is_task_complete": False, "require_user_input": False}
             try:
-                page = await self.link_reader.fetch_and_extract(url)
+                page = await self._fetch_page(url)
             except Exception as e:
                 yield {"content": f"Could not fetch/extract the page: {e}", "is_task_complete": False, "require_user_input": False}
                 return
@@ -188,11 +486,17 @@ class TestAgent:
                 yield {"content": "I couldn't find substantial article text to summarize.", "is_task_complete": False, "require_user_input": False}
                 return
 
+            # drop repeated blocks (quoted replies, disclaimers) before the map step
+            chunks, para_stats, chunk_stats = await asyncio.to_thread(self._prepare_chunks, page)
+            self.chunk_index.add(session_id, page, "\n\n".join(chunks))
+            skipped = para_stats.merge(chunk_stats)
+            if skipped.dropped:
+                yield {"content": f"Skipped {para_stats.dropped} duplicate paragraph(s) and {chunk_stats.dropped} duplicate chunk(s) (~{skipped.dropped_tokens} tokens).", "is_task_complete": False, "require_user_input": False}
+
             # chunk & summarize (map step)
-            chunks = chunk_text(page.text, max_chars=6000)
             yield {"content": f"Extracted ~{page.word_count} words; summarizing {len(chunks)} chunk(s)…", "is_task_complete": False, "require_user_input": False}
 
-            llm = self.llm  # your configured AzureChatOpenAI
+            llm = self.llm  # LLM_BACKEND model (or the injected one) behind the gateway
             partial_summaries: list[str] = []
             for i, c in enumerate(chunks, start=1):
                 yield {"content": f"Summarizing chunk {i}/{len(chunks)}…", "is_task_complete": False, "require_user_input": False}
@@ -201,27 +505,21 @@ class TestAgent:
 
             # reduce step: summarize the summaries
             reduce_input = "\n\n---\n\n".join(partial_summaries)
-            final_summary = await self._llm_summary(llm, reduce_input)
+            final_summary = await self._llm_summary(llm, reduce_input, stage="reduce")
 
             title_line = f"**{page.title}**\n" if page.title else ""
             out = f"{title_line}{final_summary}\n\nSource: {page.url}"
-            yield {"content": out, "is_task_complete": False, "require_user_input": False}
-            
-            # Update conversation history
-            self.conversations[session_id].append(HumanMessage(content=user_input))
-            self.conversations[session_id].append(AIMessage(content=out))
-            
-            # Yield final completion status
-            yield {
-                "content": out,
-                "is_task_complete": True,
-                "require_user_input": False,
-                "is_final": True,
-            }
+            self.summary_cache.set(url, out)
+            async for update in self._finish_summary(user_input, out, session_id):
+                yield update
             return
 
         # 3) Fallback: your existing LLM behavior
-        messages = self.conversations[session_id] + [HumanMessage(content=user_input)]
+        messages, passages = self._chat_messages(user_input, session_id)
+        if passages:
+            yield {"content": f"Looking up {passages} relevant passage(s) from earlier pages…", "is_task_complete": False, "require_user_input": False}
+        key = self.response_cache.key(messages, self.model_settings, bypass=not cache)
+        cached = self.response_cache.get(key)
 
         # Yield initial status
         yield {
@@ -233,21 +531,32 @@ class TestAgent:
         # Brief delay for user experience
         await asyncio.sleep(0.1)
 
-        # Stream the response
+        if cached is None:
+            # Injected latency for tail-latency experiments (none by default)
+            delay = await (latency or self.latency).sleep()
+            if delay:
+                logger.info("Injected %.3fs latency before LLM call", delay)
+
+        # Stream the response (a cache hit replays the stored chunks)
         full_response = ""
-        async for chunk in self.llm.astream(messages):
-            if isinstance(chunk, AIMessage) and chunk.content:
-                full_response += chunk.content
-                yield {
-                    "content": chunk.content,
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "is_streaming_chunk": True,
-                }
+        chunks: list[str] = []
+        with span("llm.stream") as s:
+            async for chunk in replay(cached) if cached is not None else self.llm.astream(messages):
+                if isinstance(chunk, AIMessage) and chunk.content:
+                    full_response += chunk.content
+                    chunks.append(chunk.content)
+                    yield {
+                        "content": chunk.content,
+                        "is_task_complete": False,
+                        "require_user_input": False,
+                        "is_streaming_chunk": True,
+                    }
+            s.set(chars=len(full_response), cached=cached is not None)
+        if cached is None:
+            self.response_cache.put(key, chunks)
 
         # Update conversation history
-        self.conversations[session_id].append(HumanMessage(content=user_input))
-        self.conversations[session_id].append(AIMessage(content=full_response))
+        self._history(session_id).add_turn(user_input, full_response)
 
         # Final response is always considered complete
         # The task is done when we've received the full LLM response
@@ -261,6 +570,24 @@ class TestAgent:
             "is_final": True,
         }
 
+    def _chat_messages(self, user_input: str, session_id: str) -> tuple[list[BaseMessage], int]:
+        """Prompt for a chat answer, and the number of earlier-page passages in it."""
+        tail: list[BaseMessage] = [HumanMessage(content=user_input)]
+
+        # Follow-ups about a summarized page: bring only the relevant passages into the prompt
+        hits = self.chunk_index.search(session_id, user_input, k=self.retrieval_top_k)
+        if hits:
+            excerpts = "\n\n".join(f"[{h.passage.title or h.passage.url}]\n{h.passage.text}" for h in hits)
+            context = SystemMessage(
+                content=(
+                    "Excerpts from pages summarized earlier in this conversation. "
+                    "Answer follow-up questions from them and say so if they don't cover it.\n\n"
+                    f"{excerpts}"
+                )
+            )
+            tail.insert(0, context)
+        return self._history(session_id).to_messages(self.system_prompt, *tail), len(hits)
+
     def _is_task_complete(self, response: str) -> bool:
         """Determine if the task is complete based on the response.
 
@@ -283,6 +610,14 @@ class TestAgent:
         response_lower = response.lower()
         return any(indicator in response_lower for indicator in completion_indicators)
 
+    def _history(self, session_id: str) -> History:
+        """The session's history, restored from the snapshot or created on first use."""
+        history = self.conversations.get(session_id)
+        if history is None:
+            restored = self.snapshot.load_session(session_id) if self.snapshot is not None else None
+            history = self.conversations[session_id] = restored or History()
+        return history
+
     def clear_conversation(self, session_id: str) -> None:
         """Clear conversation history for a session.
 
@@ -291,3 +626,6 @@ class TestAgent:
         """
         if session_id in self.conversations:
             del self.conversations[session_id]
+        if self.snapshot is not None:
+            self.snapshot.discard(SESSION, session_id)
+        self.chunk_index.clear_session(session_id)
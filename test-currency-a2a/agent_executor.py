@@ -1,23 +1,121 @@
 """Agent Executor for the Test A2A Agent."""
 
 import logging
+import os
+import re
+import time
+from collections.abc import Awaitable, Callable
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events.event_queue import EventQueue
-from a2a.types import TaskState, TaskStatus, TaskStatusUpdateEvent
-from a2a.utils import new_agent_text_message, new_task
+from a2a.server.events.event_queue import Event, EventQueue
+from a2a.types import (
+    DataPart,
+    InvalidParamsError,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from a2a.utils import new_agent_text_message, new_task, new_text_artifact
+from a2a.utils.errors import ServerError
+from admission import AdmissionController, Overloaded
 from agent import TestAgent
+from currency_converter import parse_conversion_query
+from event_log import EventLog
+from fast_send import is_blocking_send
+from latency import LatencyProfile, parse_profile, per_request_enabled
+from llm_gateway import llm_session
+from log_config import Sampler
+from metrics import (
+    ACTIVE_TASKS,
+    EVENT_QUEUE_DEPTH,
+    TASK_DURATION,
+    TASK_EVENTS,
+    TASK_FIRST_EVENT,
+)
+from tracing import span
+from web_summarizer import find_urls, is_http_url
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-partial debug lines are sampled: streaming emits one partial per token
+_partial_sample = Sampler(int(os.getenv("LOG_PARTIAL_SAMPLE_EVERY", "50")))
+
+# "bulk summarize <urls...>" selects the bulk job skill
+BULK_RE = re.compile(r"^\s*bulk\s+summari[sz]e\b", re.IGNORECASE)
+
 
 class TestAgentExecutor(AgentExecutor):
     """Executor for the Test A2A Agent."""
 
-    def __init__(self):
-        """Initialize the executor with the test agent."""
-        self.agent = TestAgent()
+    def __init__(self, agent: TestAgent | None = None):
+        """Initialize the executor with the test agent.
+
+        Args:
+            agent: Agent to run (a new TestAgent by default)
+        """
+        self.agent = agent or TestAgent()
+        # Replayable events per task for tasks/resubscribe
+        self.event_log = EventLog.from_env()
+        # Priority classes with per-class concurrency and load shedding
+        self.admission = AdmissionController.from_env()
+
+    def _get_bulk_urls(self, context: RequestContext, query: str) -> list[str]:
+        """Return the URL list of a bulk job request, or an empty list.
+
+        A bulk job is either a data part with a ``urls`` list or a text
+        message starting with "bulk summarize" followed by the URLs. Entries
+        of a ``urls`` list that are not http(s) URLs are dropped.
+
+        Raises:
+            ServerError: A ``urls`` list without any http(s) URL (InvalidParams)
+        """
+        for part in context.message.parts if context.message else []:
+            if isinstance(part.root, DataPart):
+                urls = part.root.data.get("urls")
+                if isinstance(urls, list):
+                    valid = [u.strip() for u in urls if is_http_url(u)]
+                    if not valid:
+                        raise ServerError(error=InvalidParamsError(message="urls must contain http(s) URLs"))
+                    if len(valid) < len(urls):
+                        logger.warning("Bulk job: dropped %d non-http(s) URL(s)", len(urls) - len(valid))
+                    return valid
+        if BULK_RE.match(query):
+            return find_urls(query)
+        return []
+
+    def _classify(self, query: str, bulk_urls: list[str]) -> str:
+        """Admission class of a request (mirrors the agent's routing)."""
+        if bulk_urls:
+            return "bulk"
+        if parse_conversion_query(query):
+            return "fast"
+        if find_urls(query):
+            return "summarize"
+        return "chat"
+
+    def _get_latency_profile(self, context: RequestContext) -> LatencyProfile | None:
+        """Per-request latency profile from ``latency_profile`` message metadata.
+
+        Ignored unless the server opted in (``LATENCY_PER_REQUEST``).
+        """
+        if not per_request_enabled():
+            return None
+        metadata = (context.message.metadata if context.message else None) or {}
+        spec = metadata.get("latency_profile")
+        if not spec:
+            return None
+        try:
+            return parse_profile(str(spec))
+        except ValueError as e:
+            logger.warning("Ignoring latency_profile metadata: %s", e)
+            return None
+
+    def _use_response_cache(self, context: RequestContext) -> bool:
+        """False if the message metadata sets ``"response_cache": false``."""
+        metadata = (context.message.metadata if context.message else None) or {}
+        return metadata.get("response_cache") is not False
 
     async def execute(
         self,
@@ -32,24 +130,116 @@ class TestAgentExecutor(AgentExecutor):
         """
         query = context.get_user_input()
         task = context.current_task
+        bulk_urls = self._get_bulk_urls(context, query)
+        task_class = self._classify(query, bulk_urls)
+        # Blocking message/send of a chat message: one invoke and one final
+        # status (see fast_send.py); other skills stream their progress
+        fast = task_class == "chat" and is_blocking_send(context)
+        kind = "bulk" if bulk_urls else "send" if fast else "stream"
+        started = time.perf_counter()
+        first_update = True
+        events = 0
+
+        async def emit(event: Event) -> None:
+            nonlocal first_update, events
+            EVENT_QUEUE_DEPTH.observe(event_queue.queue.qsize())
+            TASK_EVENTS.labels(type(event).__name__).inc()
+            events += 1
+            if first_update and not isinstance(event, Task):
+                first_update = False
+                elapsed = time.perf_counter() - started
+                TASK_FIRST_EVENT.labels(kind).observe(elapsed)
+                root.set(first_update_ms=round(elapsed * 1000, 3))
+            self.event_log.append(context.task_id, event)
+            await event_queue.enqueue_event(event)
 
-        # Create task if it doesn't exist
-        if not task:
-            task = new_task(context.message)
-            await event_queue.enqueue_event(task)
+        # Root span of the task's trace; stage spans in the agent nest under it
+        with span("task", task_id=context.task_id, context_id=context.context_id, kind=kind) as root:
+            self.event_log.start(context.task_id)
+            ACTIVE_TASKS.inc()
+            try:
+                # Create task if it doesn't exist; queued tasks are visible to the client
+                if not task:
+                    task = new_task(context.message)
+                    await emit(task)
+                root.set(task_class=task_class)
+                # LLM calls queue fairly per session in the gateway
+                async with self.admission.slot(task_class):
+                    with llm_session(task.context_id):
+                        if fast:
+                            await self._answer(context, task, query, emit)
+                        else:
+                            await self._execute(context, task, query, bulk_urls, emit)
+            except Overloaded as e:
+                logger.warning("Shedding task %s: %s", task.id, e, extra={"task_id": task.id})
+                await self._reject(task, e, emit)
+            finally:
+                ACTIVE_TASKS.dec()
+                self.event_log.finish(context.task_id)
+                TASK_DURATION.labels(kind).observe(time.perf_counter() - started)
+                root.set(events=events)
 
+    async def _execute(
+        self,
+        context: RequestContext,
+        task: Task,
+        query: str,
+        bulk_urls: list[str],
+        emit: Callable[[Event], Awaitable[None]],
+    ) -> None:
+        """Run the agent and translate its partials into A2A events.
+
+        Args:
+            context: Request context with user input
+            task: The task (already enqueued)
+            query: User input text
+            bulk_urls: URLs of a bulk job (empty for a normal message)
+            emit: Enqueues one event
+        """
         #  Collect full response
         full_response = ""
 
+        # Bulk jobs run on the agent's worker pool and report results as artifacts;
+        # clients submit them with blocking=false and a push notification config
+        if bulk_urls:
+            stream = self.agent.bulk_summarize(bulk_urls, task.context_id)
+        else:
+            latency = self._get_latency_profile(context)
+            stream = self.agent.stream(
+                query, task.context_id, latency=latency, cache=self._use_response_cache(context)
+            )
+
         # Stream agent responses - consume ALL events
-        async for partial in self.agent.stream(query, task.context_id):
+        async for partial in stream:
+            artifact = partial.get("artifact")
+            if artifact:
+                await emit(
+                    TaskArtifactUpdateEvent(
+                        artifact=new_text_artifact(
+                            name=artifact["name"],
+                            text=artifact["text"],
+                            description=artifact.get("description", ""),
+                        ),
+                        append=False,
+                        last_chunk=True,
+                        context_id=task.context_id,
+                        task_id=task.id,
+                    )
+                )
+                continue
+
             is_done = partial.get("is_task_complete", False)
             require_input = partial.get("require_user_input", False)
             text_content = partial.get("content", "")
             is_streaming = partial.get("is_streaming_chunk", False)
             is_final = partial.get("is_final", False)
 
-            logger.info(f"Partial: is_final={is_final}, is_streaming={is_streaming}, content_len={len(text_content)}")
+            if _partial_sample() and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Partial #%d: is_final=%s, is_streaming=%s, content_len=%d",
+                    _partial_sample.count, is_final, is_streaming, len(text_content),
+                    extra={"task_id": task.id},
+                )
 
             # Accumulate streaming chunks
             if is_streaming and text_content:
@@ -57,10 +247,10 @@ class TestAgentExecutor(AgentExecutor):
             elif is_final:
                 # This is the last event - save it
                 full_response = text_content if text_content else full_response
-                logger.info(f"Got final event, full response length: {len(full_response)}")
+                logger.debug("Got final event, full response length: %d", len(full_response))
             elif require_input:
                 # Waiting for user input
-                await event_queue.enqueue_event(
+                await emit(
                     TaskStatusUpdateEvent(
                         status=TaskStatus(
                             state=TaskState.input_required,
@@ -77,7 +267,7 @@ class TestAgentExecutor(AgentExecutor):
                 )
             else:
                 # Working state
-                await event_queue.enqueue_event(
+                await emit(
                     TaskStatusUpdateEvent(
                         status=TaskStatus(
                             state=TaskState.working,
@@ -95,15 +285,51 @@ class TestAgentExecutor(AgentExecutor):
 
         # After consuming all events, send ONLY the final status (no separate message)
         # Include the response text in the final status message
-        logger.info(f"Loop complete. Sending final status with response. Response length: {len(full_response)}")
+        logger.info(
+            "Task %s complete, response length: %d", task.id, len(full_response),
+            extra={"task_id": task.id, "context_id": task.context_id},
+        )
+
+        await self._complete(task, full_response, emit)
+
+    async def _answer(
+        self,
+        context: RequestContext,
+        task: Task,
+        query: str,
+        emit: Callable[[Event], Awaitable[None]],
+    ) -> None:
+        """Answer a blocking chat ``message/send`` with one LLM call and one final status.
 
-        # Send final completion status with the full response in the message
-        await event_queue.enqueue_event(
+        Args:
+            context: Request context with user input
+            task: The task (already enqueued)
+            query: User input text
+            emit: Enqueues one event
+        """
+        response = await self.agent.invoke(
+            query,
+            task.context_id,
+            latency=self._get_latency_profile(context),
+            cache=self._use_response_cache(context),
+        )
+        logger.info(
+            "Task %s complete, response length: %d", task.id, len(response["content"]),
+            extra={"task_id": task.id, "context_id": task.context_id},
+        )
+        # Completed like a streamed answer, whatever invoke's input heuristic says
+        await self._complete(task, response["content"], emit)
+
+    async def _complete(
+        self, task: Task, text: str, emit: Callable[[Event], Awaitable[None]]
+    ) -> None:
+        """Send the final completion status with the full response in the message."""
+        await emit(
             TaskStatusUpdateEvent(
                 status=TaskStatus(
                     state=TaskState.completed,
                     message=new_agent_text_message(
-                        full_response if full_response else "Task completed successfully.",
+                        text if text else "Task completed successfully.",
                         task.context_id,
                         task.id,
                     ),
@@ -113,7 +339,23 @@ class TestAgentExecutor(AgentExecutor):
                 task_id=task.id,
             )
         )
-        logger.info("Final status with response enqueued (final=True)")
+
+    async def _reject(
+        self, task: Task, error: Overloaded, emit: Callable[[Event], Awaitable[None]]
+    ) -> None:
+        """End a shed task as ``rejected``; clients may retry after ``retry_after`` seconds."""
+        await emit(
+            TaskStatusUpdateEvent(
+                status=TaskStatus(
+                    state=TaskState.rejected,
+                    message=new_agent_text_message(str(error), task.context_id, task.id),
+                ),
+                final=True,
+                context_id=task.context_id,
+                task_id=task.id,
+                metadata={"retryable": True, "retry_after": error.retry_after},
+            )
+        )
 
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
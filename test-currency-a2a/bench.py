@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the agent's Python hot paths.
+
+Measures ops/sec (best of several timed rounds) and memory per op
+(tracemalloc peak and blocks still alive afterwards) for:
+
+- ``parse_conversion_query`` on matching and non-matching chat messages
+- ``find_url`` / ``find_urls`` on a long message with embedded links
+- ``chunk_text`` on ~200 KB of extracted article text
+- ``LinkReader.fetch_and_extract`` on fixture HTML (mock transport)
+- ``CurrencyConverter.convert`` Decimal math (mock Frankfurter response)
+- the executor's per-event ``TaskStatusUpdateEvent`` + ``new_agent_text_message``
+- 1k five-turn conversation histories as LangChain message lists (the old
+  representation, system prompt at the head of each) and as ``History``
+- the executor's per-partial log line: inline f-string ``logger.info`` to a
+  stream (the old path), the sampled DEBUG line at INFO level, and an INFO
+  record through the queue handler of ``log_config``
+
+Results are written as JSON; ``--compare`` flags regressions against a
+stored baseline and exits non-zero when any are found::
+
+    uv run python bench.py --output bench-baseline.json
+    uv run python bench.py --compare bench-baseline.json --threshold 0.15
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+import click
+import httpx
+from a2a.types import TaskState, TaskStatus, TaskStatusUpdateEvent
+from a2a.utils import new_agent_text_message
+from currency_converter import CurrencyConverter, parse_conversion_query
+from fixture_server import FIXTURES_DIR, pad_html
+from history import History
+from host_scheduler import HostScheduler
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from log_config import LazyQueueHandler, Sampler
+from web_summarizer import LinkReader, chunk_text, find_url, find_urls
+
+MIN_ROUND_SECONDS = 0.2
+ALLOC_OPS = 20
+
+_FILLER = (
+    "We compared a handful of options last quarter and the results were mixed; "
+    "latency improved for most users but the cost model still needs work. "
+)
+
+
+def _bench_inputs() -> dict[str, Any]:
+    """Realistically sized inputs, built once."""
+    html = pad_html((FIXTURES_DIR / "pages" / "long-article.html").read_text(), 120_000)
+    prose = (_FILLER * 1400)[:200_000]
+    return {
+        "html": html,
+        "text": prose,
+        "convert_msg": "hey, quick one before the meeting: convert 1,250.50 usd to eur on 2024-01-15 please",
+        "chat_msg": _FILLER * 4 + "What would you recommend for next quarter?",
+        "url_msg": _FILLER * 3 + "see https://example.com/long-article, and also "
+        "https://docs.example.com/product?ref=chat. " + _FILLER * 3,
+    }
+
+
+def _bench_logger(name: str, handler: logging.Handler, level: int) -> logging.Logger:
+    """A non-propagating logger writing through `handler`."""
+    log = logging.getLogger(f"bench.{name}")
+    log.handlers[:] = [handler]
+    log.setLevel(level)
+    log.propagate = False
+    return log
+
+
+def _benchmarks() -> dict[str, Callable[[], Any]]:
+    """Name -> zero-argument callable performing one operation."""
+    inputs = _bench_inputs()
+    loop = asyncio.new_event_loop()
+
+    def page_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, html=inputs["html"])
+
+    def rate_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"amount": 1.0, "base": "USD", "date": "2024-01-15", "rates": {"EUR": 0.91827}})
+
+    # no per-host throttling: the benchmark repeats one URL back to back
+    reader = LinkReader(
+        httpx.AsyncClient(transport=httpx.MockTransport(page_handler)),
+        HostScheduler(rate=1e9, burst=1_000_000),
+    )
+    converter = CurrencyConverter(httpx.AsyncClient(transport=httpx.MockTransport(rate_handler)))
+    amount = Decimal("1250.50")
+
+    def status_event() -> TaskStatusUpdateEvent:
+        return TaskStatusUpdateEvent(
+            status=TaskStatus(
+                state=TaskState.working,
+                message=new_agent_text_message("Summarizing chunk 3/7…", "ctx-1", "task-1"),
+            ),
+            final=False,
+            context_id="ctx-1",
+            task_id="task-1",
+        )
+
+    devnull = open(os.devnull, "w")
+    inline_log = _bench_logger("inline", logging.StreamHandler(devnull), logging.INFO)
+    sampled_log = _bench_logger("sampled", logging.StreamHandler(devnull), logging.INFO)
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queued_log = _bench_logger("queued", LazyQueueHandler(log_queue), logging.INFO)
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(devnull))
+    listener.start()
+    atexit.register(listener.stop)
+    sample = Sampler(50)
+    content = "token"
+
+    def log_inline() -> None:
+        inline_log.info(f"Partial: is_final={False}, is_streaming={True}, content_len={len(content)}")
+
+    def log_sampled() -> None:
+        if sample() and sampled_log.isEnabledFor(logging.DEBUG):
+            sampled_log.debug("Partial #%d: content_len=%d", sample.count, len(content))
+
+    def log_queued() -> None:
+        queued_log.info("Partial: is_final=%s, is_streaming=%s, content_len=%d", False, True, len(content))
+
+    system = SystemMessage(content="You are a helpful AI assistant.")
+    turns = [(f"question {i}: " + _FILLER[:60], f"answer {i}: " + _FILLER) for i in range(5)]
+
+    def sessions_as_messages() -> dict[str, list]:
+        sessions = {}
+        for n in range(1000):
+            history = sessions[f"session-{n}"] = [system]
+            for user, assistant in turns:
+                history.append(HumanMessage(content=user + str(n)))
+                history.append(AIMessage(content=assistant + str(n)))
+        return sessions
+
+    def sessions_compact() -> dict[str, History]:
+        sessions = {}
+        for n in range(1000):
+            history = sessions[f"session-{n}"] = History()
+            for user, assistant in turns:
+                history.add_turn(user + str(n), assistant + str(n))
+        return sessions
+
+    return {
+        "parse_conversion_query.match": lambda: parse_conversion_query(inputs["convert_msg"]),
+        "parse_conversion_query.miss": lambda: parse_conversion_query(inputs["chat_msg"]),
+        "find_url": lambda: find_url(inputs["url_msg"]),
+        "find_urls": lambda: find_urls(inputs["url_msg"]),
+        "chunk_text.200k": lambda: chunk_text(inputs["text"]),
+        "link_reader.extract.120k": lambda: loop.run_until_complete(
+            reader.fetch_and_extract("https://example.com/long-article")
+        ),
+        "currency_converter.convert": lambda: loop.run_until_complete(
+            converter.convert(amount, "USD", "EUR", "2024-01-15")
+        ),
+        "executor.status_event": status_event,
+        "history.1k_sessions.messages": sessions_as_messages,
+        "history.1k_sessions.compact": sessions_compact,
+        "log.partial.inline": log_inline,
+        "log.partial.sampled": log_sampled,
+        "log.partial.queued": log_queued,
+    }
+
+
+def measure(fn: Callable[[], Any], rounds: int) -> dict[str, float]:
+    """Ops/sec (best round) and tracemalloc memory per op for `fn`."""
+    fn()  # warm-up
+    n = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_SECONDS:
+            break
+        n *= 2 if elapsed < MIN_ROUND_SECONDS / 4 else 1 + int(MIN_ROUND_SECONDS / elapsed)
+    best = elapsed / n
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, (time.perf_counter() - start) / n)
+
+    ops = min(n, ALLOC_OPS)
+    results = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    peak = 0
+    for _ in range(ops):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        results.append(fn())
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    results.clear()  # whatever is still allocated now was leaked or cached
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(d.count_diff for d in after.compare_to(before, "filename") if d.count_diff > 0)
+    return {
+        "ops_per_sec": 1.0 / best,
+        "us_per_op": best * 1e6,
+        "peak_kib_per_op": peak / 1024,
+        "retained_blocks_per_op": retained / ops,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Print changes against the baseline; return the names that regressed."""
+    click.echo(f"\nCompared with baseline {baseline.get('commit') or '?'} (threshold {threshold:.0%}):")
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            click.echo(f"  {name:30} (new)")
+            continue
+        speed = cur["ops_per_sec"] / base["ops_per_sec"] - 1
+        mem = (cur["peak_kib_per_op"] - base["peak_kib_per_op"]) / max(base["peak_kib_per_op"], 1.0)
+        flag = ""
+        if speed < -threshold or mem > threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append(name)
+        click.echo(f"  {name:30} ops/s {speed:+7.1%}  peak mem {mem:+7.1%}{flag}")
+    return regressions
+
+
+@click.command()
+@click.option("--filter", "pattern", default="", help="Only run benchmarks containing this")
+@click.option("--rounds", default=5, type=int, help="Timed rounds per benchmark (best is kept)")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write results JSON here")
+@click.option("--compare", type=click.Path(exists=True, dir_okay=False), help="Baseline JSON")
+@click.option("--threshold", default=0.15, type=float, help="Allowed slowdown / memory growth")
+def main(pattern: str, rounds: int, output: str | None, compare: str | None, threshold: float) -> None:
+    """Run the hot-path micro-benchmarks."""
+    results = {}
+    click.echo(f"{'benchmark':30} {'ops/s':>12} {'us/op':>10} {'peak KiB':>10} {'retained':>9}")
+    for name, fn in _benchmarks().items():
+        if pattern not in name:
+            continue
+        r = measure(fn, rounds)
+        results[name] = r
+        click.echo(
+            f"{name:30} {r['ops_per_sec']:12,.0f} {r['us_per_op']:10.1f} "
+            f"{r['peak_kib_per_op']:10.1f} {r['retained_blocks_per_op']:9.1f}"
+        )
+    result = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    if output:
+        Path(output).write_text(json.dumps(result, indent=2))
+        click.echo(f"Wrote {output}")
+    if compare:
+        regressions = _compare(result, json.loads(Path(compare).read_text()), threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Record/replay cassettes for LLM token streams and upstream HTTP exchanges.
+
+A cassette is a JSONL file with one entry per LLM call or HTTP exchange:
+
+- ``{"kind": "llm", "key": ..., "chunks": [[delay_ms, text], ...]}`` where
+  ``delay_ms`` is the time since the call started (first chunk) or since the
+  previous chunk
+- ``{"kind": "http", "key": "GET https://...", "status": ..., "headers": [...],
+  "body": <base64>, "ttfb_ms": ..., "total_ms": ...}`` with the raw (possibly
+  compressed) body
+
+``CASSETTE_MODE=record`` passes calls through to the real model and network
+and appends every exchange to ``CASSETTE_PATH``. ``CASSETTE_MODE=replay``
+serves them back without a model or network: at recorded speed with
+``CASSETTE_TIME_SCALE=1`` (default) or as fast as possible with ``0``.
+Calls are matched by prompt (LLM) or method and URL (HTTP); repeated keys are
+replayed in recorded order, cycling when exhausted.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import httpx
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """A replayed call has no recording in the cassette."""
+
+
+def llm_key(messages: Sequence[BaseMessage]) -> str:
+    """Stable key for a prompt (message types and contents)."""
+    prompt = "\x1e".join(f"{m.type}:{m.content}" for m in messages)
+    return hashlib.sha1(prompt.encode()).hexdigest()
+
+
+def http_key(request: httpx.Request) -> str:
+    """Stable key for an HTTP request (method and full URL)."""
+    return f"{request.method} {request.url}"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+class Cassette:
+    """Recorded LLM streams and HTTP exchanges backed by a JSONL file."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = "replay",
+        time_scale: float = 1.0,
+        inner_transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """Open a cassette.
+
+        Args:
+            path: JSONL file (appended to when recording)
+            mode: ``"record"`` or ``"replay"``
+            time_scale: Multiplier for recorded delays on replay (0 = no delays)
+            inner_transport: Transport used when recording (defaults to the network)
+
+        Raises:
+            ValueError: Unknown mode
+            FileNotFoundError: Replaying a cassette that does not exist
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode!r}; expected one of {CASSETTE_MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self.time_scale = time_scale
+        self._inner_transport = inner_transport
+        self._entries: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+        self._cursor: dict[tuple[str, str], int] = defaultdict(int)
+        if mode == "replay":
+            for line in self.path.read_text().splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[(entry["kind"], entry["key"])].append(entry)
+
+    @classmethod
+    def from_env(cls) -> "Cassette | None":
+        """Cassette configured by ``CASSETTE_*`` variables, or None when off."""
+        mode = os.getenv("CASSETTE_MODE", "off").lower()
+        if mode == "off":
+            return None
+        return cls(
+            os.getenv("CASSETTE_PATH", "cassette.jsonl"),
+            mode=mode,
+            time_scale=float(os.getenv("CASSETTE_TIME_SCALE", "1")),
+        )
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def write(self, entry: dict[str, Any]) -> None:
+        """Append a recorded exchange to memory and to the file."""
+        self._entries[(entry["kind"], entry["key"])].append(entry)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def lookup(self, kind: str, key: str) -> dict[str, Any]:
+        """Next recording for a key (cycling through repeats).
+
+        Raises:
+            CassetteMiss: Nothing was recorded for the key
+        """
+        entries = self._entries.get((kind, key))
+        if not entries:
+            raise CassetteMiss(f"no recorded {kind} exchange for {key}")
+        i = self._cursor[(kind, key)]
+        self._cursor[(kind, key)] = i + 1
+        return entries[i % len(entries)]
+
+    async def pause(self, delay_ms: float) -> None:
+        """Sleep for a recorded delay scaled by ``time_scale``."""
+        if self.time_scale > 0 and delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000 * self.time_scale)
+
+    def chat_model(self, factory: Callable[[], Any]) -> Any:
+        """Wrap the model from `factory` (recording) or replace it (replay)."""
+        if self.mode == "record":
+            return RecordingChatModel(factory(), self)
+        return ReplayChatModel(self)
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """HTTP transport that records through to, or replays, upstream servers."""
+        if self.mode == "record":
+            return RecordingTransport(self._inner_transport or httpx.AsyncHTTPTransport(), self)
+        return ReplayTransport(self)
+
+
+class RecordingChatModel:
+    """Passes calls through to a chat model and records its token timing."""
+
+    def __init__(self, inner: Any, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    async def astream(
+        self, messages: Sequence[BaseMessage], **kwargs: Any
+    ) -> AsyncIterator[AIMessageChunk]:
+        """Stream from the wrapped model, recording each chunk and its delay."""
+        chunks: list[list[Any]] = []
+        last = time.perf_counter()
+        async for chunk in self.inner.astream(messages, **kwargs):
+            now = time.perf_counter()
+            chunks.append([_ms(now - last), str(chunk.content)])
+            last = now
+            yield chunk
+        self.cassette.write({"kind": "llm", "key": llm_key(messages), "chunks": chunks})
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs: Any) -> AIMessage:
+        """Return the full response, recorded as a stream."""
+        content = ""
+        async for chunk in self.astream(messages, **kwargs):
+            content += chunk.content
+        return AIMessage(content=content)
+
+
+class ReplayChatModel:
+    """Serves recorded token streams in place of a chat model."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    async def astream(
+        self, messages: Sequence[BaseMessage], **kwargs: Any
+    ) -> AsyncIterator[AIMessageChunk]:
+        """Replay the recorded chunks for this prompt.
+
+        Raises:
+            CassetteMiss: The prompt was not recorded
+        """
+        entry = self.cassette.lookup("llm", llm_key(messages))
+        for delay_ms, text in entry["chunks"]:
+            await self.cassette.pause(delay_ms)
+            yield AIMessageChunk(content=text)
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs: Any) -> AIMessage:
+        """Return the recorded response after its recorded duration."""
+        content = ""
+        async for chunk in self.astream(messages, **kwargs):
+            content += chunk.content
+        return AIMessage(content=content)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forwards requests to an inner transport and records the responses."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        ttfb = time.perf_counter() - start
+        body = b"".join([part async for part in response.aiter_raw()])
+        await response.aclose()
+        self.cassette.write(
+            {
+                "kind": "http",
+                "key": http_key(request),
+                "status": response.status_code,
+                "headers": [[k, v] for k, v in response.headers.multi_items()],
+                "body": base64.b64encode(body).decode(),
+                "ttfb_ms": _ms(ttfb),
+                "total_ms": _ms(time.perf_counter() - start),
+            }
+        )
+        return httpx.Response(response.status_code, headers=response.headers, content=body)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class _ReplayBody(httpx.AsyncByteStream):
+    """Response body delivered after the recorded transfer time."""
+
+    def __init__(self, body: bytes, delay_ms: float, cassette: Cassette):
+        self.body = body
+        self.delay_ms = delay_ms
+        self.cassette = cassette
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        await self.cassette.pause(self.delay_ms)
+        yield self.body
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded HTTP responses without touching the network."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self.cassette.lookup("http", http_key(request))
+        await self.cassette.pause(entry["ttfb_ms"])
+        body = base64.b64decode(entry["body"])
+        return httpx.Response(
+            entry["status"],
+            headers=entry["headers"],
+            stream=_ReplayBody(body, entry["total_ms"] - entry["ttfb_ms"], self.cassette),
+        )
@@ -0,0 +1,180 @@
+# /chunk_index.py
+from __future__ import annotations
+import math
+import re
+import sys
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from web_summarizer import Page, chunk_text
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be but by did do does for from had has have how i in is it its "
+    "me my of on or say said so that the their them there they this to was we what when "
+    "where which who why will with you your about it's".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in (m.group(0).lower() for m in _TOKEN_RE.finditer(text)) if t not in _STOPWORDS]
+
+
+@dataclass
+class Passage:
+    text: str
+    url: str
+    title: Optional[str]
+    tf: Counter
+    length: int
+
+
+@dataclass
+class Hit:
+    passage: Passage
+    score: float
+
+
+@dataclass
+class IndexedPage:
+    url: str
+    title: Optional[str]
+    passages: List[Passage]
+    nbytes: int
+
+
+def _page_nbytes(passages: List[Passage]) -> int:
+    """Approximate retained size of a page's passages and term-frequency maps."""
+    total = 0
+    for p in passages:
+        total += sys.getsizeof(p.text) + sys.getsizeof(p.tf)
+        total += sum(sys.getsizeof(term) for term in p.tf)
+    return total
+
+
+class ChunkIndex:
+    """Per-session BM25 index over recently summarized pages.
+
+    Lets follow-up questions ("what did it say about pricing?") pull only the
+    relevant passages into the prompt instead of re-fetching the page. Pages
+    are evicted least-recently-used first once the index holds more than
+    `max_bytes` (approximate) or a session holds more than
+    `max_pages_per_session` pages.
+
+    A passage is only returned if its score is at least `min_score` of the
+    best score the query could reach (every query term, at saturation), so a
+    question sharing one common word with an earlier page gets no excerpts.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_pages_per_session: int = 5,
+        passage_chars: int = 1200,
+        k1: float = 1.5,
+        b: float = 0.75,
+        min_score: float = 0.15,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_pages_per_session = max_pages_per_session
+        self.passage_chars = passage_chars
+        self.k1 = k1
+        self.b = b
+        self.min_score = min_score
+        self._pages: OrderedDict[tuple[str, str], IndexedPage] = OrderedDict()
+        self._sessions: dict[str, OrderedDict[str, None]] = {}
+        self.nbytes = 0
+        self.evictions = 0
+
+    def add(self, session_id: str, page: Page, text: Optional[str] = None) -> IndexedPage:
+        """Index `page` (or its deduplicated `text`) for `session_id`."""
+        key = (session_id, page.url)
+        if key in self._pages:
+            self._drop(key)
+        passages = []
+        for chunk in chunk_text(text if text is not None else page.text, max_chars=self.passage_chars):
+            terms = tokenize(chunk)
+            if terms:
+                passages.append(Passage(chunk, page.url, page.title, Counter(terms), len(terms)))
+        entry = IndexedPage(page.url, page.title, passages, _page_nbytes(passages))
+        self._pages[key] = entry
+        self._sessions.setdefault(session_id, OrderedDict())[page.url] = None
+        self.nbytes += entry.nbytes
+
+        session_pages = self._sessions[session_id]
+        while len(session_pages) > self.max_pages_per_session:
+            self._evict((session_id, next(iter(session_pages))))
+        while self.nbytes > self.max_bytes and len(self._pages) > 1:
+            self._evict(next(iter(self._pages)))
+        return entry
+
+    def _drop(self, key: tuple[str, str]) -> None:
+        entry = self._pages.pop(key)
+        self.nbytes -= entry.nbytes
+        session_id, url = key
+        pages = self._sessions.get(session_id)
+        if pages is not None:
+            pages.pop(url, None)
+            if not pages:
+                del self._sessions[session_id]
+
+    def _evict(self, key: tuple[str, str]) -> None:
+        self._drop(key)
+        self.evictions += 1
+
+    def has_session(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def has_page(self, session_id: str, url: str) -> bool:
+        return (session_id, url) in self._pages
+
+    def session_nbytes(self, session_id: str) -> int:
+        """Approximate bytes indexed for `session_id`."""
+        return sum(self._pages[(session_id, url)].nbytes for url in self._sessions.get(session_id, ()))
+
+    def clear_session(self, session_id: str) -> None:
+        for url in list(self._sessions.get(session_id, ())):
+            self._drop((session_id, url))
+
+    def search(self, session_id: str, query: str, k: int = 4) -> List[Hit]:
+        """Top-`k` passages for `query` among the session's pages (BM25)."""
+        urls = self._sessions.get(session_id)
+        q_terms = set(tokenize(query))
+        if not urls or not q_terms:
+            return []
+        passages: List[Passage] = []
+        for url in list(urls):
+            key = (session_id, url)
+            self._pages.move_to_end(key)  # mark as recently used
+            passages.extend(self._pages[key].passages)
+        if not passages:
+            return []
+
+        n = len(passages)
+        avgdl = sum(p.length for p in passages) / n
+        df = Counter(t for p in passages for t in q_terms if t in p.tf)
+        idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in q_terms}
+        floor = self.min_score * sum(idf.values()) * (self.k1 + 1)
+        hits: List[Hit] = []
+        for p in passages:
+            score = 0.0
+            for t in q_terms:
+                f = p.tf.get(t)
+                if not f:
+                    continue
+                score += idf[t] * f * (self.k1 + 1) / (f + self.k1 * (1 - self.b + self.b * p.length / avgdl))
+            if score > 0 and score >= floor:
+                hits.append(Hit(p, score))
+        hits.sort(key=lambda h: h.score, reverse=True)
+        return hits[:k]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "pages": len(self._pages),
+            "passages": sum(len(p.passages) for p in self._pages.values()),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
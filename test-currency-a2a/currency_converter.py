@@ -1,5 +1,6 @@
 # /currency_converter.py
 from __future__ import annotations
+import os
 import re
 from dataclasses import dataclass
 from decimal import Decimal, ROUND_HALF_UP, getcontext
@@ -7,6 +8,9 @@ from typing import Optional
 
 import httpx
 
+from metrics import STAGE_DURATION
+from tracing import inject_headers, span
+
 # Money-safe arithmetic defaults
 getcontext().prec = 28
 
@@ -21,11 +25,21 @@ class ConversionResult:
     date: str  # YYYY-MM-DD (Frankfurter returns an effective date)
 
 class CurrencyConverter:
-    def __init__(self, client: Optional[httpx.AsyncClient] = None):
-        self._client = client or httpx.AsyncClient(timeout=10)
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._client = client or httpx.AsyncClient(
+            timeout=10, transport=transport, event_hooks={"request": [inject_headers]}
+        )
+        # FRANKFURTER_BASE can point at a local stand-in (see fixture_server.py)
+        self._base = (base_url or os.getenv("FRANKFURTER_BASE") or FRANKFURTER_BASE).rstrip("/")
 
     async def supported(self) -> set[str]:
-        r = await self._client.get(f"{FRANKFURTER_BASE}/currencies")
+        with STAGE_DURATION.labels("frankfurter").time(), span("frankfurter", endpoint="currencies"):
+            r = await self._client.get(f"{self._base}/currencies")
         r.raise_for_status()
         data = r.json()
         return set(data.keys())
@@ -36,9 +50,10 @@ class CurrencyConverter:
         if from_ccy == to_ccy:
             return ConversionResult(amount.quantize(Decimal("0.01")), from_ccy, to_ccy, Decimal("1"), date or "")
 
-        endpoint = f"{FRANKFURTER_BASE}/latest" if not date else f"{FRANKFURTER_BASE}/{date}"
+        endpoint = f"{self._base}/latest" if not date else f"{self._base}/{date}"
         params = {"base": from_ccy, "symbols": to_ccy}
-        r = await self._client.get(endpoint, params=params)
+        with STAGE_DURATION.labels("frankfurter").time(), span("frankfurter", endpoint=date or "latest"):
+            r = await self._client.get(endpoint, params=params)
         r.raise_for_status()
         data = r.json()
         rate = Decimal(str(data["rates"][to_ccy]))
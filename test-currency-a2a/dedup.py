@@ -0,0 +1,143 @@
+# /dedup.py
+from __future__ import annotations
+import random
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+# Mersenne prime used for the universal hash family (a*x + b) mod p
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PARA_SPLIT_RE = re.compile(r"\n\s*\n")
+
+
+@dataclass
+class DedupStats:
+    kept: int = 0
+    dropped: int = 0
+    dropped_chars: int = 0
+
+    @property
+    def dropped_tokens(self) -> int:
+        """Rough token estimate (~4 chars per token for English text)."""
+        return (self.dropped_chars + 3) // 4
+
+    def merge(self, other: "DedupStats") -> "DedupStats":
+        return DedupStats(
+            kept=self.kept + other.kept,
+            dropped=self.dropped + other.dropped,
+            dropped_chars=self.dropped_chars + other.dropped_chars,
+        )
+
+
+class MinHashDeduper:
+    """Near-duplicate filter using MinHash signatures and LSH banding.
+
+    Texts are shingled into word n-grams; two texts whose estimated Jaccard
+    similarity is >= `threshold` are treated as duplicates and only the first
+    occurrence is kept. Texts shorter than `min_words` are always kept so that
+    headings and short lines are never dropped.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        min_words: int = 8,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def _shingles(self, words: List[str]) -> set[int]:
+        k = self.shingle_size
+        if len(words) <= k:
+            return {zlib.crc32(" ".join(words).encode())}
+        return {
+            zlib.crc32(" ".join(words[i : i + k]).encode())
+            for i in range(len(words) - k + 1)
+        }
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        words = [w.lower() for w in _WORD_RE.findall(text)]
+        shingles = self._shingles(words)
+        return tuple(
+            min(((a * s + b) % _PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+        same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+        return same / len(sig_a)
+
+    def filter(self, texts: Iterable[str]) -> tuple[List[str], DedupStats]:
+        """Return `texts` with near-duplicates removed, preserving order."""
+        stats = DedupStats()
+        kept: List[str] = []
+        signatures: List[tuple[int, ...]] = []
+        buckets: dict[tuple[int, tuple[int, ...]], List[int]] = {}
+
+        for text in texts:
+            if len(_WORD_RE.findall(text)) < self.min_words:
+                kept.append(text)
+                stats.kept += 1
+                continue
+
+            sig = self.signature(text)
+            bands = [
+                (b, sig[b * self.rows : (b + 1) * self.rows])
+                for b in range(self.bands)
+            ]
+            candidates: set[int] = set()
+            for key in bands:
+                candidates.update(buckets.get(key, ()))
+
+            if any(
+                self.similarity(sig, signatures[c]) >= self.threshold
+                for c in candidates
+            ):
+                stats.dropped += 1
+                stats.dropped_chars += len(text)
+                continue
+
+            idx = len(signatures)
+            signatures.append(sig)
+            for key in bands:
+                buckets.setdefault(key, []).append(idx)
+            kept.append(text)
+            stats.kept += 1
+
+        return kept, stats
+
+
+def dedup_paragraphs(
+    text: str, deduper: Optional[MinHashDeduper] = None
+) -> tuple[str, DedupStats]:
+    """Drop near-duplicate paragraphs (quoted replies, repeated disclaimers)."""
+    deduper = deduper or MinHashDeduper()
+    paragraphs = [p.strip() for p in _PARA_SPLIT_RE.split(text) if p.strip()]
+    # Trafilatura separates blocks with single newlines; fall back to lines
+    if len(paragraphs) <= 1:
+        paragraphs = [p.strip() for p in text.splitlines() if p.strip()]
+        sep = "\n"
+    else:
+        sep = "\n\n"
+    kept, stats = deduper.filter(paragraphs)
+    return sep.join(kept), stats
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Local stand-in for Frankfurter and for web pages, for offline tests and benchmarks.
+
+Serves, from bundled fixtures:
+
+- ``/v1/currencies``, ``/v1/latest``, ``/v1/{date}``, ``/v1/{start}..{end}``
+  and ``/v1/{start}..`` with Frankfurter's query parameters (``base``,
+  ``symbols``, ``amount``), from ``fixtures/frankfurter.json``
+- ``/pages?url=<original url>``: the recorded HTML for that URL from
+  ``fixtures/pages/manifest.json``, or a deterministic synthetic article for
+  unknown URLs
+- ``/pages/<file>``: a recorded page by file name
+
+Latency (``--latency-ms`` / ``--jitter-ms``, or ``latency_ms`` per request)
+and page size (``--page-bytes``, or ``bytes`` per request) are configurable.
+
+Point the agent at it with::
+
+    uv run python fixture_server.py --port 8765 --latency-ms 40
+    FRANKFURTER_BASE=http://localhost:8765/v1 \\
+    LINK_READER_FIXTURE_BASE=http://localhost:8765 uv run python __main__.py
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import zlib
+from datetime import date as Date
+from pathlib import Path
+
+import click
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.routing import Route
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+_RANGE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.\.(\d{4}-\d{2}-\d{2})?$")
+_WORDS = (
+    "city transit riders station network data model service demand schedule "
+    "operator budget policy report analysis system capacity growth cost travel "
+    "route peak hour weekday region plan survey result trend forecast pilot"
+).split()
+
+
+class FixtureData:
+    """Bundled exchange rates and recorded pages."""
+
+    def __init__(self, fixtures_dir: Path = FIXTURES_DIR):
+        """Load the fixtures.
+
+        Args:
+            fixtures_dir: Directory holding ``frankfurter.json`` and ``pages/``
+        """
+        fx = json.loads((fixtures_dir / "frankfurter.json").read_text())
+        self.base: str = fx["base"]
+        self.currencies: dict[str, str] = fx["currencies"]
+        self.rates: dict[str, dict[str, float]] = fx["rates"]
+        self.dates = sorted(self.rates)
+        self.pages_dir = fixtures_dir / "pages"
+        self.manifest: dict[str, str] = json.loads(
+            (self.pages_dir / "manifest.json").read_text()
+        )
+
+    def effective_date(self, day: str) -> str | None:
+        """Last date with rates on or before `day` (like Frankfurter)."""
+        candidates = [d for d in self.dates if d <= day]
+        return candidates[-1] if candidates else None
+
+    def convert(
+        self, day: str, base: str, symbols: list[str] | None, amount: float
+    ) -> dict[str, float]:
+        """Rates for `base` on `day`, cross-computed from the stored base."""
+        table = {**self.rates[day], self.base: 1.0}
+        targets = symbols or [c for c in sorted(table) if c != base]
+        return {
+            s: round(amount * table[s] / table[base], 5) for s in targets if s != base
+        }
+
+
+def synthetic_article(url: str, words: int = 900) -> str:
+    """Deterministic pseudo-article for URLs missing from the manifest."""
+    rng = random.Random(zlib.crc32(url.encode()))
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        n = min(remaining, rng.randint(40, 90))
+        words_ = [rng.choice(_WORDS) for _ in range(n)]
+        sentences = [
+            " ".join(words_[i : i + 12]).capitalize() + "."
+            for i in range(0, n, 12)
+        ]
+        paragraphs.append(f"<p>{' '.join(sentences)}</p>")
+        remaining -= n
+    title = f"Synthetic article {zlib.crc32(url.encode()):08x}"
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title></head>"
+        f"<body><article><h1>{title}</h1>{''.join(paragraphs)}</article></body></html>"
+    )
+
+
+def pad_html(html: str, size: int) -> str:
+    """Repeat the article's paragraphs until the page is at least `size` bytes."""
+    if len(html.encode()) >= size:
+        return html
+    paragraphs = re.findall(r"<p[^>]*>.*?</p>", html, flags=re.S) or ["<p>padding</p>"]
+    filler = []
+    total = len(html.encode())
+    i = 0
+    while total < size:
+        p = paragraphs[i % len(paragraphs)]
+        filler.append(p)
+        total += len(p.encode())
+        i += 1
+    close = html.rfind("</article>")
+    if close == -1:
+        close = html.rfind("</body>")
+    return html[:close] + "".join(filler) + html[close:]
+
+
+def build_app(
+    data: FixtureData,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    page_bytes: int = 0,
+    synthetic: bool = True,
+) -> Starlette:
+    """Create the fixture Starlette app.
+
+    Args:
+        data: Loaded fixtures
+        latency_ms: Delay added to every response
+        jitter_ms: Uniform random extra delay (0..jitter_ms)
+        page_bytes: Minimum page size; pages are padded up to it
+        synthetic: Serve synthetic articles for URLs not in the manifest
+
+    Returns:
+        Starlette: The application
+    """
+
+    async def delay(request: Request) -> None:
+        ms = float(request.query_params.get("latency_ms", latency_ms))
+        if jitter_ms:
+            ms += random.uniform(0, jitter_ms)
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+    def not_found() -> JSONResponse:
+        return JSONResponse({"message": "not found"}, status_code=404)
+
+    def rate_params(request: Request) -> tuple[str, list[str] | None, float] | JSONResponse:
+        """Base, symbols and amount, or the error response for bad parameters."""
+        base = request.query_params.get("base", data.base).upper()
+        raw = request.query_params.get("symbols")
+        symbols = [s.strip().upper() for s in raw.split(",") if s.strip()] if raw else None
+        known = set(data.currencies)
+        if base not in known or (symbols and not set(symbols) <= known):
+            return not_found()
+        try:
+            amount = float(request.query_params.get("amount", "1"))
+        except ValueError:
+            amount = math.nan
+        if not math.isfinite(amount):
+            return JSONResponse({"message": "amount must be a number"}, status_code=400)
+        return base, symbols, amount
+
+    async def currencies(request: Request) -> Response:
+        await delay(request)
+        return JSONResponse(data.currencies)
+
+    async def latest(request: Request) -> Response:
+        await delay(request)
+        params = rate_params(request)
+        if isinstance(params, JSONResponse):
+            return params
+        base, symbols, amount = params
+        day = data.dates[-1]
+        return JSONResponse(
+            {"amount": amount, "base": base, "date": day, "rates": data.convert(day, base, symbols, amount)}
+        )
+
+    async def historical(request: Request) -> Response:
+        await delay(request)
+        params = rate_params(request)
+        if isinstance(params, JSONResponse):
+            return params
+        base, symbols, amount = params
+        spec = request.path_params["spec"]
+
+        if m := _RANGE_RE.match(spec):
+            start, end = m.group(1), m.group(2) or Date.today().isoformat()
+            days = [d for d in data.dates if start <= d <= end]
+            # Frankfurter starts a range at the last business day before `start`
+            first = data.effective_date(start)
+            if first and first not in days:
+                days.insert(0, first)
+            if not days:
+                return not_found()
+            return JSONResponse(
+                {
+                    "amount": amount,
+                    "base": base,
+                    "start_date": days[0],
+                    "end_date": days[-1],
+                    "rates": {d: data.convert(d, base, symbols, amount) for d in days},
+                }
+            )
+
+        try:
+            Date.fromisoformat(spec)
+        except ValueError:
+            return not_found()
+        day = data.effective_date(spec)
+        if day is None:
+            return not_found()
+        return JSONResponse(
+            {"amount": amount, "base": base, "date": day, "rates": data.convert(day, base, symbols, amount)}
+        )
+
+    def html_response(request: Request, html: str) -> HTMLResponse:
+        size = int(request.query_params.get("bytes", page_bytes))
+        return HTMLResponse(pad_html(html, size) if size else html)
+
+    async def page_by_url(request: Request) -> Response:
+        await delay(request)
+        url = request.query_params.get("url", "")
+        name = data.manifest.get(url)
+        if name:
+            return html_response(request, (data.pages_dir / name).read_text())
+        if not synthetic:
+            return Response("not found", status_code=404)
+        words = int(request.query_params.get("words", "900"))
+        return html_response(request, synthetic_article(url, words))
+
+    async def page_by_name(request: Request) -> Response:
+        await delay(request)
+        path = (data.pages_dir / request.path_params["name"]).resolve()
+        if path.parent != data.pages_dir.resolve() or path.suffix != ".html" or not path.exists():
+            return Response("not found", status_code=404)
+        return html_response(request, path.read_text())
+
+    return Starlette(
+        routes=[
+            Route("/v1/currencies", currencies),
+            Route("/v1/latest", latest),
+            Route("/v1/{spec}", historical),
+            Route("/pages", page_by_url),
+            Route("/pages/{name}", page_by_name),
+        ]
+    )
+
+
+class FixtureTransport(httpx.AsyncBaseTransport):
+    """Serves Frankfurter and page requests for any host from the fixture app.
+
+    In-process alternative to ``FRANKFURTER_BASE``/``LINK_READER_FIXTURE_BASE``
+    that keeps the original request URLs (e.g. for recording cassettes).
+    """
+
+    def __init__(self, app: Starlette | None = None):
+        self._asgi = httpx.ASGITransport(app=app or build_app(FixtureData()))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if "frankfurter" in request.url.host:
+            url = httpx.URL("http://fixtures", path=request.url.path, query=request.url.query)
+        else:
+            url = httpx.URL("http://fixtures/pages", params={"url": str(request.url)})
+        return await self._asgi.handle_async_request(
+            httpx.Request(request.method, url, headers=request.headers)
+        )
+
+
+@click.command()
+@click.option("--host", default="localhost", help="Host to bind the server to")
+@click.option("--port", default=8765, type=int, help="Port to bind the server to")
+@click.option("--latency-ms", default=0.0, type=float, help="Delay added to every response")
+@click.option("--jitter-ms", default=0.0, type=float, help="Extra uniform random delay")
+@click.option("--page-bytes", default=0, type=int, help="Pad pages to at least this size")
+@click.option("--no-synthetic", is_flag=True, help="404 for URLs not in the manifest")
+def main(
+    host: str,
+    port: int,
+    latency_ms: float,
+    jitter_ms: float,
+    page_bytes: int,
+    no_synthetic: bool,
+) -> None:
+    """Run the Frankfurter and web page fixture server."""
+    app = build_app(FixtureData(), latency_ms, jitter_ms, page_bytes, not no_synthetic)
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Compact per-session conversation history.
+
+Turns are kept as plain strings, alternating user and assistant text, in one
+slotted object per session. The system prompt is not stored per session: it
+is passed in when a prompt is assembled, and LangChain message objects exist
+only for the duration of an LLM call.
+"""
+
+from collections.abc import Iterable, Iterator
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+
+class History:
+    """One session's turns as alternating user/assistant texts."""
+
+    __slots__ = ("_texts",)
+
+    def __init__(self, texts: Iterable[str] = ()):
+        """Initialize the history.
+
+        Args:
+            texts: Alternating user and assistant texts, user first
+        """
+        self._texts: list[str] = list(texts)
+
+    def add_turn(self, user: str, assistant: str) -> None:
+        """Append one user message and the assistant's reply."""
+        self._texts.append(user)
+        self._texts.append(assistant)
+
+    def texts(self) -> list[str]:
+        """Alternating user/assistant texts (for snapshots)."""
+        return list(self._texts)
+
+    def __len__(self) -> int:
+        """Number of stored messages (two per turn)."""
+        return len(self._texts)
+
+    def __iter__(self) -> Iterator[BaseMessage]:
+        for i, text in enumerate(self._texts):
+            yield AIMessage(content=text) if i % 2 else HumanMessage(content=text)
+
+    def to_messages(self, system: SystemMessage, *tail: BaseMessage) -> list[BaseMessage]:
+        """Prompt messages: `system`, the stored turns, then `tail`."""
+        return [system, *self, *tail]
@@ -0,0 +1,209 @@
+# /host_scheduler.py
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+from metrics import LINK_READER_HOST_BLOCKED, LINK_READER_HOST_DEFERRALS, LINK_READER_HOST_QUEUED
+
+MAX_TRACKED_HOSTS = 1024
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@dataclass
+class _HostState:
+    tokens: float
+    updated: float
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+    dispatched: int = 0
+    throttled: int = 0
+    max_queue_depth: int = 0
+
+
+def _queued(state: _HostState) -> int:
+    return sum(1 for w in state.waiters if not w.done())
+
+
+class HostScheduler:
+    """Per-origin politeness for outbound page fetches.
+
+    Each origin gets a token bucket (`rate` requests/s, up to `burst`) and a
+    concurrency cap (`per_host`); all origins share a pool of `max_total`
+    slots. Free slots are handed out round-robin across origins that have
+    waiters, so a throttled origin (rate limit or Retry-After) never stalls
+    requests for other origins.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: int = 3,
+        per_host: int = 2,
+        max_total: int = 16,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.per_host = per_host
+        self.max_total = max_total
+        self._hosts: Dict[str, _HostState] = {}
+        self._ready: Deque[str] = deque()  # origins with waiters, round-robin order
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    def _host(self, origin: str) -> _HostState:
+        state = self._hosts.get(origin)
+        if state is None:
+            now = time.monotonic()
+            if len(self._hosts) >= MAX_TRACKED_HOSTS:
+                self._forget_idle(now)
+            state = _HostState(tokens=float(self.burst), updated=now)
+            self._hosts[origin] = state
+            # exported per origin while it is tracked
+            LINK_READER_HOST_QUEUED.labels(origin).set_function(lambda: _queued(state))
+            LINK_READER_HOST_BLOCKED.labels(origin).set_function(
+                lambda: max(0.0, state.blocked_until - time.monotonic())
+            )
+        return state
+
+    def _forget_idle(self, now: float) -> None:
+        """Drop origins with nothing queued, nothing in flight and a full bucket."""
+        for origin, state in list(self._hosts.items()):
+            self._refill(state, now)
+            if (
+                not state.waiters
+                and not state.in_flight
+                and state.blocked_until <= now
+                and state.tokens >= self.burst
+            ):
+                del self._hosts[origin]
+                for metric in (LINK_READER_HOST_QUEUED, LINK_READER_HOST_BLOCKED, LINK_READER_HOST_DEFERRALS):
+                    metric.remove(origin)
+
+    def _refill(self, state: _HostState, now: float) -> None:
+        state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+        state.updated = now
+
+    def _next_eligible(self, state: _HostState, now: float) -> float:
+        """Earliest time `state` may dispatch, ignoring concurrency caps."""
+        at = max(now, state.blocked_until)
+        if state.tokens < 1:
+            at = max(at, now + (1 - state.tokens) / self.rate)
+        return at
+
+    def _pump(self) -> None:
+        self._wakeup = None
+        now = time.monotonic()
+        progressed = True
+        while progressed and self._in_flight < self.max_total:
+            progressed = False
+            for _ in range(len(self._ready)):
+                if self._in_flight >= self.max_total:
+                    break
+                origin = self._ready.popleft()
+                state = self._hosts[origin]
+                while state.waiters and state.waiters[0].done():
+                    state.waiters.popleft()  # cancelled while queued
+                if not state.waiters:
+                    continue
+                self._refill(state, now)
+                if state.in_flight < self.per_host and self._next_eligible(state, now) <= now:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    state.dispatched += 1
+                    self._in_flight += 1
+                    state.waiters.popleft().set_result(None)
+                    progressed = True
+                if state.waiters:
+                    self._ready.append(origin)
+
+        # Re-arm a timer for the earliest origin held back by its bucket or Retry-After
+        wake_at: Optional[float] = None
+        for origin in self._ready:
+            state = self._hosts[origin]
+            if state.in_flight < self.per_host:
+                eligible = self._next_eligible(state, now)
+                if eligible > now:
+                    wake_at = eligible if wake_at is None else min(wake_at, eligible)
+        if wake_at is not None:
+            loop = asyncio.get_running_loop()
+            self._wakeup = loop.call_at(loop.time() + (wake_at - now), self._pump)
+
+    def _schedule(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._pump()
+
+    def _release(self, origin: str) -> None:
+        self._hosts[origin].in_flight -= 1
+        self._in_flight -= 1
+        self._schedule()
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Wait for a fetch slot for `url`'s origin and hold it for the block."""
+        origin = origin_of(url)
+        state = self._host(origin)
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        state.waiters.append(fut)
+        state.max_queue_depth = max(state.max_queue_depth, len(state.waiters))
+        if origin not in self._ready:
+            self._ready.append(origin)
+        self._schedule()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._release(origin)  # slot was granted as we got cancelled
+            raise
+        try:
+            yield
+        finally:
+            self._release(origin)
+
+    def defer(self, url: str, delay: float) -> None:
+        """Hold back `url`'s origin for `delay` seconds (e.g. Retry-After)."""
+        origin = origin_of(url)
+        state = self._host(origin)
+        state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+        state.throttled += 1
+        LINK_READER_HOST_DEFERRALS.labels(origin).inc()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-origin queue depth and throttling counters."""
+        now = time.monotonic()
+        return {
+            origin: {
+                "queued": _queued(s),
+                "in_flight": s.in_flight,
+                "max_queue_depth": s.max_queue_depth,
+                "dispatched": s.dispatched,
+                "throttled": s.throttled,
+                "blocked_for": round(max(0.0, s.blocked_until - now), 3),
+            }
+            for origin, s in self._hosts.items()
+        }
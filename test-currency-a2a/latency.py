@@ -0,0 +1,116 @@
+"""Latency-injection profiles for the Test A2A Agent.
+
+Profiles add an artificial delay before the LLM call so tail-latency
+experiments can be run deliberately. The default is ``none`` (no delay).
+
+A profile is selected per server with ``LATENCY_PROFILE`` (or
+``--latency-profile``). Per request, ``latency_profile`` in the message
+metadata overrides it, but only on servers started with
+``LATENCY_PER_REQUEST=1`` (or ``--latency-per-request``): otherwise any
+client could stall the server's tasks. Every delay is capped at
+``LATENCY_MAX_MS`` (default 30000). Specs are ``name[:param:...]`` with
+times in milliseconds:
+
+- ``none``
+- ``fixed[:ms]`` (default 5000)
+- ``lognormal[:median_ms[:sigma]]`` (default 500, 0.6)
+- ``heavy-tail[:median_ms[:sigma[:spike_p[:spike_factor]]]]``
+  (default 300, 0.5, 0.01, 20): log-normal with rare spikes that dominate p99
+"""
+
+import asyncio
+import math
+import os
+import random
+from dataclasses import dataclass, replace
+
+LATENCY_PROFILES = ("none", "fixed", "lognormal", "heavy-tail")
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """A delay distribution.
+
+    Attributes:
+        name: Profile name
+        median: Median delay in seconds
+        sigma: Log-normal sigma (0 = always the median)
+        spike_p: Probability of a spike
+        spike_factor: Multiplier applied to the delay on a spike
+    """
+
+    name: str
+    median: float = 0.0
+    sigma: float = 0.0
+    spike_p: float = 0.0
+    spike_factor: float = 1.0
+
+    def sample(self, rng: random.Random | None = None) -> float:
+        """Draw one delay in seconds (at most ``LATENCY_MAX_MS``)."""
+        if self.median <= 0:
+            return 0.0
+        rng = rng or random
+        delay = self.median
+        if self.sigma > 0:
+            delay *= math.exp(rng.gauss(0.0, self.sigma))
+        if self.spike_p > 0 and rng.random() < self.spike_p:
+            delay *= self.spike_factor
+        return min(delay, float(os.getenv("LATENCY_MAX_MS", "30000")) / 1000)
+
+    async def sleep(self) -> float:
+        """Sleep for one sampled delay and return it."""
+        delay = self.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+_PRESETS = {
+    "none": LatencyProfile("none"),
+    "fixed": LatencyProfile("fixed", median=5.0),
+    "lognormal": LatencyProfile("lognormal", median=0.5, sigma=0.6),
+    "heavy-tail": LatencyProfile(
+        "heavy-tail", median=0.3, sigma=0.5, spike_p=0.01, spike_factor=20.0
+    ),
+}
+_PARAMS = ("median", "sigma", "spike_p", "spike_factor")
+
+
+def parse_profile(spec: str | None) -> LatencyProfile:
+    """Parse a ``name[:param:...]`` spec into a profile.
+
+    Args:
+        spec: Profile spec; empty or None means ``none``
+
+    Returns:
+        LatencyProfile: The preset with any given parameters overridden
+
+    Raises:
+        ValueError: Unknown profile name or malformed parameters
+    """
+    if not spec:
+        return _PRESETS["none"]
+    name, *params = spec.strip().lower().split(":")
+    if name not in _PRESETS:
+        raise ValueError(
+            f"Unknown latency profile {name!r}; expected one of {LATENCY_PROFILES}"
+        )
+    if len(params) > len(_PARAMS):
+        raise ValueError(f"Too many parameters for latency profile {spec!r}")
+    overrides = {}
+    for field_name, value in zip(_PARAMS, params):
+        number = float(value)
+        if not math.isfinite(number) or number < 0 or (field_name == "spike_p" and number > 1):
+            raise ValueError(f"Bad {field_name} {value!r} in latency profile {spec!r}")
+        overrides[field_name] = number / 1000 if field_name == "median" else number
+    return replace(_PRESETS[name], **overrides)
+
+
+def default_profile() -> LatencyProfile:
+    """Server-wide profile from ``LATENCY_PROFILE`` (``none`` if unset)."""
+    return parse_profile(os.getenv("LATENCY_PROFILE"))
+
+
+def per_request_enabled() -> bool:
+    """Whether ``latency_profile`` message metadata is honored (``LATENCY_PER_REQUEST``)."""
+    return os.getenv("LATENCY_PER_REQUEST", "").lower() in ("1", "true", "yes")
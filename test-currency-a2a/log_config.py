@@ -0,0 +1,125 @@
+"""Logging setup for the Test A2A Agent servers.
+
+Log calls on the event loop only enqueue the record: formatting (including
+``%``-style arguments) and I/O happen on a background listener thread. Output
+is text or one JSON object per line (``LOG_FORMAT=json``); fields passed with
+``extra=`` become JSON keys. Per-token logging goes through :class:`Sampler`
+so only every Nth event is logged even at DEBUG.
+
+Configured once by the server entry point with :func:`setup_logging`;
+library modules only call ``logging.getLogger(__name__)``.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import IO, Any
+
+# LogRecord attributes that are not user-supplied ``extra`` fields (plus
+# uvicorn's ANSI-coloured duplicate of the message)
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "taskName", "color_message",
+}
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra`` fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records unformatted so formatting runs on the listener thread.
+
+    The stdlib handler formats in the calling thread; here message arguments
+    should be immutable values (ids, numbers, short strings).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class Sampler:
+    """True on every `every`-th call; for logging high-frequency events."""
+
+    __slots__ = ("every", "count")
+
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self.count = 0
+
+    def __call__(self) -> bool:
+        self.count += 1
+        return self.count % self.every == 1 or self.every == 1
+
+
+def setup_logging(
+    level: str | None = None,
+    fmt: str | None = None,
+    stream: IO[str] | None = None,
+) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background writer thread.
+
+    The writer is stopped (and the queue flushed) by :func:`shutdown_logging`,
+    which also runs at interpreter exit.
+
+    Args:
+        level: Root level name (defaults to ``LOG_LEVEL`` or INFO)
+        fmt: ``"text"`` or ``"json"`` (defaults to ``LOG_FORMAT`` or text)
+        stream: Destination (defaults to stderr)
+
+    Returns:
+        The started listener
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(LazyQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
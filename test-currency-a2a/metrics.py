@@ -0,0 +1,332 @@
+"""Prometheus-style metrics for the Test A2A Agent.
+
+Dependency-free counters, gauges and histograms rendered in the Prometheus
+text exposition format at ``GET /metrics``. Recording is a few integer and
+float updates (histograms use a bisect over fixed buckets), so it stays on in
+the per-token and per-event loops.
+"""
+
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+# Seconds, from sub-millisecond stages up to long LLM calls and bulk jobs
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1024)
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    """Base for metrics with optional labels; children are cached per label set."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+        REGISTRY.register(self)
+
+    def labels(self, *values: str) -> Any:
+        """The child metric for a label set (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def remove(self, *values: str) -> None:
+        """Stop exporting a label set (e.g. a host that is no longer tracked)."""
+        self._children.pop(values, None)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}_total{_fmt_labels(self.labelnames, values)} {_fmt_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.function: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from `function` at scrape time instead."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function else self.value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, set directly or read from a callback."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.labels().set_function(function)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{_fmt_labels(self.labelnames, values)} {_fmt_value(child.get())}"
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets (cumulative on export)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> Any:
+        return self.labels().time()
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), child.counts):
+                cumulative += n
+                le = 'le="' + _fmt_value(bound) + '"'
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, values, le)} {cumulative}"
+            labels = _fmt_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_fmt_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    """All metrics of the process, in registration order."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(m.render() for m in self._metrics.values() if m._children) + "\n"
+
+
+REGISTRY = Registry()
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """``GET /metrics`` handler."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# --- Agent metrics ---
+
+TASK_DURATION = Histogram(
+    "a2a_task_duration_seconds", "Time from execute() to the final event", ["kind"]
+)
+TASK_FIRST_EVENT = Histogram(
+    "a2a_task_first_event_seconds", "Time from execute() to the first status or artifact update", ["kind"]
+)
+TASK_EVENTS = Counter("a2a_task_events", "Events enqueued by the executor", ["type"])
+EVENT_QUEUE_DEPTH = Histogram(
+    "a2a_event_queue_depth", "Event queue size seen when enqueuing", buckets=DEPTH_BUCKETS
+)
+EVENT_QUEUE_HIGH_WATER = Histogram(
+    "a2a_event_queue_high_water", "Largest size of each event queue, recorded when it closes", buckets=DEPTH_BUCKETS
+)
+EVENT_QUEUE_BLOCKED = Counter(
+    "a2a_event_queue_blocked_seconds", "Time producers waited on a full event queue"
+)
+EVENTS_COALESCED = Counter(
+    "a2a_events_coalesced", "Progress events replaced or dropped by the queue policy", ["policy"]
+)
+ACTIVE_TASKS = Gauge("a2a_active_tasks", "Tasks currently executing")
+DUPLICATE_MESSAGES = Counter(
+    "a2a_duplicate_messages", "Retried messages answered from the original task", ["state"]
+)
+ADMISSION_QUEUED = Gauge("a2a_admission_queued", "Tasks waiting for a running slot", ["class"])
+ADMISSION_WAIT = Histogram(
+    "a2a_admission_wait_seconds", "Time tasks waited for a running slot", ["class"]
+)
+ADMISSION_SHED = Counter("a2a_admission_shed", "Tasks rejected because their class queue was full", ["class"])
+
+LLM_TTFT = Histogram("llm_time_to_first_token_seconds", "LLM time to first streamed token")
+LLM_TOKEN_RATE = Histogram(
+    "llm_tokens_per_second", "Streamed chunks per second after the first", buckets=RATE_BUCKETS
+)
+LLM_CALL_DURATION = Histogram("llm_call_duration_seconds", "LLM call duration", ["mode"])
+LLM_ERRORS = Counter("llm_errors", "Failed LLM calls", ["mode"])
+LLM_GATEWAY_WAIT = Histogram(
+    "llm_gateway_wait_seconds", "Time LLM calls waited for the gateway's budgets and slots"
+)
+LLM_GATEWAY_QUEUED = Gauge("llm_gateway_queued", "LLM calls waiting in the gateway")
+LLM_RATE_LIMITED = Counter("llm_rate_limited", "LLM calls answered with 429")
+
+STAGE_DURATION = Histogram(
+    "agent_stage_duration_seconds",
+    "Duration of pipeline stages (frankfurter, fetch, extract, chunk, map, reduce)",
+    ["stage"],
+)
+
+SESSIONS = Gauge("agent_sessions", "Conversation histories held in memory")
+CACHE_ENTRIES = Gauge("agent_cache_entries", "Entries held per cache", ["cache"])
+RESPONSE_CACHE_REQUESTS = Counter(
+    "agent_response_cache_requests", "Response cache lookups by result (hit, miss, bypass)", ["result"]
+)
+CHUNK_INDEX_BYTES = Gauge("agent_chunk_index_bytes", "Approximate size of the follow-up index")
+
+LINK_READER_HOST_QUEUED = Gauge(
+    "link_reader_host_queue_depth", "Page fetches waiting for a slot, per origin", ["host"]
+)
+LINK_READER_HOST_BLOCKED = Gauge(
+    "link_reader_host_blocked_seconds", "Time left on an origin's Retry-After deferral", ["host"]
+)
+LINK_READER_HOST_DEFERRALS = Counter(
+    "link_reader_host_deferrals", "Throttled responses (429/503) that held back an origin", ["host"]
+)
+
+
+class InstrumentedChatModel:
+    """Records TTFT, token rate and call duration around a chat model."""
+
+    def __init__(self, inner: Any):
+        self.inner = inner
+
+    async def astream(self, messages: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        first = None
+        chunks = 0
+        try:
+            async for chunk in self.inner.astream(messages, **kwargs):
+                if first is None:
+                    first = time.perf_counter()
+                    LLM_TTFT.observe(first - start)
+                chunks += 1
+                yield chunk
+        except Exception:
+            LLM_ERRORS.labels("stream").inc()
+            raise
+        end = time.perf_counter()
+        LLM_CALL_DURATION.labels("stream").observe(end - start)
+        if first is not None and chunks > 1 and end > first:
+            LLM_TOKEN_RATE.observe((chunks - 1) / (end - first))
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        with LLM_CALL_DURATION.labels("invoke").time():
+            try:
+                return await self.inner.ainvoke(messages, **kwargs)
+            except Exception:
+                LLM_ERRORS.labels("invoke").inc()
+                raise
@@ -0,0 +1,237 @@
+"""On-demand sampling profiler for a running server.
+
+While a profile runs:
+
+- a background thread samples the event loop thread's Python stack every
+  ``interval`` seconds (``sys._current_frames``) and counts collapsed stacks,
+  the input format of ``flamegraph.pl`` and speedscope;
+- a monitor task measures event-loop lag (how late a short sleep wakes up);
+- every loop callback is timed, and steps longer than ``SLOW_STEP_SECONDS``
+  are attributed to their task's coroutine.
+
+Nothing is installed outside a profile. Sampling at the default 5 ms costs one
+stack walk per sample, so it is safe to run against a live server.
+
+Served at ``GET /debug/profile?seconds=10`` behind ``ADMIN_TOKEN``, and by the
+``--profile`` server option.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from admin import admin_error
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+SLOW_STEP_SECONDS = 0.001
+MAX_PROFILE_SECONDS = 120.0
+MAX_STACK_DEPTH = 128
+
+# One profile at a time: the callback timing patch is process-wide
+_profile_lock = asyncio.Lock()
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({Path(code.co_filename).name})"
+
+
+def _collapse(frame: Any) -> str:
+    """``root;...;leaf`` for the stack ending at `frame`."""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def _describe(handle: asyncio.Handle) -> str:
+    """Coroutine behind a task step, or the plain callback name."""
+    callback = handle._callback  # type: ignore[attr-defined]
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+@dataclass
+class Profile:
+    """Result of one profiling run."""
+
+    seconds: float
+    interval: float
+    stacks: Counter[str] = field(default_factory=Counter)
+    lags: list[float] = field(default_factory=list)
+    # coroutine -> [slow steps, total seconds, max seconds]
+    slow_steps: dict[str, list[float]] = field(default_factory=dict)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one ``frames count`` line each."""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def summary(self, top: int = 10) -> dict[str, Any]:
+        """Loop lag, slowest coroutine steps and hottest leaf frames."""
+        leaves: Counter[str] = Counter()
+        for stack, n in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        samples = self.samples or 1
+        slowest = sorted(self.slow_steps.items(), key=lambda kv: kv[1][2], reverse=True)[:top]
+        return {
+            "seconds": self.seconds,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "loop_lag_ms": {
+                "p50": round(_percentile(self.lags, 0.5) * 1000, 3),
+                "p99": round(_percentile(self.lags, 0.99) * 1000, 3),
+                "max": round(max(self.lags, default=0.0) * 1000, 3),
+            },
+            "slowest_coroutines": [
+                {
+                    "coroutine": name,
+                    "slow_steps": int(count),
+                    "total_ms": round(total * 1000, 3),
+                    "max_ms": round(worst * 1000, 3),
+                }
+                for name, (count, total, worst) in slowest
+            ],
+            "hot_frames": [
+                {"frame": leaf, "percent": round(100 * n / samples, 1)} for leaf, n in leaves.most_common(top)
+            ],
+        }
+
+
+class _StackSampler(threading.Thread):
+    """Counts collapsed stacks of one thread until stopped."""
+
+    def __init__(self, thread_id: int, interval: float, profile: Profile):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.profile = profile
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.profile.stacks[_collapse(frame)] += 1
+            del frame
+
+
+async def _watch_lag(interval: float, profile: Profile) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        profile.lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+def _timed_run(profile: Profile, original: Any) -> Any:
+    def _run(handle: asyncio.Handle) -> None:
+        start = time.perf_counter()
+        original(handle)
+        elapsed = time.perf_counter() - start
+        if elapsed >= SLOW_STEP_SECONDS:
+            stats = profile.slow_steps.setdefault(_describe(handle), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+
+    return _run
+
+
+async def profile(seconds: float, interval: float = DEFAULT_INTERVAL) -> Profile:
+    """Profile the running event loop's thread for `seconds`.
+
+    Raises:
+        RuntimeError: Another profile is already running
+    """
+    if _profile_lock.locked():
+        raise RuntimeError("A profile is already running")
+    async with _profile_lock:
+        result = Profile(seconds=seconds, interval=interval)
+        sampler = _StackSampler(threading.get_ident(), interval, result)
+        original = asyncio.Handle._run
+        asyncio.Handle._run = _timed_run(result, original)  # type: ignore[method-assign]
+        lag_task = asyncio.create_task(_watch_lag(max(interval, 0.01), result))
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stopped.set()
+            lag_task.cancel()
+            asyncio.Handle._run = original  # type: ignore[method-assign]
+            await asyncio.to_thread(sampler.join)
+        return result
+
+
+async def profile_endpoint(request: Request) -> Response:
+    """``GET /debug/profile`` handler (``Authorization: Bearer $ADMIN_TOKEN``).
+
+    Query parameters: ``seconds`` (default 10), ``interval_ms`` (default 5)
+    and ``format`` (``json`` summary with the stacks inline, or ``collapsed``
+    for a flamegraph input file).
+    """
+    if (error := admin_error(request)) is not None:
+        return error
+    try:
+        seconds = float(request.query_params.get("seconds", "10"))
+        interval = float(request.query_params.get("interval_ms", "5")) / 1000
+    except ValueError:
+        return JSONResponse({"error": "seconds and interval_ms must be numbers"}, status_code=400)
+    if not 0 < seconds <= MAX_PROFILE_SECONDS or interval < 0.001:
+        return JSONResponse(
+            {"error": f"seconds must be in (0, {MAX_PROFILE_SECONDS:g}] and interval_ms >= 1"}, status_code=400
+        )
+    try:
+        result = await profile(seconds, interval)
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    if request.query_params.get("format") == "collapsed":
+        return PlainTextResponse(
+            result.collapsed(),
+            headers={"Content-Disposition": 'attachment; filename="profile.folded"'},
+        )
+    return JSONResponse({**result.summary(), "collapsed": result.collapsed()})
+
+
+async def _profile_to_file(seconds: float, path: Path) -> None:
+    result = await profile(seconds)
+    path.write_text(result.collapsed())
+    logger.info("Profile written to %s: %s", path, json.dumps(result.summary()))
+
+
+def profile_lifespan(seconds: float, path: str | Path) -> Callable[[Any], Any]:
+    """Starlette lifespan profiling the first `seconds` after startup into `path`."""
+
+    @asynccontextmanager
+    async def lifespan(app: Any) -> AsyncIterator[None]:
+        task = asyncio.create_task(_profile_to_file(seconds, Path(path)))
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    return lifespan
@@ -0,0 +1,124 @@
+"""Exact-match cache of chat responses.
+
+Many chat requests repeat: the same first message in a fresh session, the
+examples from the agent card. A cached response answers them without an LLM
+call. The key is a hash of the assembled prompt (system prompt, history and
+input), the model settings and the call mode, so a different conversation,
+deployment or temperature never shares an entry. Streamed responses are
+stored as their chunks and a hit replays them through the agent's usual
+streaming loop, so clients see the same partials as for a live answer;
+``invoke`` answers are one chunk and keep entries of their own.
+
+Off unless ``RESPONSE_CACHE_SIZE`` is set. Models sampling above
+``RESPONSE_CACHE_MAX_TEMPERATURE`` (0 by default: only deterministic models
+are cached, so the Azure deployment pinned at 1.0 bypasses unless it is
+raised) skip the cache, as do requests whose message metadata sets
+``"response_cache": false``. Lookups are counted in
+``agent_response_cache_requests_total{result="hit|miss|bypass"}``.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from metrics import RESPONSE_CACHE_REQUESTS
+
+
+def model_settings(llm: Any) -> dict[str, Any]:
+    """Settings that shape a model's output (wrappers with ``.inner`` are unwrapped)."""
+    while hasattr(llm, "inner"):
+        llm = llm.inner
+    settings: dict[str, Any] = {"model": type(llm).__name__}
+    for attr in ("deployment_name", "model_name", "temperature", "max_tokens"):
+        value = getattr(llm, attr, None)
+        if value is not None:
+            settings[attr] = value
+    # FakeChatModel: output is a function of its config
+    config = getattr(llm, "config", None)
+    if dataclasses.is_dataclass(config):
+        settings.update(dataclasses.asdict(config))
+    return settings
+
+
+async def replay(chunks: Sequence[str]) -> AsyncIterator[AIMessageChunk]:
+    """A cached response as the chunks ``astream`` yielded."""
+    for text in chunks:
+        yield AIMessageChunk(content=text)
+
+
+class ResponseCache:
+    """Prompt hash -> streamed chunks, LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 0, ttl: float = 600.0, max_temperature: float = 0.0):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Responses kept, least recently used dropped first (0 disables the cache)
+            ttl: Seconds a response is reused
+            max_temperature: Models sampling hotter than this are not cached
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self._entries: OrderedDict[str, tuple[float, tuple[str, ...]]] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """From ``RESPONSE_CACHE_SIZE``, ``RESPONSE_CACHE_TTL`` and ``RESPONSE_CACHE_MAX_TEMPERATURE``."""
+        return cls(
+            max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "0")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "600")),
+            max_temperature=float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0")),
+        )
+
+    def key(
+        self,
+        messages: Sequence[BaseMessage],
+        settings: dict[str, Any],
+        bypass: bool = False,
+        mode: str = "stream",
+    ) -> str | None:
+        """Cache key of a prompt, or None if this call must not use the cache.
+
+        `mode` ("stream" or "invoke") keeps whole answers from being replayed
+        as a single streamed chunk.
+        """
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return None
+        if bypass or (settings.get("temperature") or 0.0) > self.max_temperature:
+            RESPONSE_CACHE_REQUESTS.labels("bypass").inc()
+            return None
+        prompt = [mode, settings, [(m.type, m.content) for m in messages]]
+        return hashlib.sha256(json.dumps(prompt, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str | None) -> tuple[str, ...] | None:
+        """The cached chunks for `key`, if any and not expired."""
+        if key is None:
+            return None
+        item = self._entries.get(key)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self._entries[key]
+            RESPONSE_CACHE_REQUESTS.labels("miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        RESPONSE_CACHE_REQUESTS.labels("hit").inc()
+        return item[1]
+
+    def put(self, key: str | None, chunks: Sequence[str]) -> None:
+        """Store a complete response under `key`."""
+        if key is None or not chunks:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, tuple(chunks))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test script for admission control and priority scheduling."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from admission import AdmissionController, Overloaded, parse_pairs
+from agent_executor import TestAgentExecutor
+
+
+async def hold(controller: AdmissionController, task_class: str, seconds: float, order: list[str]) -> float:
+    """Run a task of `task_class` for `seconds`; returns its queueing delay."""
+    queued = time.perf_counter()
+    async with controller.slot(task_class):
+        waited = time.perf_counter() - queued
+        order.append(task_class)
+        await asyncio.sleep(seconds)
+    return waited
+
+
+async def check_priority():
+    controller = AdmissionController(capacity=2)
+    order: list[str] = []
+    running = [asyncio.create_task(hold(controller, "summarize", 0.05, order)) for _ in range(2)]
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.create_task(hold(controller, "bulk", 0, order)),
+        asyncio.create_task(hold(controller, "summarize", 0, order)),
+        asyncio.create_task(hold(controller, "fast", 0, order)),
+    ]
+    await asyncio.sleep(0)
+    assert controller.stats()["summarize"]["running"] == 2
+    await asyncio.gather(*running, *queued)
+    assert order[2:] == ["fast", "summarize", "bulk"], order
+    print("✓ freed slots go to the highest priority class first")
+
+
+async def check_fast_path_under_load():
+    controller = AdmissionController(limits={"summarize": 4}, max_queues={"summarize": 100})
+    order: list[str] = []
+    load = [asyncio.create_task(hold(controller, "summarize", 0.2, order)) for _ in range(50)]
+    await asyncio.sleep(0.01)
+    assert controller.stats()["summarize"] == {
+        "running": 4, "queued": 46, "limit": 4, "max_queue": 100, "avg_seconds": 1.0,
+    }, controller.stats()
+    waits = [await hold(controller, "fast", 0.01, order) for _ in range(10)]
+    assert max(waits) < 0.01, waits
+    for t in load:
+        t.cancel()
+    await asyncio.gather(*load, return_exceptions=True)
+    assert controller.stats()["summarize"]["running"] == 0 and controller.stats()["summarize"]["queued"] == 0
+    print(f"✓ fast path waits {max(waits) * 1000:.2f} ms max behind 50 summarizations (4 running)")
+    print("✓ cancelled tasks release their slots and queue entries")
+
+
+async def check_shedding():
+    controller = AdmissionController(limits={"bulk": 1}, max_queues={"bulk": 1})
+    order: list[str] = []
+    running = asyncio.create_task(hold(controller, "bulk", 0.05, order))
+    queued = asyncio.create_task(hold(controller, "bulk", 0, order))
+    await asyncio.sleep(0)
+    try:
+        async with controller.slot("bulk"):
+            raise AssertionError("admitted past the queue bound")
+    except Overloaded as e:
+        assert e.task_class == "bulk" and e.retry_after >= 1, e
+    await asyncio.gather(running, queued)
+    async with controller.slot("bulk"):
+        pass
+    print("✓ full class queues shed new tasks with a retry_after hint")
+
+
+def check_config_and_classes():
+    assert parse_pairs("summarize=4, bulk=1") == {"summarize": 4, "bulk": 1}
+    assert parse_pairs("") == {}
+    for bad in ("summarize", "urgent=1"):
+        try:
+            parse_pairs(bad)
+            raise AssertionError(f"accepted {bad!r}")
+        except ValueError:
+            pass
+    print("✓ ADMISSION_LIMITS/ADMISSION_QUEUES parsing")
+
+    executor = TestAgentExecutor(agent=SimpleNamespace())
+    assert executor._classify("convert 100 USD to EUR", []) == "fast"
+    assert executor._classify("Summarize https://example.com/a", []) == "summarize"
+    assert executor._classify("What is a forex spread?", []) == "chat"
+    assert executor._classify("bulk summarize https://example.com/a", ["https://example.com/a"]) == "bulk"
+    print("✓ requests classified as fast, summarize, chat or bulk")
+
+
+def test_admission():
+    """Test priority order, per-class limits, shedding and classification."""
+    print("Testing admission control...")
+    asyncio.run(check_priority())
+    asyncio.run(check_fast_path_under_load())
+    asyncio.run(check_shedding())
+    check_config_and_classes()
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_admission()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Test script for bounded event queues and their backpressure policies."""
+
+import asyncio
+
+from a2a.types import TaskArtifactUpdateEvent, TaskState, TaskStatus, TaskStatusUpdateEvent
+from a2a.utils import new_agent_text_message, new_text_artifact
+from backpressure import BoundedEventQueue, BoundedQueueManager
+from metrics import EVENT_QUEUE_HIGH_WATER, EVENTS_COALESCED
+
+
+def _status(text: str, final: bool = False) -> TaskStatusUpdateEvent:
+    return TaskStatusUpdateEvent(
+        status=TaskStatus(
+            state=TaskState.completed if final else TaskState.working,
+            message=new_agent_text_message(text, "ctx-1", "task-1"),
+        ),
+        final=final,
+        context_id="ctx-1",
+        task_id="task-1",
+    )
+
+
+def _artifact(text: str) -> TaskArtifactUpdateEvent:
+    return TaskArtifactUpdateEvent(
+        artifact=new_text_artifact(name="result", text=text),
+        context_id="ctx-1",
+        task_id="task-1",
+    )
+
+
+def _text(event) -> str:
+    if isinstance(event, TaskArtifactUpdateEvent):
+        return event.artifact.parts[0].root.text
+    return event.status.message.parts[0].root.text
+
+
+async def drain(queue: BoundedEventQueue) -> list[str]:
+    texts = []
+    while not queue.queue.empty():
+        texts.append(_text(await queue.dequeue_event()))
+        queue.task_done()
+    return texts
+
+
+async def check_coalesce():
+    queue = BoundedEventQueue(8, "coalesce")
+    for i in range(10):
+        await queue.enqueue_event(_status(f"step {i}"))
+    await queue.enqueue_event(_artifact("a"))
+    await queue.enqueue_event(_status("step 10"))
+    await queue.enqueue_event(_status("done", final=True))
+    assert queue.coalesced == 10, queue.coalesced
+    assert await drain(queue) == ["a", "step 10", "done"]
+    await asyncio.wait_for(queue.close(), 1)
+    print("✓ coalesce: a lagging consumer sees only the latest progress, artifacts and final status kept")
+
+
+async def check_drop():
+    queue = BoundedEventQueue(3, "drop")
+    for event in (_artifact("a"), _status("step 1"), _status("step 2"), _status("step 3")):
+        await queue.enqueue_event(event)
+    assert await drain(queue) == ["a", "step 2", "step 3"]
+    for text in ("a", "b", "c"):
+        await queue.enqueue_event(_artifact(text))
+    await queue.enqueue_event(_status("step 4"))
+    assert queue.coalesced == 2 and queue.queue.qsize() == 3
+    print("✓ drop: oldest waiting progress evicted when full, new progress dropped if nothing to evict")
+
+    # artifacts and the final status wait for room instead
+    final = asyncio.create_task(queue.enqueue_event(_status("done", final=True)))
+    await asyncio.sleep(0.05)
+    assert not final.done()
+    assert await drain(queue) == ["a", "b", "c"]
+    await asyncio.wait_for(final, 1)
+    assert await drain(queue) == ["done"]
+    await asyncio.wait_for(queue.close(), 1)
+    print("✓ drop: final status blocks until there is room")
+
+
+async def check_block():
+    queue = BoundedEventQueue(2, "block")
+    for i in range(2):
+        await queue.enqueue_event(_status(f"step {i}"))
+    blocked = asyncio.create_task(queue.enqueue_event(_status("step 2")))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+    await queue.dequeue_event()
+    queue.task_done()
+    await asyncio.wait_for(blocked, 1)
+    assert queue.coalesced == 0 and queue.high_water == 2
+    print("✓ block: the producer waits for the consumer")
+
+
+async def check_children_and_metrics():
+    manager = BoundedQueueManager(2, "drop")
+    parent = await manager.create_or_tap("task-1")
+    child = await manager.create_or_tap("task-1")
+    assert isinstance(child, BoundedEventQueue) and child.policy == "drop" and child.queue.maxsize == 2
+    for i in range(4):
+        await parent.enqueue_event(_status(f"step {i}"))
+    assert await drain(child) == ["step 2", "step 3"]
+    assert await drain(parent) == ["step 2", "step 3"]
+    print("✓ tapped queues inherit the size and policy")
+
+    # both queues full of artifacts: each drops the new progress event
+    before = EVENTS_COALESCED.labels("drop").value
+    await parent.enqueue_event(_artifact("a"))
+    await parent.enqueue_event(_artifact("b"))
+    await parent.enqueue_event(_status("step 4"))
+    assert EVENTS_COALESCED.labels("drop").value == before + 2
+    await drain(parent)
+    await drain(child)
+    count = EVENT_QUEUE_HIGH_WATER.labels().count
+    await asyncio.wait_for(manager.close("task-1"), 1)
+    assert EVENT_QUEUE_HIGH_WATER.labels().count == count + 2
+    print("✓ coalesced events and queue high-water marks recorded")
+
+    try:
+        BoundedQueueManager(8, "fastest")
+        raise AssertionError("unknown policy accepted")
+    except ValueError:
+        pass
+    print("✓ unknown policies rejected at startup")
+
+
+def test_backpressure():
+    """Test the block, coalesce and drop policies."""
+    print("Testing backpressure...")
+    asyncio.run(check_coalesce())
+    asyncio.run(check_drop())
+    asyncio.run(check_block())
+    asyncio.run(check_children_and_metrics())
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_backpressure()
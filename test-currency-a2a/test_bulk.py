@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Test script for bulk summarization jobs (fake LLM, fixture pages)."""
+
+import asyncio
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events.event_queue import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import (
+    DataPart,
+    InvalidParamsError,
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from a2a.utils.errors import ServerError
+from agent import TestAgent
+from agent_executor import TestAgentExecutor
+from fixture_server import FixtureTransport
+from host_scheduler import HostScheduler
+from llm_backends import FakeChatModel, FakeLLMConfig
+from web_summarizer import LinkReader
+
+URLS = [
+    "https://example.com/long-article",
+    "https://docs.example.com/product",
+    "https://forum.example.org/t/arm-build-failure",
+]
+
+
+class CollectingQueue(EventQueue):
+    """Event queue that keeps every event (nothing dequeues in this test)."""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    async def enqueue_event(self, event) -> None:
+        self.events.append(event)
+
+
+def _executor() -> TestAgentExecutor:
+    agent = TestAgent(llm=FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0)))
+    agent.link_reader = LinkReader(transport=FixtureTransport(), scheduler=HostScheduler(rate=1e9, burst=1_000_000))
+    return TestAgentExecutor(agent)
+
+
+def _context(*parts: Part) -> RequestContext:
+    message = Message(role=Role.user, message_id="m-1", context_id="ctx-1", parts=list(parts))
+    return RequestContext(request=MessageSendParams(message=message))
+
+
+async def _run(executor: TestAgentExecutor, context: RequestContext) -> CollectingQueue:
+    queue = CollectingQueue()
+    await executor.execute(context, queue)
+    return queue
+
+
+async def check_bulk_job():
+    executor = _executor()
+    queue = await _run(executor, _context(Part(root=DataPart(data={"urls": URLS + [URLS[0]]}))))
+    artifacts = [e for e in queue.events if isinstance(e, TaskArtifactUpdateEvent)]
+    assert sorted(a.artifact.name for a in artifacts) == sorted(URLS), [a.artifact.name for a in artifacts]
+    assert all(a.artifact.description == "ok" and a.artifact.parts[0].root.text for a in artifacts)
+    print(f"✓ one artifact per distinct URL ({len(artifacts)})")
+
+    final = queue.events[-1]
+    assert isinstance(final, TaskStatusUpdateEvent) and final.final
+    assert final.status.state == TaskState.completed
+    report = final.status.message.parts[0].root.text
+    assert f"{len(URLS)}/{len(URLS)} URL(s) summarized, 0 failed" in report and "URLs/min" in report, report
+    print(f"✓ final status carries the throughput: {report}")
+
+
+async def check_failures_and_text_requests():
+    executor = _executor()
+    executor.agent.summary_cache.set(URLS[1], "cached summary")
+    text = f"bulk summarize {URLS[1]} https://example.com/moved"
+    assert executor._get_bulk_urls(_context(Part(root=TextPart(text=text))), text) == [URLS[1], "https://example.com/moved"]
+    queue = await _run(executor, _context(Part(root=TextPart(text=text))))
+    artifacts = {e.artifact.name: e.artifact for e in queue.events if isinstance(e, TaskArtifactUpdateEvent)}
+    assert artifacts[URLS[1]].parts[0].root.text == "cached summary"
+    assert artifacts["https://example.com/moved"].description == "failed"
+    assert "1 failed" in queue.events[-1].status.message.parts[0].root.text
+    print("✓ text requests, cached summaries and failed pages (reported as artifacts)")
+
+
+async def check_invalid_requests():
+    executor = _executor()
+    text = "bulk pricing for https://example.com/long-article?"
+    assert executor._get_bulk_urls(_context(Part(root=TextPart(text=text))), text) == []
+    print("✓ only \"bulk summarize\" starts a bulk job from text")
+
+    urls = [URLS[0], "file:///etc/passwd", "ftp://example.com/x", "not a url", 42]
+    assert executor._get_bulk_urls(_context(Part(root=DataPart(data={"urls": urls}))), "") == [URLS[0]]
+    handler = DefaultRequestHandler(executor, InMemoryTaskStore())
+    data = DataPart(data={"urls": ["file:///etc/passwd", "javascript:alert(1)"]})
+    message = Message(role=Role.user, message_id="m-2", parts=[Part(root=data)])
+    try:
+        await handler.on_message_send(MessageSendParams(message=message))
+        raise AssertionError("bulk job without http(s) URLs accepted")
+    except ServerError as e:
+        assert isinstance(e.error, InvalidParamsError), e.error
+    print("✓ non-http(s) entries are dropped; a list without any is rejected as invalid params")
+
+
+def test_bulk():
+    """Test bulk jobs end to end through the executor, and invalid requests."""
+    print("Testing bulk summarization...")
+    asyncio.run(check_bulk_job())
+    asyncio.run(check_failures_and_text_requests())
+    asyncio.run(check_invalid_requests())
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_bulk()
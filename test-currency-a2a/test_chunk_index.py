@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Test script for the follow-up chunk index."""
+
+from agent import TestAgent
+from chunk_index import ChunkIndex
+from llm_backends import FakeChatModel, FakeLLMConfig
+from web_summarizer import Page
+
+def make_page(url: str, sections: dict[str, str]) -> Page:
+    text = "\n\n".join(f"{name}. {body}" for name, body in sections.items())
+    return Page(url=url, title=url.rsplit("/", 1)[-1], text=text, word_count=len(text.split()))
+
+def test_chunk_index():
+    """Test retrieval, its relevance floor, LRU eviction and memory accounting."""
+    print("Testing chunk index...")
+
+    filler = " ".join(f"filler{i}" for i in range(150))
+    page = make_page("https://example.com/product", {
+        "Overview": "The product is a hosted database for analytics workloads. " + filler,
+        "Pricing": "Pricing starts at 20 dollars per month per seat, with volume discounts above 50 seats. " + filler,
+        "Security": "Data is encrypted at rest and in transit, and audits are published yearly. " + filler,
+    })
+
+    # Test 1: follow-up retrieval
+    print("\n1. Testing follow-up retrieval:")
+    index = ChunkIndex(passage_chars=1200)
+    index.add("s1", page)
+    hits = index.search("s1", "what did it say about pricing?")
+    for h in hits:
+        print(f"  score={h.score:.2f} {h.passage.text[:60]}...")
+    assert hits and "Pricing starts" in hits[0].passage.text
+    assert index.search("s2", "pricing") == []  # other sessions see nothing
+    # an unrelated question sharing one word with the page gets no excerpts
+    assert index.search("s1", "How do I bake sourdough bread for our product launch party?") == []
+    assert index.search("s1", "What's the weather in Paris?") == []
+
+    # Test 2: memory accounting and LRU eviction
+    print("\n2. Testing LRU eviction:")
+    index = ChunkIndex(passage_chars=1200)
+    index.add("a", page)
+    per_page = index.nbytes
+    index = ChunkIndex(max_bytes=per_page * 2 + per_page // 2, passage_chars=1200)
+    index.add("a", page)
+    index.add("b", page)
+    index.search("a", "pricing")  # touch session a so b is least recently used
+    index.add("c", page)
+    stats = index.stats()
+    print(f"  ~{per_page} bytes/page; stats: {stats}")
+    assert stats["pages"] == 2 and stats["evictions"] == 1
+    assert index.has_session("a") and not index.has_session("b")
+
+    # Test 3: per-session page cap
+    print("\n3. Testing per-session page cap:")
+    index = ChunkIndex(max_pages_per_session=2)
+    for i in range(3):
+        index.add("s", make_page(f"https://example.com/{i}", {"Body": filler}))
+    print(f"  stats: {index.stats()}")
+    assert index.stats()["pages"] == 2
+
+    # Test 4: only relevant excerpts reach the chat prompt
+    print("\n4. Testing follow-up prompts:")
+    agent = TestAgent(llm=FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0)))
+    agent.chunk_index.add("s1", page)
+    _, related = agent._chat_messages("what did it say about pricing?", "s1")
+    messages, unrelated = agent._chat_messages("How do I bake sourdough bread for our product launch party?", "s1")
+    print(f"  related question: {related} excerpt(s); unrelated question: {unrelated}")
+    assert related == 1 and unrelated == 0 and len(messages) == 2  # system prompt and question only
+
+    print("\nChunk index test completed!")
+
+if __name__ == "__main__":
+    test_chunk_index()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test script for near-duplicate chunk elimination."""
+
+from dedup import MinHashDeduper, dedup_paragraphs
+from web_summarizer import chunk_text
+
+def test_dedup():
+    """Test the MinHash dedup pass used before the map step."""
+    print("Testing near-duplicate elimination...")
+
+    disclaimer = (
+        "This article is provided for informational purposes only and does not "
+        "constitute financial, legal or tax advice. Consult a professional."
+    )
+    quoted = (
+        "> I think the new release broke the build on ARM machines because the "
+        "compiler flags changed between versions two and three of the toolchain."
+    )
+    paragraphs = [
+        "Release notes",
+        disclaimer,
+        quoted,
+        "The team confirmed the regression and shipped a patch the following week, "
+        "restoring the previous compiler flags for all ARM targets.",
+        quoted + " Thanks!",  # near-duplicate quote
+        disclaimer,
+        "Release notes",
+    ]
+    text = "\n\n".join(paragraphs)
+
+    # Test 1: paragraph-level dedup
+    print("\n1. Testing paragraph dedup:")
+    deduped, stats = dedup_paragraphs(text)
+    print(f"  {len(paragraphs)} paragraphs -> kept {stats.kept}, dropped {stats.dropped} (~{stats.dropped_tokens} tokens)")
+    assert stats.dropped == 2, stats
+    assert deduped.count("Release notes") == 2  # short lines are never dropped
+
+    # Test 2: chunk-level dedup on syndicated content
+    print("\n2. Testing chunk dedup:")
+    body = " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(400))
+    chunks = chunk_text(body, max_chars=2000)
+    chunks.append(chunks[1] + " Originally published elsewhere.")  # syndicated copy
+    kept, stats = MinHashDeduper().filter(chunks)
+    print(f"  {len(chunks)} chunks -> kept {stats.kept}, dropped {stats.dropped} (~{stats.dropped_tokens} tokens)")
+    assert stats.dropped > 0
+
+    # Test 3: distinct text is untouched
+    print("\n3. Testing distinct text is kept:")
+    distinct = [f"Paragraph {i} describes a completely different subject number {i * 13} in detail." for i in range(20)]
+    kept, stats = MinHashDeduper().filter(distinct)
+    print(f"  {len(distinct)} paragraphs -> kept {stats.kept}")
+    assert stats.dropped == 0
+
+    print("\nDedup test completed!")
+
+if __name__ == "__main__":
+    test_dedup()
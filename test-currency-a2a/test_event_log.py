@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Test script for the replayable per-task event log."""
+
+import asyncio
+import time
+
+from a2a.server.agent_execution import AgentExecutor
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import InvalidParamsError, TaskIdParams, TaskState, TaskStatus, TaskStatusUpdateEvent
+from a2a.utils import new_agent_text_message
+from a2a.utils.errors import ServerError
+from event_log import EventLog, ResumableRequestHandler
+
+
+def _update(text: str, final: bool = False) -> TaskStatusUpdateEvent:
+    return TaskStatusUpdateEvent(
+        status=TaskStatus(
+            state=TaskState.completed if final else TaskState.working,
+            message=new_agent_text_message(text, "ctx-1", "task-1"),
+        ),
+        final=final,
+        context_id="ctx-1",
+        task_id="task-1",
+    )
+
+
+class NoopExecutor(AgentExecutor):
+    async def execute(self, context, event_queue):
+        pass
+
+    async def cancel(self, context, event_queue):
+        pass
+
+
+async def check_resubscribe():
+    log = EventLog(max_events=100, max_total=1000, ttl=60)
+    handler = ResumableRequestHandler(NoopExecutor(), InMemoryTaskStore(), event_log=log)
+    log.start("task-1")
+    for i in range(5):
+        log.append("task-1", _update(f"token {i}"))
+    assert [e.metadata["seq"] for _, e in log.get("task-1").events] == [0, 1, 2, 3, 4]
+
+    async def produce():
+        for i in range(5, 8):
+            await asyncio.sleep(0.01)
+            log.append("task-1", _update(f"token {i}"))
+        log.append("task-1", _update("done", final=True))
+        log.finish("task-1")
+
+    async def resubscribe(offset):
+        params = TaskIdParams(id="task-1", metadata={} if offset is None else {"offset": offset})
+        return [e.metadata["seq"] async for e in handler.on_resubscribe_to_task(params)]
+
+    producer = asyncio.create_task(produce())
+    replayed, live = await asyncio.gather(resubscribe(2), resubscribe(None))
+    await producer
+    assert replayed == [3, 4, 5, 6, 7, 8], replayed
+    assert live == [5, 6, 7, 8], live
+    print("✓ resubscribe replays after the offset, then follows live events to the end")
+
+    assert await resubscribe(6) == [7, 8]
+    print("✓ finished task replays its tail within the TTL")
+
+    try:
+        await resubscribe("latest")
+        raise AssertionError("bad offset accepted")
+    except ServerError as e:
+        assert isinstance(e.error, InvalidParamsError), e.error
+    print("✓ a non-numeric offset is rejected as invalid params")
+
+
+async def check_running_logs_are_trimmed():
+    log = EventLog(max_events=100, max_total=6, ttl=60)
+    log.start("a")
+    follower_done = False
+
+    async def follow():
+        nonlocal follower_done
+        seqs = [seq async for seq, _ in log.get("a").follow(-1)]
+        follower_done = True
+        return seqs
+
+    follower = asyncio.create_task(follow())
+    for i in range(4):
+        log.append("a", _update(str(i)))
+    log.start("b")
+    for i in range(4):
+        log.append("b", _update(str(i)))
+        await asyncio.sleep(0)
+    assert log.total == 6 and log.get("a") is not None and not follower_done
+    assert log.append("a", _update("4")) == 4
+    assert [seq for seq, _ in log.get("a").events][-1] == 4 and log.total == 6
+    log.append("a", _update("done", final=True))
+    log.finish("a")
+    assert (await follower)[-2:] == [4, 5]
+    print("✓ total cap trims running logs; their followers and seq carry on")
+
+
+async def check_long_follow():
+    log = EventLog(max_events=20_000, max_total=100_000)
+    log.start("long")
+    follower = asyncio.create_task(_collect(log.get("long").follow(-1)))
+    started = time.perf_counter()
+    for i in range(20_000):
+        log.append("long", _update(str(i)))
+        await asyncio.sleep(0)  # the follower wakes for every event
+    log.finish("long")
+    seqs = await follower
+    elapsed = time.perf_counter() - started
+    assert seqs == list(range(20_000)) and elapsed < 5, elapsed  # O(n²) took ~10 s
+    print(f"✓ a follower of a 20k-event stream gets each event once ({elapsed:.2f}s)")
+
+    log = EventLog(max_events=3)
+    log.start("wrap")
+    for i in range(5):
+        log.append("wrap", _update(str(i)))
+    follow = log.get("wrap").follow(0)
+    assert (await anext(follow))[0] == 2  # 1 was dropped by the ring buffer
+    for i in range(5, 8):
+        log.append("wrap", _update(str(i)))
+    log.finish("wrap")
+    assert [seq async for seq, _ in follow] == [5, 6, 7]
+    print("✓ a follower behind the ring buffer skips the gap")
+
+
+async def _collect(follow) -> list[int]:
+    return [seq async for seq, _ in follow]
+
+
+def check_limits():
+    log = EventLog(max_events=3, max_total=7, ttl=0.05)
+    log.start("a")
+    for i in range(5):
+        log.append("a", _update(str(i)))
+    assert [seq for seq, _ in log.get("a").events] == [2, 3, 4] and log.total == 3
+    print("✓ per-task ring buffer keeps the newest events")
+
+    log.finish("a")
+    log.start("b")
+    for i in range(3):
+        log.append("b", _update(str(i)))
+    log.start("c")
+    for i in range(3):
+        log.append("c", _update(str(i)))
+    assert log.get("a") is None and log.total == 6, (len(log), log.total)
+    print("✓ total cap evicts finished logs first")
+
+    log.finish("b")
+    time.sleep(0.06)
+    assert log.get("b") is None and log.get("c") is not None
+    print("✓ finished logs expire after the TTL")
+
+
+def test_event_log():
+    """Test replay, live follow, caps and TTL."""
+    print("Testing event log...")
+    asyncio.run(check_resubscribe())
+    asyncio.run(check_running_logs_are_trimmed())
+    asyncio.run(check_long_follow())
+    check_limits()
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_event_log()
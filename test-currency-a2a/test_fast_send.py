@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Test script for the blocking message/send fast path."""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+from a2a.server.agent_execution import AgentExecutor
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import (
+    Message,
+    MessageSendConfiguration,
+    MessageSendParams,
+    Part,
+    PushNotificationConfig,
+    Role,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from a2a.utils import new_task
+from agent import TestAgent
+from agent_executor import TestAgentExecutor
+from event_log import EventLog
+from fast_send import FastSendRequestHandler, is_blocking_send
+from idempotency import IdempotencyCache
+from llm_backends import FakeChatModel, FakeLLMConfig
+from metrics import TASK_EVENTS
+
+
+class ModeExecutor(AgentExecutor):
+    """Records whether each request was marked as a blocking send."""
+
+    def __init__(self):
+        self.event_log = EventLog()
+        self.modes: list[bool] = []
+
+    async def execute(self, context, event_queue):
+        self.modes.append(is_blocking_send(context))
+        task = new_task(context.message)
+        await event_queue.enqueue_event(task)
+        await event_queue.enqueue_event(
+            TaskStatusUpdateEvent(
+                status=TaskStatus(state=TaskState.completed),
+                final=True,
+                context_id=task.context_id,
+                task_id=task.id,
+            )
+        )
+
+    async def cancel(self, context, event_queue):
+        pass
+
+
+def _params(text: str, configuration: MessageSendConfiguration | None = None) -> MessageSendParams:
+    return MessageSendParams(
+        message=Message(role=Role.user, message_id=os.urandom(4).hex(), parts=[Part(root=TextPart(text=text))]),
+        configuration=configuration,
+    )
+
+
+def _handler(executor) -> FastSendRequestHandler:
+    return FastSendRequestHandler(
+        executor, InMemoryTaskStore(), event_log=executor.event_log, idempotency=IdempotencyCache()
+    )
+
+
+async def check_marking():
+    executor = ModeExecutor()
+    handler = _handler(executor)
+    await handler.on_message_send(_params("hi"))
+    await handler.on_message_send(_params("hi", MessageSendConfiguration(blocking=True)))
+    await handler.on_message_send(_params("hi", MessageSendConfiguration(blocking=False)))
+    await asyncio.sleep(0.05)
+    push = PushNotificationConfig(url="http://localhost:1/hook")
+    await handler.on_message_send(_params("hi", MessageSendConfiguration(push_notification_config=push)))
+    [e async for e in handler.on_message_send_stream(_params("hi"))]
+    assert executor.modes == [True, True, False, False, False], executor.modes
+    print("✓ only blocking sends without a push config take the fast path")
+
+
+def _events() -> dict[str, float]:
+    return {name: TASK_EVENTS.labels(name).value for name in ("TaskStatusUpdateEvent", "Task")}
+
+
+async def check_answers():
+    executor = TestAgentExecutor(TestAgent(llm=FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0))))
+    handler = _handler(executor)
+    before = _events()
+    task = await handler.on_message_send(_params("What is a forex spread?"))
+    assert task.status.state == TaskState.completed and task.status.message.parts[0].root.text
+    assert _events()["TaskStatusUpdateEvent"] == before["TaskStatusUpdateEvent"] + 1
+    assert [type(e).__name__ for _, e in executor.event_log.get(task.id).events] == ["Task", "TaskStatusUpdateEvent"]
+    print("✓ a blocking chat send is answered with the task and one final status")
+
+    streamed = [e async for e in handler.on_message_send_stream(_params("What is a forex spread?"))]
+    assert streamed[-1].status.message.parts[0].root.text == task.status.message.parts[0].root.text
+    assert len(streamed) > 2
+    print("✓ the fast path returns the same answer as the stream")
+
+
+async def check_other_skills():
+    async def stream(query, session_id, latency=None, cache=True):
+        yield {"content": "Fetching rates...", "is_task_complete": False, "require_user_input": False}
+        yield {"content": "100 USD = 92 EUR", "is_task_complete": True, "require_user_input": False, "is_final": True}
+
+    async def invoke(*args, **kwargs):
+        raise AssertionError("conversion answered by invoke")
+
+    executor = TestAgentExecutor(agent=SimpleNamespace(stream=stream, invoke=invoke))
+    task = await _handler(executor).on_message_send(_params("Convert 100 USD to EUR"))
+    assert task.status.message.parts[0].root.text == "100 USD = 92 EUR"
+    assert len(executor.event_log.get(task.id).events) == 3
+    print("✓ conversions and summaries keep their streaming path")
+
+
+def test_fast_send():
+    """Test which requests take the fast path and what they return."""
+    print("Testing blocking send fast path...")
+    asyncio.run(check_marking())
+    asyncio.run(check_answers())
+    asyncio.run(check_other_skills())
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_fast_send()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test script for the Frankfurter / web page fixture server (in-process)."""
+
+import asyncio
+from decimal import Decimal
+
+import httpx
+from currency_converter import CurrencyConverter
+from fixture_server import FixtureData, build_app
+from web_summarizer import LinkReader
+
+BASE = "http://fixtures.test"
+
+async def test_fixture_server():
+    """Test the Frankfurter endpoints and page serving against the fixtures."""
+    print("Testing fixture server...")
+    data = FixtureData()
+    transport = httpx.ASGITransport(app=build_app(data, page_bytes=0))
+
+    async with httpx.AsyncClient(transport=transport, base_url=BASE) as client:
+        latest = (await client.get("/v1/latest", params={"symbols": "USD"})).json()
+        assert latest["date"] == data.dates[-1], latest
+        print(f"✓ latest: {latest}")
+
+        # weekend dates fall back to the previous business day
+        weekend = (await client.get("/v1/2024-01-13")).json()
+        assert weekend["date"] == "2024-01-12", weekend["date"]
+
+        cross = (await client.get("/v1/latest", params={"base": "USD", "symbols": "EUR"})).json()
+        assert abs(cross["rates"]["EUR"] - 1 / latest["rates"]["USD"]) < 1e-4, cross
+        print(f"✓ cross rate: {cross}")
+
+        # a range starting on a weekend includes the previous business day
+        series = (await client.get("/v1/2024-01-13..2024-01-16", params={"symbols": "GBP"})).json()
+        assert list(series["rates"]) == ["2024-01-12", "2024-01-15", "2024-01-16"], series
+        assert (await client.get("/v1/1999-01-04")).status_code == 404
+        assert (await client.get("/v1/latest", params={"base": "XXX"})).status_code == 404
+        for amount in ("abc", "nan"):
+            bad = await client.get("/v1/2024-01-12", params={"amount": amount})
+            assert bad.status_code == 400 and "amount" in bad.json()["message"], bad.text
+        print("✓ historical, range and error responses")
+
+        padded = await client.get("/pages", params={"url": "https://example.com/long-article", "bytes": 50_000})
+        assert len(padded.content) >= 50_000
+        one = (await client.get("/pages", params={"url": "https://unknown.test/a"})).text
+        two = (await client.get("/pages", params={"url": "https://unknown.test/a"})).text
+        assert one == two, "synthetic pages must be deterministic"
+        print(f"✓ pages: padded to {len(padded.content)} bytes, synthetic pages stable")
+
+    converter = CurrencyConverter(httpx.AsyncClient(transport=transport), base_url=f"{BASE}/v1")
+    result = await converter.convert(Decimal("100"), "EUR", "USD", "2024-01-19")
+    assert result.rate == Decimal(str(data.rates["2024-01-19"]["USD"])), result
+    print(f"✓ CurrencyConverter: {result.amount} {result.to_ccy} @ {result.rate}")
+
+    reader = LinkReader(httpx.AsyncClient(transport=transport), fixture_base=BASE)
+    page = await reader.fetch_and_extract("https://docs.example.com/product")
+    assert page.url == "https://docs.example.com/product" and "Pricing" in page.text, page.title
+    print(f"✓ LinkReader: {page.title!r}, {page.word_count} words")
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    asyncio.run(test_fixture_server())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Test script for the compact conversation history."""
+
+import sys
+
+from history import History
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+
+def test_history():
+    """Test prompt assembly and the per-session footprint."""
+    print("Testing conversation history...")
+
+    system = SystemMessage(content="You are a helpful AI assistant.")
+    history = History()
+    history.add_turn("convert 100 usd to eur", "100 USD = 91.83 EUR")
+    history.add_turn("and to gbp?", "100 USD = 78.50 GBP")
+    assert len(history) == 4
+
+    context = SystemMessage(content="Excerpts: ...")
+    messages = history.to_messages(system, context, HumanMessage(content="thanks"))
+    assert [type(m) for m in messages] == [
+        SystemMessage, HumanMessage, AIMessage, HumanMessage, AIMessage, SystemMessage, HumanMessage,
+    ]
+    assert messages[0] is system
+    assert [m.content for m in messages[1:5]] == history.texts()
+    print("✓ prompt is system prompt, alternating turns, then the new messages")
+
+    restored = History(history.texts())
+    assert [m.content for m in restored] == history.texts()
+    print("✓ history round-trips through its texts")
+
+    compact = sys.getsizeof(history) + sys.getsizeof(history._texts)
+    as_messages = sum(sys.getsizeof(m) + sys.getsizeof(m.__dict__) for m in messages[:5])
+    assert compact < as_messages / 4, (compact, as_messages)
+    print(f"✓ container overhead {compact} bytes vs {as_messages} as message objects")
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_history()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test script for the per-host politeness scheduler (offline, mock transport)."""
+
+import asyncio
+import time
+
+import httpx
+from host_scheduler import HostScheduler
+from metrics import LINK_READER_HOST_BLOCKED, LINK_READER_HOST_DEFERRALS, REGISTRY
+from web_summarizer import MAX_RETRY_AFTER, LinkReader
+
+HTML = "<html><title>{host}</title><body><article><p>{text}</p></article></body></html>"
+
+async def test_host_scheduler():
+    """Test per-host caps, fairness and Retry-After handling."""
+    print("Testing per-host politeness scheduler...")
+
+    in_flight: dict[str, int] = {}
+    peak: dict[str, int] = {}
+    throttled_once: set[str] = set()
+    finished: dict[str, float] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host == "slow.test" and request.url.path not in throttled_once:
+            throttled_once.add(request.url.path)
+            return httpx.Response(429, headers={"Retry-After": "1"})
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.05)
+        in_flight[host] -= 1
+        text = " ".join(f"word{i}" for i in range(80))
+        return httpx.Response(200, html=HTML.format(host=host, text=text))
+
+    scheduler = HostScheduler(rate=50.0, burst=50, per_host=2, max_total=4)
+    reader = LinkReader(httpx.AsyncClient(transport=httpx.MockTransport(handler)), scheduler)
+
+    async def fetch(url: str) -> None:
+        await reader.fetch_and_extract(url)
+        finished[url] = time.monotonic()
+
+    deferrals = LINK_READER_HOST_DEFERRALS.labels("https://slow.test").value
+    start = time.monotonic()
+    urls = [f"https://slow.test/{i}" for i in range(3)] + [f"https://fast{h}.test/{i}" for h in range(3) for i in range(4)]
+    await asyncio.gather(*(fetch(u) for u in urls))
+
+    # Test 1: concurrency caps per origin
+    print("\n1. Peak concurrent requests per host:")
+    for host, n in sorted(peak.items()):
+        print(f"  {host}: {n}")
+    assert all(n <= 2 for n in peak.values())
+
+    # Test 2: other hosts are not stalled by a throttled host
+    print("\n2. Completion times:")
+    fast_done = max(t for u, t in finished.items() if "fast" in u) - start
+    slow_done = max(t for u, t in finished.items() if "slow" in u) - start
+    print(f"  fast hosts done after {fast_done:.2f}s, throttled host after {slow_done:.2f}s")
+    assert fast_done < 1.0 <= slow_done
+
+    # Test 3: metrics
+    print("\n3. Per-host stats:")
+    for origin, stats in scheduler.stats().items():
+        print(f"  {origin}: {stats}")
+    assert scheduler.stats()["https://slow.test"]["throttled"] == 3
+    assert LINK_READER_HOST_DEFERRALS.labels("https://slow.test").value == deferrals + 3
+    assert 'link_reader_host_queue_depth{host="https://fast0.test"} 0' in REGISTRY.render()
+
+    # Test 4: a Retry-After past the cap fails the request and defers the host for the cap
+    def gone_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, headers={"Retry-After": "3600"})
+
+    scheduler = HostScheduler(rate=50.0, burst=50)
+    reader = LinkReader(httpx.AsyncClient(transport=httpx.MockTransport(gone_handler)), scheduler)
+    try:
+        await reader.fetch_and_extract("https://busy.test/a")
+        raise AssertionError("fetch succeeded")
+    except httpx.HTTPStatusError:
+        pass
+    stats = scheduler.stats()["https://busy.test"]
+    print(f"\n4. Long Retry-After: {stats}")
+    assert stats["throttled"] == 1 and 29 < stats["blocked_for"] <= MAX_RETRY_AFTER
+    assert 29 < LINK_READER_HOST_BLOCKED.labels("https://busy.test").get() <= MAX_RETRY_AFTER
+
+    print("\nHost scheduler test completed!")
+
+if __name__ == "__main__":
+    asyncio.run(test_host_scheduler())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Test script for idempotent message handling keyed on messageId."""
+
+import asyncio
+
+from a2a.server.agent_execution import AgentExecutor
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import (
+    Message,
+    MessageSendConfiguration,
+    MessageSendParams,
+    Part,
+    Role,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from a2a.utils import new_agent_text_message, new_task
+from event_log import EventLog
+from idempotency import IdempotencyCache, IdempotentRequestHandler
+from metrics import DUPLICATE_MESSAGES
+
+
+class CountingExecutor(AgentExecutor):
+    """Answers after a delay, logging events like TestAgentExecutor."""
+
+    def __init__(self, seconds: float = 0.1):
+        self.seconds = seconds
+        self.runs = 0
+        self.event_log = EventLog()
+
+    async def execute(self, context, event_queue):
+        self.runs += 1
+
+        async def emit(event):
+            self.event_log.append(context.task_id, event)
+            await event_queue.enqueue_event(event)
+
+        self.event_log.start(context.task_id)
+        try:
+            task = context.current_task or new_task(context.message)
+            await emit(task)
+            for state, final, text in (
+                (TaskState.working, False, "thinking"),
+                (TaskState.completed, True, f"answer #{self.runs}"),
+            ):
+                await asyncio.sleep(self.seconds / 2)
+                await emit(
+                    TaskStatusUpdateEvent(
+                        status=TaskStatus(state=state, message=new_agent_text_message(text, task.context_id, task.id)),
+                        final=final,
+                        context_id=task.context_id,
+                        task_id=task.id,
+                    )
+                )
+        finally:
+            self.event_log.finish(context.task_id)
+
+    async def cancel(self, context, event_queue):
+        pass
+
+
+def _params(message_id: str, blocking: bool = True) -> MessageSendParams:
+    return MessageSendParams(
+        message=Message(
+            role=Role.user,
+            message_id=message_id,
+            context_id="ctx-1",
+            parts=[Part(root=TextPart(text="What is 2 + 2?"))],
+        ),
+        configuration=MessageSendConfiguration(blocking=blocking),
+    )
+
+
+def _answer(task) -> str:
+    return task.status.message.parts[0].root.text
+
+
+def _handler(executor: CountingExecutor, ttl: float = 60) -> IdempotentRequestHandler:
+    return IdempotentRequestHandler(
+        executor, InMemoryTaskStore(), event_log=executor.event_log, idempotency=IdempotencyCache(ttl=ttl)
+    )
+
+
+async def check_send():
+    executor = CountingExecutor()
+    handler = _handler(executor)
+    in_flight = DUPLICATE_MESSAGES.labels("in_flight").value
+    first, retry = await asyncio.gather(
+        handler.on_message_send(_params("m-1")),
+        handler.on_message_send(_params("m-1")),
+    )
+    assert executor.runs == 1, executor.runs
+    assert first.id == retry.id and retry.status.state == TaskState.completed
+    assert _answer(retry) == "answer #1"
+    assert DUPLICATE_MESSAGES.labels("in_flight").value == in_flight + 1
+    print("✓ a retry while the task runs attaches to it and gets the same result")
+
+    completed = DUPLICATE_MESSAGES.labels("completed").value
+    again = await handler.on_message_send(_params("m-1"))
+    assert executor.runs == 1 and again.id == first.id and _answer(again) == "answer #1"
+    assert DUPLICATE_MESSAGES.labels("completed").value == completed + 1
+    print("✓ a retry after completion returns the stored result")
+
+    other = await handler.on_message_send(_params("m-2"))
+    assert executor.runs == 2 and other.id != first.id
+    print("✓ a new messageId runs the agent")
+
+    running = asyncio.create_task(handler.on_message_send(_params("m-3")))
+    await asyncio.sleep(0.03)
+    snapshot = await handler.on_message_send(_params("m-3", blocking=False))
+    assert snapshot.status.state in (TaskState.submitted, TaskState.working), snapshot.status.state
+    assert (await running).status.state == TaskState.completed and executor.runs == 3
+    print("✓ a non-blocking retry returns the task's current state")
+
+
+async def check_stream():
+    executor = CountingExecutor()
+    handler = _handler(executor)
+    original = [e async for e in handler.on_message_send_stream(_params("s-1"))]
+    replayed = [e async for e in handler.on_message_send_stream(_params("s-1"))]
+    assert executor.runs == 1
+    assert [type(e).__name__ for e in replayed] == [type(e).__name__ for e in original]
+    assert replayed[0].status.state == TaskState.submitted, replayed[0].status
+    assert _answer(replayed[-1]) == "answer #1"
+    print("✓ a retried stream replays the original events (task as first sent)")
+
+
+async def check_expiry():
+    executor = CountingExecutor(seconds=0.02)
+    handler = _handler(executor, ttl=0.05)
+    await handler.on_message_send(_params("m-1"))
+    await asyncio.sleep(0.1)
+    await handler.on_message_send(_params("m-1"))
+    assert executor.runs == 2
+    handler = _handler(executor, ttl=0)
+    await handler.on_message_send(_params("m-1"))
+    await handler.on_message_send(_params("m-1"))
+    assert executor.runs == 4 and len(handler.idempotency) == 0
+    print("✓ entries expire after IDEMPOTENCY_TTL; 0 disables the cache")
+
+
+def test_idempotency():
+    """Test duplicate sends and streams, expiry and counters."""
+    print("Testing idempotency...")
+    asyncio.run(check_send())
+    asyncio.run(check_stream())
+    asyncio.run(check_expiry())
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_idempotency()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Test script for latency-injection profiles."""
+
+import os
+import random
+import statistics
+from types import SimpleNamespace
+
+from agent_executor import TestAgentExecutor
+from latency import LatencyProfile, parse_profile, per_request_enabled
+
+
+def _samples(profile: LatencyProfile, n: int = 20_000) -> list[float]:
+    rng = random.Random(0)
+    return sorted(profile.sample(rng) for _ in range(n))
+
+
+def check_parsing():
+    assert parse_profile(None) == parse_profile("") == parse_profile("none") == LatencyProfile("none")
+    assert parse_profile("fixed").median == 5.0
+    assert parse_profile(" Fixed:250 ").median == 0.25
+    assert parse_profile("heavy-tail:100:0.4:0.05:10") == LatencyProfile("heavy-tail", 0.1, 0.4, 0.05, 10.0)
+    for bad in ("slow", "fixed:abc", "fixed:-5", "fixed:nan", "fixed:inf", "lognormal:500:-1",
+                "heavy-tail:300:0.5:1.5", "heavy-tail:1:2:0.1:4:9"):
+        try:
+            parse_profile(bad)
+            raise AssertionError(f"accepted {bad!r}")
+        except ValueError:
+            pass
+    print("✓ presets, overrides in ms, and bad specs rejected")
+
+
+def check_distributions():
+    assert set(_samples(parse_profile("fixed:200"), 100)) == {0.2}
+    assert set(_samples(parse_profile("none"), 100)) == {0.0}
+    print("✓ fixed always sleeps its median; none never sleeps")
+
+    samples = _samples(parse_profile("lognormal:100:0.5"))
+    median = statistics.median(samples)
+    assert 0.095 < median < 0.105, median
+    p99 = samples[int(len(samples) * 0.99)]
+    assert 0.28 < p99 < 0.36, p99  # 100 ms * exp(2.326 * 0.5)
+    print(f"✓ lognormal: median {median * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms")
+
+    samples = _samples(parse_profile("heavy-tail:100:0.1:0.02:20"))
+    spikes = sum(1 for s in samples if s > 0.5) / len(samples)
+    assert 0.015 < spikes < 0.025, spikes
+    assert samples[int(len(samples) * 0.995)] > 1.5
+    print(f"✓ heavy-tail: {spikes:.1%} spikes at ~20x dominate p99.5")
+
+
+def check_limits():
+    os.environ["LATENCY_MAX_MS"] = "1000"
+    try:
+        assert parse_profile("fixed:99999999").sample() == 1.0
+    finally:
+        del os.environ["LATENCY_MAX_MS"]
+    assert parse_profile("fixed:99999999").sample() == 30.0
+    print("✓ delays are capped at LATENCY_MAX_MS (30 s by default)")
+
+    executor = TestAgentExecutor(agent=SimpleNamespace())
+    context = SimpleNamespace(message=SimpleNamespace(metadata={"latency_profile": "fixed:99999999"}))
+    os.environ.pop("LATENCY_PER_REQUEST", None)
+    assert not per_request_enabled() and executor._get_latency_profile(context) is None
+    os.environ["LATENCY_PER_REQUEST"] = "1"
+    try:
+        assert executor._get_latency_profile(context).median == 99999.999
+    finally:
+        del os.environ["LATENCY_PER_REQUEST"]
+    print("✓ latency_profile metadata is ignored unless LATENCY_PER_REQUEST is set")
+
+
+def test_latency():
+    """Test profile parsing, distributions, the delay cap and the opt-in."""
+    print("Testing latency profiles...")
+    check_parsing()
+    check_distributions()
+    check_limits()
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_latency()
@@ -3,7 +3,7 @@
 
 import asyncio
 import logging
-from web_summarizer import LinkReader, find_url, chunk_text
+from web_summarizer import LinkReader, find_url, find_urls, chunk_text
 
 async def test_link_reader():
     """Test the link reader functionality."""
@@ -21,6 +21,13 @@ async def test_link_reader():
     for text in test_texts:
         url = find_url(text)
         print(f"  '{text}' -> {url or 'No URL found'}")
+
+    # Test 1b: multi-URL detection
+    print("\n1b. Testing multi-URL detection:")
+    multi = "compare https://first.com/a and https://second.org/b, then https://first.com/a again."
+    urls = find_urls(multi)
+    print(f"  '{multi}' -> {urls}")
+    assert urls == ["https://first.com/a", "https://second.org/b"]
     
     # Test 2: Text chunking
     print("\n2. Testing text chunking:")
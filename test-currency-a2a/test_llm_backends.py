@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test script for the fake LLM backend (determinism, timing, errors)."""
+
+import asyncio
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from llm_backends import FakeChatModel, FakeLLMConfig, FakeLLMError, make_llm
+
+PROMPT = [SystemMessage(content="You are a helpful AI assistant."), HumanMessage(content="What is a forex spread?")]
+
+
+async def _stream(model: FakeChatModel, messages=PROMPT) -> list[str]:
+    return [chunk.content async for chunk in model.astream(messages)]
+
+
+async def check_determinism():
+    config = FakeLLMConfig(ttft=0, tokens_per_sec=0, seed=7)
+    first = await _stream(FakeChatModel(config))
+    assert first == await _stream(FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0, seed=7)))
+    assert first != await _stream(FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0, seed=8)))
+    other = [PROMPT[0], HumanMessage(content="And a pip?")]
+    assert first != await _stream(FakeChatModel(config), other)
+    print(f"✓ same config, seed and prompt give the same {len(first)} tokens; seed and prompt change them")
+
+    fixed = FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0, output_tokens=25, output_sigma=0))
+    assert len(await _stream(fixed)) == 25
+    print("✓ output_sigma=0 gives exactly output_tokens tokens")
+
+    response = await FakeChatModel(config).ainvoke(PROMPT)
+    assert response.content == "".join(first)
+    print("✓ ainvoke returns the streamed content")
+
+
+async def check_timing():
+    model = FakeChatModel(FakeLLMConfig(ttft=0.2, tokens_per_sec=100, output_tokens=21, output_sigma=0))
+    started = time.perf_counter()
+    stream = model.astream(PROMPT)
+    await anext(stream)
+    ttft = time.perf_counter() - started
+    async for _ in stream:
+        pass
+    rest = time.perf_counter() - started - ttft
+    assert 0.2 <= ttft < 0.3, ttft
+    assert 0.2 <= rest < 0.35, rest  # 20 more tokens at 100/s
+    print(f"✓ TTFT {ttft * 1000:.0f} ms, 20 tokens after it in {rest * 1000:.0f} ms (100 tokens/s)")
+
+
+async def check_errors():
+    failing = FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0, error_rate=1.0))
+    try:
+        await _stream(failing)
+        raise AssertionError("no injected failure")
+    except FakeLLMError:
+        pass
+    assert isinstance(make_llm("fake"), FakeChatModel)
+    try:
+        make_llm("nope")
+        raise AssertionError("unknown backend accepted")
+    except ValueError:
+        pass
+    print("✓ error_rate=1 always fails; make_llm selects backends by name")
+
+
+def test_llm_backends():
+    """Test the fake model's determinism, timing and error injection."""
+    print("Testing fake LLM backend...")
+    asyncio.run(check_determinism())
+    asyncio.run(check_timing())
+    asyncio.run(check_errors())
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_llm_backends()
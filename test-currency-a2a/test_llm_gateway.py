@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Test script for the LLM gateway (budgets, fair queuing, retries)."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from llm_gateway import GatewayChatModel, LLMGateway, is_transient, llm_session, rate_limit_delay
+from metrics import LLM_CALL_DURATION, LLM_GATEWAY_WAIT, InstrumentedChatModel
+
+
+class RateLimited(Exception):
+    """Shaped like openai.RateLimitError."""
+
+    def __init__(self, headers: dict[str, str]):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+class Unavailable(Exception):
+    """Shaped like openai.InternalServerError (503)."""
+
+    status_code = 503
+
+
+class Model:
+    """Records calls; fails the first `limited` of them with `error` (a 429 by default)."""
+
+    def __init__(
+        self,
+        seconds: float = 0.0,
+        limited: int = 0,
+        headers: dict[str, str] | None = None,
+        error: Exception | None = None,
+    ):
+        self.seconds = seconds
+        self.limited = limited
+        self.error = error or RateLimited(headers or {"retry-after-ms": "200"})
+        self.calls: list[str] = []
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls.append(messages[-1].content)
+        if self.limited:
+            self.limited -= 1
+            raise self.error
+        await asyncio.sleep(self.seconds)
+        message = AIMessage(content="ok")
+        message.usage_metadata = {"input_tokens": 8, "output_tokens": 2, "total_tokens": 10}
+        return message
+
+    async def astream(self, messages, **kwargs):
+        self.calls.append(messages[-1].content)
+        if self.limited:
+            self.limited -= 1
+            raise self.error
+        for word in ("a ", "b "):
+            await asyncio.sleep(self.seconds)
+            yield AIMessageChunk(content=word)
+
+
+def _ask(text: str) -> list[HumanMessage]:
+    return [HumanMessage(content=text)]
+
+
+async def check_budgets():
+    gateway = LLMGateway(rpm=600)
+    gateway.requests.level = 0
+    llm = GatewayChatModel(Model(), gateway)
+    started = time.perf_counter()
+    await asyncio.gather(*(llm.ainvoke(_ask(f"q{i}")) for i in range(3)))
+    elapsed = time.perf_counter() - started
+    assert 0.25 <= elapsed < 0.6, elapsed
+    print(f"✓ RPM bucket spaces calls (3 calls at 10/s from empty: {elapsed:.2f}s)")
+
+    gateway = LLMGateway(tpm=6000, expected_output_tokens=40)
+    gateway.tokens.level = 0
+    llm = GatewayChatModel(Model(), gateway)
+    started = time.perf_counter()
+    await llm.ainvoke(_ask("x" * 40))  # 14 prompt + 40 output tokens at 100/s
+    elapsed = time.perf_counter() - started
+    assert 0.45 <= elapsed < 0.8, elapsed
+    # charged 54 up front, corrected to the reported 10
+    assert gateway.tokens.level > 40, gateway.tokens.level
+    print(f"✓ TPM bucket charges the estimate and refunds the reported usage ({elapsed:.2f}s)")
+
+
+async def check_fairness():
+    model = Model(seconds=0.01)
+    llm = GatewayChatModel(model, LLMGateway(concurrency=1))
+
+    async def session(sid: str, n: int) -> None:
+        with llm_session(sid):
+            await asyncio.gather(*(llm.ainvoke(_ask(f"{sid}{i}")) for i in range(n)))
+
+    busy = asyncio.create_task(session("a", 5))
+    await asyncio.sleep(0)
+    await asyncio.gather(busy, session("b", 1))
+    # b0 arrives behind a0..a4 but waits for at most one more of a's calls
+    assert model.calls.index("b0") <= 2, model.calls
+    print("✓ sessions are served round-robin:", " ".join(model.calls))
+
+
+async def check_rate_limits():
+    model = Model(limited=1)
+    gateway = LLMGateway()
+    llm = GatewayChatModel(model, gateway)
+    started = time.perf_counter()
+    response = await llm.ainvoke(_ask("q"))
+    elapsed = time.perf_counter() - started
+    assert response.content == "ok" and len(model.calls) == 2 and gateway.rate_limited == 1
+    assert elapsed >= 0.19, elapsed
+    print(f"✓ 429 pauses the gateway for Retry-After and retries ({elapsed:.2f}s)")
+
+    model = Model(limited=1, headers={"retry-after": "0"})
+    chunks = [c.content async for c in GatewayChatModel(model, LLMGateway()).astream(_ask("q"))]
+    assert chunks == ["a ", "b "] and len(model.calls) == 2
+    print("✓ streams are retried when the 429 comes before the first chunk")
+
+    model = Model(limited=5)
+    try:
+        await GatewayChatModel(model, LLMGateway(max_retries=1)).ainvoke(_ask("q"))
+        raise AssertionError("429 swallowed")
+    except RateLimited:
+        pass
+    assert len(model.calls) == 2
+    print("✓ gives up after LLM_MAX_RETRIES")
+
+    assert rate_limit_delay(RateLimited({"retry-after": "3"})) == 3.0
+    assert rate_limit_delay(RateLimited({})) == 0.0
+    assert rate_limit_delay(ValueError("boom")) is None
+    print("✓ Retry-After / retry-after-ms parsing")
+
+
+async def check_transient_errors():
+    model = Model(limited=2, error=Unavailable("503 Service Unavailable"))
+    gateway = LLMGateway()
+    started = time.perf_counter()
+    response = await GatewayChatModel(model, gateway).ainvoke(_ask("q"))
+    elapsed = time.perf_counter() - started
+    assert response.content == "ok" and len(model.calls) == 3 and gateway.rate_limited == 0
+    assert 0.5 <= elapsed < 1.6, elapsed  # 0.25-0.5 s then 0.5-1 s backoff
+    assert gateway.stats()["blocked_for"] == 0
+    print(f"✓ a 503 backs off the call (not the gateway) and retries ({elapsed:.2f}s)")
+
+    model = Model(limited=1, error=httpx.ConnectError("connection refused"))
+    chunks = [c.content async for c in GatewayChatModel(model, LLMGateway()).astream(_ask("q"))]
+    assert chunks == ["a ", "b "] and len(model.calls) == 2
+    print("✓ streams are retried after a connection error before the first chunk")
+
+    model = Model(limited=5, error=Unavailable("503"))
+    try:
+        await GatewayChatModel(model, LLMGateway(max_retries=1)).ainvoke(_ask("q"))
+        raise AssertionError("503 swallowed")
+    except Unavailable:
+        pass
+    assert len(model.calls) == 2
+
+    model = Model(limited=1, error=ValueError("bad request"))
+    try:
+        await GatewayChatModel(model, LLMGateway()).ainvoke(_ask("q"))
+        raise AssertionError("ValueError swallowed")
+    except ValueError:
+        pass
+    assert len(model.calls) == 1
+    assert is_transient(TimeoutError()) and not is_transient(RateLimited({}))
+    print("✓ transient retries stop at LLM_MAX_RETRIES; other errors are not retried")
+
+
+async def check_wait_reported_separately():
+    wait_before = LLM_GATEWAY_WAIT.labels().sum
+    call_before = LLM_CALL_DURATION.labels("invoke").sum
+    llm = GatewayChatModel(InstrumentedChatModel(Model(seconds=0.1)), LLMGateway(concurrency=1))
+    await asyncio.gather(*(llm.ainvoke(_ask(f"q{i}")) for i in range(3)))
+    waited = LLM_GATEWAY_WAIT.labels().sum - wait_before
+    model_time = LLM_CALL_DURATION.labels("invoke").sum - call_before
+    assert 0.25 <= waited < 0.5, waited  # 0 + 0.1 + 0.2
+    assert 0.25 <= model_time < 0.5, model_time  # 3 x 0.1
+    print(f"✓ queue wait ({waited:.2f}s) reported apart from model time ({model_time:.2f}s)")
+
+
+def test_llm_gateway():
+    """Test RPM/TPM budgets, fairness, retries and wait accounting."""
+    print("Testing LLM gateway...")
+    asyncio.run(check_budgets())
+    asyncio.run(check_fairness())
+    asyncio.run(check_rate_limits())
+    asyncio.run(check_transient_errors())
+    asyncio.run(check_wait_reported_separately())
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_llm_gateway()
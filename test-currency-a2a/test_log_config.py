@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Test script for queued JSON logging and sampling."""
+
+import io
+import json
+import logging
+import threading
+
+from log_config import Sampler, setup_logging, shutdown_logging
+
+
+class SlowArg:
+    """Records the thread its message is formatted on."""
+
+    def __init__(self) -> None:
+        self.thread: str | None = None
+
+    def __str__(self) -> str:
+        self.thread = threading.current_thread().name
+        return "formatted"
+
+
+def test_log_config():
+    """Test JSON output, off-thread formatting and the sampler."""
+    print("Testing logging setup...")
+
+    out = io.StringIO()
+    listener = setup_logging(level="INFO", fmt="json", stream=out)
+    log = logging.getLogger("test.log_config")
+    arg = SlowArg()
+    log.info("value %s", arg, extra={"task_id": "t-1"})
+    log.debug("dropped %s", "below level")
+    shutdown_logging()
+    assert listener._thread is None
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 1, lines
+    entry = json.loads(lines[0])
+    assert entry["msg"] == "value formatted"
+    assert entry["level"] == "INFO" and entry["logger"] == "test.log_config"
+    assert entry["task_id"] == "t-1"
+    print("✓ one JSON object per record with extra fields")
+
+    assert arg.thread is not None and arg.thread != threading.current_thread().name
+    print(f"✓ message formatted on the listener thread ({arg.thread})")
+    print("✓ shutdown_logging flushes the queue and stops the listener")
+
+    sample = Sampler(50)
+    hits = [i for i in range(1, 201) if sample()]
+    assert hits == [1, 51, 101, 151], hits
+    every = Sampler(1)
+    assert all(every() for _ in range(5))
+    print("✓ sampler passes every Nth call")
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_log_config()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Test script for memory accounting and the tracemalloc endpoint."""
+
+import asyncio
+import os
+import tracemalloc
+from types import SimpleNamespace
+
+from a2a.server.tasks import InMemoryPushNotificationConfigStore, InMemoryTaskStore
+from a2a.types import Message, Part, Role, TextPart
+from a2a.utils import new_task
+from cache import TTLCache
+from chunk_index import ChunkIndex
+from langchain_core.messages import AIMessage, HumanMessage
+from memory import MemoryInspector, deep_sizeof
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from web_summarizer import Page
+
+
+def _message(text: str) -> Message:
+    return Message(role=Role.user, parts=[Part(root=TextPart(text=text))], message_id=os.urandom(4).hex())
+
+
+def test_memory():
+    """Test per-session/task/cache accounting and snapshot diffs."""
+    print("Testing memory accounting...")
+
+    small, big = "x" * 100, "y" * 50_000
+    assert deep_sizeof([small, small]) < deep_sizeof([small, big])
+    shared = [big]
+    assert deep_sizeof([shared, shared]) < 2 * deep_sizeof(shared)
+    print("✓ deep_sizeof follows containers and counts shared objects once")
+
+    agent = SimpleNamespace(
+        conversations={
+            "short": [HumanMessage(content="hi"), AIMessage(content="hello")],
+            "long": [HumanMessage(content=big), AIMessage(content=big[:20_000])],
+        },
+        page_cache=TTLCache(),
+        summary_cache=TTLCache(),
+        chunk_index=ChunkIndex(),
+    )
+    agent.summary_cache.set("https://example.com/a", "summary " * 200)
+    agent.chunk_index.add("short", Page("https://example.com/a", "A", "word " * 5000, 25_000))
+    task_store = InMemoryTaskStore()
+    asyncio.run(task_store.save(new_task(_message(big))))
+    asyncio.run(task_store.save(new_task(_message("tiny"))))
+    inspector = MemoryInspector(agent, task_store, InMemoryPushNotificationConfigStore())
+
+    report = inspector.accounting()
+    sessions = report["sessions"]["top"]
+    assert [s["id"] for s in sessions] == ["long", "short"], sessions
+    assert sessions[0]["bytes"] > 70_000
+    assert sessions[1]["bytes"] >= agent.chunk_index.session_nbytes("short") > 0
+    print(f"✓ sessions ranked by size ({sessions[0]['bytes']} / {sessions[1]['bytes']} bytes, index included)")
+
+    tasks = report["tasks"]["top"]
+    assert report["tasks"]["count"] == 2 and tasks[0]["bytes"] > 50_000 > tasks[1]["bytes"]
+    assert report["caches"]["chunk_index"] == agent.chunk_index.nbytes
+    assert report["caches"]["summary_cache"] > report["caches"]["page_cache"]
+    print("✓ tasks and caches reported")
+
+    saved = os.environ.get("ADMIN_TOKEN")
+    try:
+        os.environ["ADMIN_TOKEN"] = "secret"
+        client = TestClient(Starlette(routes=[Route("/debug/memory", inspector.endpoint)]))
+        assert client.get("/debug/memory").status_code == 401
+        auth = {"Authorization": "Bearer secret"}
+        first = client.get("/debug/memory?tracemalloc=snapshot", headers=auth).json()
+        assert first["tracemalloc"]["tracing"] == "started"
+        client.get("/debug/memory?tracemalloc=snapshot", headers=auth)
+        hoard = [bytearray(1024) for _ in range(2000)]
+        body = client.get("/debug/memory?tracemalloc=snapshot&top=5", headers=auth).json()
+        top_diff = body["tracemalloc"]["diff"][0]
+        assert "test_memory.py" in top_diff["site"] and top_diff["size_diff"] > 1_500_000, top_diff
+        print(f"✓ snapshot diff points at the allocation site ({top_diff['site']})")
+
+        client.get("/debug/memory?tracemalloc=stop", headers=auth)
+        assert not tracemalloc.is_tracing()
+        del hoard
+        print("✓ tracing stops on request")
+    finally:
+        os.environ.pop("ADMIN_TOKEN", None)
+        if saved is not None:
+            os.environ["ADMIN_TOKEN"] = saved
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_memory()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test script for the Prometheus-style metrics."""
+
+import asyncio
+
+from langchain_core.messages import HumanMessage
+from llm_backends import FakeChatModel, FakeLLMConfig
+from metrics import (
+    LLM_CALL_DURATION,
+    LLM_TTFT,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    InstrumentedChatModel,
+)
+
+def test_metrics():
+    """Test metric types, exposition format and the LLM instrumentation."""
+    print("Testing metrics...")
+
+    requests = Counter("test_requests", "Requests", ["route"])
+    requests.labels("/").inc()
+    requests.labels("/").inc(2)
+    depth = Gauge("test_depth", "Depth")
+    depth.set_function(lambda: 7)
+    latency = Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(v)
+
+    text = REGISTRY.render()
+    for line in (
+        'test_requests_total{route="/"} 3',
+        "test_depth 7",
+        'test_latency_seconds_bucket{le="0.1"} 2',
+        'test_latency_seconds_bucket{le="1"} 3',
+        'test_latency_seconds_bucket{le="+Inf"} 4',
+        "test_latency_seconds_count 4",
+        "# TYPE test_latency_seconds histogram",
+    ):
+        assert line in text.splitlines(), f"missing {line!r}"
+    print("✓ exposition format")
+
+    llm = InstrumentedChatModel(
+        FakeChatModel(FakeLLMConfig(ttft=0.01, tokens_per_sec=0, output_tokens=20, output_sigma=0))
+    )
+
+    async def run() -> None:
+        chunks = [c async for c in llm.astream([HumanMessage(content="hi")])]
+        assert len(chunks) == 20
+        await llm.ainvoke([HumanMessage(content="hello")])
+
+    # the LLM metrics are process-wide: other tests in the session also count
+    def counts() -> tuple[int, int, int]:
+        return (
+            LLM_TTFT.labels().count,
+            LLM_CALL_DURATION.labels("stream").count,
+            LLM_CALL_DURATION.labels("invoke").count,
+        )
+
+    before = counts()
+    asyncio.run(run())
+    assert counts() == (before[0] + 1, before[1] + 1, before[2] + 1), (before, counts())
+    text = REGISTRY.render()
+    assert f'llm_call_duration_seconds_count{{mode="stream"}} {before[1] + 1}' in text.splitlines()
+    print("✓ LLM instrumentation")
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_metrics()
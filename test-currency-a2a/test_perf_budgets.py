@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Performance budget tests replaying recorded LLM streams and HTTP exchanges.
+
+Runs ``TestAgentExecutor.execute`` against ``fixtures/cassettes/perf.jsonl``
+as fast as possible and checks CPU time and events per task (latency is
+printed alongside). ``chat_send`` is the ``chat`` prompt as a blocking
+``message/send``, for comparing the fast path with the streaming one. Runs
+under pytest or directly::
+
+    uv run pytest test_perf_budgets.py
+    uv run python test_perf_budgets.py
+
+Re-record the cassette (LLM from LLM_BACKEND, pages and rates from the
+bundled fixtures) after changing prompts or fixtures::
+
+    uv run python test_perf_budgets.py --record
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.context import ServerCallContext
+from a2a.server.events.event_queue import EventQueue
+from a2a.types import Message, MessageSendParams, Part, Role, TextPart
+from agent import TestAgent
+from agent_executor import TestAgentExecutor
+from cache import TTLCache
+from cassette import Cassette
+from fast_send import BLOCKING_SEND
+from fixture_server import FixtureTransport
+from host_scheduler import HostScheduler
+from web_summarizer import LinkReader
+
+CASSETTE = Path(__file__).parent / "fixtures" / "cassettes" / "perf.jsonl"
+TASKS_PER_SCENARIO = 20
+
+# Scenario -> (prompt, CPU ms per task, events per task)
+BUDGETS = {
+    "chat": ("What are good caching strategies for a web service?", 20.0, 4),
+    "chat_send": ("What are good caching strategies for a web service?", 10.0, 2),
+    "convert": ("Convert 100 USD to EUR", 10.0, 6),
+    "summarize": ("Summarize https://example.com/long-article", 120.0, 8),
+    "summarize_forum": ("TL;DR https://forum.example.org/t/arm-build-failure", 120.0, 9),
+}
+# Scenarios run as blocking message/send (the rest as message/stream)
+BLOCKING_SCENARIOS = {"chat_send"}
+
+
+class CountingQueue(EventQueue):
+    """Event queue that only counts events (nothing dequeues in these tests)."""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    async def enqueue_event(self, event) -> None:
+        self.count += 1
+
+
+def _agent(cassette: Cassette) -> TestAgent:
+    agent = TestAgent(cassette=cassette)
+    # Replayed runs must always take the full path, not the page/summary
+    # caches, and must not wait on per-host politeness
+    agent.page_cache = TTLCache(max_entries=0)
+    agent.summary_cache = TTLCache(max_entries=0)
+    agent.link_reader = LinkReader(
+        transport=cassette.transport(), scheduler=HostScheduler(rate=1000, burst=1000)
+    )
+    return agent
+
+
+def _context(prompt: str, blocking: bool = False) -> RequestContext:
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=TextPart(text=prompt))],
+        message_id=str(uuid.uuid4()),
+        context_id=str(uuid.uuid4()),  # fresh session: same prompt every time
+    )
+    # the request handler marks blocking sends in the call context (fast_send.py)
+    call_context = ServerCallContext(state={BLOCKING_SEND: True}) if blocking else None
+    return RequestContext(request=MessageSendParams(message=message), call_context=call_context)
+
+
+async def _run(executor: TestAgentExecutor, prompt: str, n: int, blocking: bool = False) -> tuple[float, float, float]:
+    """Execute `prompt` `n` times; return CPU ms, wall ms and events per task."""
+    events = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(n):
+        queue = CountingQueue()
+        await executor.execute(_context(prompt, blocking), queue)
+        events += queue.count
+    cpu_ms = (time.process_time() - cpu_start) * 1000 / n
+    return cpu_ms, (time.perf_counter() - wall_start) * 1000 / n, events / n
+
+
+def _check(scenario: str) -> None:
+    prompt, cpu_budget, event_budget = BUDGETS[scenario]
+    blocking = scenario in BLOCKING_SCENARIOS
+    cassette = Cassette(CASSETTE, mode="replay", time_scale=0)
+    executor = TestAgentExecutor(_agent(cassette))
+    asyncio.run(_run(executor, prompt, 1, blocking))  # warm-up (imports, regex compilation)
+    cpu_ms, wall_ms, events = asyncio.run(_run(executor, prompt, TASKS_PER_SCENARIO, blocking))
+    print(f"  {scenario}: {cpu_ms:.2f} ms CPU/task (budget {cpu_budget}), "
+          f"{events:g} events/task (budget {event_budget}), {wall_ms:.1f} ms/task")
+    assert cpu_ms <= cpu_budget, f"{scenario}: {cpu_ms:.2f} ms CPU per task > {cpu_budget}"
+    assert events <= event_budget, f"{scenario}: {events:g} events per task > {event_budget}"
+
+
+def test_chat_budget():
+    _check("chat")
+
+
+def test_chat_send_budget():
+    _check("chat_send")
+
+
+def test_convert_budget():
+    _check("convert")
+
+
+def test_summarize_budget():
+    _check("summarize")
+
+
+def test_summarize_forum_budget():
+    _check("summarize_forum")
+
+
+async def record() -> None:
+    """Re-record the cassette from the configured LLM and the bundled fixtures."""
+    CASSETTE.unlink(missing_ok=True)
+    cassette = Cassette(CASSETTE, mode="record", inner_transport=FixtureTransport())
+    executor = TestAgentExecutor(_agent(cassette))
+    for scenario, (prompt, _, _) in BUDGETS.items():
+        await executor.execute(_context(prompt, scenario in BLOCKING_SCENARIOS), CountingQueue())
+        print(f"  recorded {scenario}")
+    print(f"{len(cassette)} exchanges written to {CASSETTE}")
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        asyncio.run(record())
+    else:
+        print("Checking performance budgets...")
+        for name in BUDGETS:
+            _check(name)
+        print("\n✅ All budgets met!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test script for the sampling profiler and its admin endpoint."""
+
+import asyncio
+import os
+import time
+
+from profiler import profile, profile_endpoint
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+
+async def blocking_step() -> None:
+    """Hogs the loop like synchronous work inside a coroutine would."""
+    for _ in range(5):
+        deadline = time.perf_counter() + 0.03
+        while time.perf_counter() < deadline:
+            pass
+        await asyncio.sleep(0.01)
+
+
+async def check_profile():
+    result = await asyncio.gather(profile(0.4), blocking_step())
+    prof = result[0]
+    summary = prof.summary()
+
+    assert prof.samples > 20, prof.samples
+    assert any("blocking_step" in stack for stack in prof.stacks)
+    line = prof.collapsed().splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+    print(f"✓ {prof.samples} samples, collapsed stacks include the busy coroutine")
+
+    assert summary["loop_lag_ms"]["max"] >= 20, summary["loop_lag_ms"]
+    print(f"✓ loop lag max {summary['loop_lag_ms']['max']} ms")
+
+    slowest = summary["slowest_coroutines"][0]
+    assert slowest["coroutine"] == "blocking_step" and slowest["max_ms"] >= 25, slowest
+    print(f"✓ slowest coroutine: {slowest['coroutine']} ({slowest['slow_steps']} slow steps)")
+
+    outcomes = await asyncio.gather(profile(0.1), profile(0.1), return_exceptions=True)
+    assert isinstance(outcomes[1], RuntimeError), outcomes
+    print("✓ concurrent profiles are rejected")
+    assert asyncio.Handle._run.__name__ == "_run" and asyncio.Handle._run.__module__ == "asyncio.events"
+    print("✓ callback timing removed after the profile")
+
+
+def check_endpoint():
+    client = TestClient(Starlette(routes=[Route("/debug/profile", profile_endpoint)]))
+    saved = os.environ.pop("ADMIN_TOKEN", None)
+    try:
+        assert client.get("/debug/profile?seconds=0.1").status_code == 404
+        os.environ["ADMIN_TOKEN"] = "secret"
+        assert client.get("/debug/profile?seconds=0.1").status_code == 401
+        auth = {"Authorization": "Bearer secret"}
+        assert client.get("/debug/profile?seconds=0", headers=auth).status_code == 400
+        body = client.get("/debug/profile?seconds=0.2", headers=auth).json()
+        assert body["samples"] > 0 and "collapsed" in body and "loop_lag_ms" in body
+        folded = client.get("/debug/profile?seconds=0.1&format=collapsed", headers=auth)
+        assert "profile.folded" in folded.headers["content-disposition"]
+    finally:
+        os.environ.pop("ADMIN_TOKEN", None)
+        if saved is not None:
+            os.environ["ADMIN_TOKEN"] = saved
+    print("✓ endpoint: 404 without ADMIN_TOKEN, 401 without the bearer token, JSON and collapsed output")
+
+
+def test_profiler():
+    """Test sampling, loop lag, slow steps and the admin endpoint."""
+    print("Testing profiler...")
+    asyncio.run(check_profile())
+    check_endpoint()
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_profiler()
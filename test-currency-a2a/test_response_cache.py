@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Test script for the exact-match response cache."""
+
+import asyncio
+import time
+
+from agent import TestAgent
+from langchain_core.messages import HumanMessage, SystemMessage
+from llm_backends import FakeChatModel, FakeLLMConfig
+from metrics import LLM_CALL_DURATION, RESPONSE_CACHE_REQUESTS
+from response_cache import ResponseCache, model_settings
+
+
+
+def _calls() -> int:
+    return LLM_CALL_DURATION.labels("stream").count + LLM_CALL_DURATION.labels("invoke").count
+
+
+def _results() -> dict[str, float]:
+    return {r: RESPONSE_CACHE_REQUESTS.labels(r).value for r in ("hit", "miss", "bypass")}
+
+
+async def _stream(agent: TestAgent, text: str, session_id: str, cache: bool = True) -> list[dict]:
+    return [partial async for partial in agent.stream(text, session_id, cache=cache)]
+
+
+async def check_agent():
+    agent = TestAgent(llm=FakeChatModel(FakeLLMConfig(ttft=0, tokens_per_sec=0)))
+    agent.response_cache = ResponseCache(max_entries=16)
+    before, results = _calls(), _results()
+    live = await _stream(agent, "What is a forex spread?", "s-1")
+    replayed = await _stream(agent, "What is a forex spread?", "s-2")
+    assert _calls() == before + 1, _calls() - before
+    assert replayed == live and sum(1 for p in live if p.get("is_streaming_chunk")) > 1
+    assert _results()["hit"] == results["hit"] + 1 and _results()["miss"] == results["miss"] + 1
+    print("✓ a repeated first message is replayed chunk for chunk without an LLM call")
+
+    assert agent.conversations["s-2"].texts() == agent.conversations["s-1"].texts()
+    await _stream(agent, "And a pip?", "s-1")
+    await _stream(agent, "And a pip?", "s-3")
+    assert _calls() == before + 3
+    print("✓ history is part of the key (same input, different conversation: new call)")
+
+    answer = await agent.invoke("What is a forex spread?", "s-4")
+    assert answer["content"] == live[-1]["content"] and _calls() == before + 4
+    assert (await agent.invoke("What is a forex spread?", "s-5"))["content"] == answer["content"]
+    assert await _stream(agent, "What is a forex spread?", "s-6") == live and _calls() == before + 4
+    print("✓ invoke keeps its own entries; streams still replay chunk for chunk")
+
+    await _stream(agent, "What is a forex spread?", "s-7", cache=False)
+    assert _calls() == before + 5 and _results()["bypass"] == results["bypass"] + 1
+    print("✓ response_cache=false bypasses the cache")
+
+
+def check_cache():
+    messages = [SystemMessage(content="sys"), HumanMessage(content="hi")]
+    cache = ResponseCache(max_entries=2, ttl=60, max_temperature=0.5)
+    key = cache.key(messages, {"model": "m", "temperature": 0.2})
+    assert key != cache.key(messages, {"model": "m", "temperature": 0.3})
+    assert cache.key(messages, {"model": "m", "temperature": 1.0}) is None
+    assert cache.key(messages, {"model": "m"}, mode="invoke") != cache.key(messages, {"model": "m"})
+    default = ResponseCache(max_entries=2)
+    assert default.key(messages, {"temperature": 1.0}) is None and default.key(messages, {"model": "m"})
+    print("✓ model settings and mode are part of the key; sampling models bypass by default")
+
+    for i in range(3):
+        cache.put(f"k{i}", [f"answer {i}"])
+    assert len(cache) == 2 and cache.get("k0") is None and cache.get("k2") == ("answer 2",)
+    cache = ResponseCache(max_entries=2, ttl=0.05)
+    cache.put("k", ["answer"])
+    time.sleep(0.06)
+    assert cache.get("k") is None and len(cache) == 0
+    assert ResponseCache().key(messages, {}) is None
+    print("✓ size bound (LRU), TTL, and off by default")
+
+    class Inner:
+        temperature = 0.7
+        deployment_name = "gpt"
+
+    class Wrapper:
+        inner = Inner()
+
+    assert model_settings(Wrapper()) == {"model": "Inner", "deployment_name": "gpt", "temperature": 0.7}
+    print("✓ model settings read through wrappers")
+
+
+def test_response_cache():
+    """Test replayed streams, keying, bypass, bounds and expiry."""
+    print("Testing response cache...")
+    asyncio.run(check_agent())
+    check_cache()
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_response_cache()
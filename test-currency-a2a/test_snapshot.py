@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Test script for warm-restart snapshots."""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from a2a.types import Message, Part, Role, TextPart
+from a2a.utils import new_task
+import snapshot
+from history import History
+from snapshot import SESSION, Snapshotter, SnapshotTaskStore
+
+
+def _task(text: str):
+    return new_task(Message(role=Role.user, parts=[Part(root=TextPart(text=text))], message_id=text))
+
+
+async def check_snapshots(path: Path):
+    # First run: two sessions and a task, saved on shutdown
+    agent = SimpleNamespace(conversations={}, snapshot=None)
+    store = SnapshotTaskStore()
+    snapshotter = Snapshotter(path, agent, store, interval=0)
+    agent.conversations["a"] = History(["hi", "hello"])
+    agent.conversations["b"] = History(["convert 1 usd to eur", "1 USD = 0.92 EUR"] * 50)
+    task = _task("summarize https://example.com")
+    await store.save(task)
+    async with snapshotter.lifespan(None):
+        pass
+    assert path.read_bytes().startswith(b"A2ASNAP1")
+    print(f"✓ snapshot written on shutdown ({path.stat().st_size} bytes)")
+
+    # Second run: only the index is read; records load on first access
+    agent2 = SimpleNamespace(conversations={}, snapshot=None)
+    store2 = SnapshotTaskStore()
+    snapshotter2 = Snapshotter(path, agent2, store2, interval=0)
+    assert len(agent2.snapshot) == 3 and not agent2.conversations and not store2.tasks
+    restored = agent2.snapshot.load_session("a")
+    assert restored is not None and restored.texts() == ["hi", "hello"]
+    assert agent2.snapshot.load_session("a") is None  # taken once
+    agent2.conversations["a"] = restored
+    restored.add_turn("again", "sure")
+    restored_task = await store2.get(task.id)
+    assert restored_task == task
+    print("✓ sessions and tasks restored lazily on first access")
+
+    # Third run sees the update to "a" and the never-loaded "b", carried over
+    await snapshotter2.save()
+    agent3 = SimpleNamespace(conversations={}, snapshot=None)
+    store3 = SnapshotTaskStore()
+    snapshotter3 = Snapshotter(path, agent3, store3, interval=0)
+    assert agent3.snapshot.load_session("a").texts() == ["hi", "hello", "again", "sure"]
+    assert len(agent3.snapshot.load_session("b")) == 100
+    assert await store3.get(task.id) == task
+    print("✓ unloaded records carried over into the next snapshot")
+
+    # Cleared sessions stay cleared
+    agent3.snapshot.discard(SESSION, "a")
+    await snapshotter3.save()
+    agent5 = SimpleNamespace(conversations={}, snapshot=None)
+    Snapshotter(path, agent5, SnapshotTaskStore(), interval=0)
+    assert agent5.snapshot.load_session("a") is None
+    print("✓ cleared sessions are not restored")
+
+    # A truncated file is ignored rather than failing startup
+    path.write_bytes(path.read_bytes()[:-5])
+    agent4 = SimpleNamespace(conversations={}, snapshot=None)
+    Snapshotter(path, agent4, SnapshotTaskStore(), interval=0)
+    assert agent4.snapshot is None
+    print("✓ unreadable snapshot ignored")
+
+
+async def check_incremental_saves(path: Path):
+    agent = SimpleNamespace(conversations={}, snapshot=None)
+    store = SnapshotTaskStore()
+    snapshotter = Snapshotter(path, agent, store, interval=0)
+    for i in range(3):
+        agent.conversations[f"s{i}"] = History([f"q{i}", f"a{i}"])
+    task = _task("convert 5 usd to jpy")
+    await store.save(task)
+    await snapshotter.save()
+
+    encoded: list[str] = []
+    original = snapshot.write_snapshot
+
+    def slow_write(path, records, *args):
+        encoded.extend(key for _, key, _ in records)
+        time.sleep(0.1)
+        original(path, records, *args)
+
+    snapshot.write_snapshot = slow_write
+    try:
+        agent.conversations["s1"].add_turn("q", "a")
+        saving = asyncio.create_task(snapshotter.save())
+        await asyncio.sleep(0.02)
+        # changed while the file is written: picked up by the next save
+        agent.conversations["s2"].add_turn("late", "turn")
+        agent.conversations["s3"] = History(["new", "session"])
+        await saving
+        assert encoded == ["s1"], encoded
+        print("✓ only changed records are encoded; unchanged ones are copied from the last file")
+
+        encoded.clear()
+        await snapshotter.save()
+        assert sorted(encoded) == ["s2", "s3"], encoded
+    finally:
+        snapshot.write_snapshot = original
+
+    restored = SimpleNamespace(conversations={}, snapshot=None)
+    Snapshotter(path, restored, SnapshotTaskStore(), interval=0)
+    assert restored.snapshot.load_session("s2").texts() == ["q2", "a2", "late", "turn"]
+    assert restored.snapshot.load_session("s3").texts() == ["new", "session"]
+    assert len(restored.snapshot.load_session("s1")) == 4 and restored.snapshot.load_task(task.id) == task
+    print("✓ records changed during a save are written by the next one")
+
+
+def test_snapshot():
+    """Test shutdown snapshots, lazy restore, carry-over, clearing and incremental saves."""
+    print("Testing snapshots...")
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(check_snapshots(Path(tmp) / "state.snap"))
+        asyncio.run(check_incremental_saves(Path(tmp) / "incremental.snap"))
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    test_snapshot()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test script for span tracing and the JSONL exporter."""
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+import httpx
+from tracing import JsonlExporter, Tracer
+
+async def test_tracing():
+    """Test span nesting across tasks, header propagation and file rotation."""
+    print("Testing span tracing...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "traces.jsonl"
+        tracer = Tracer(JsonlExporter(path, max_bytes=2000, backups=1))
+        seen: list[str] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.headers.get("traceparent", ""))
+            return httpx.Response(200)
+
+        async def hook(request: httpx.Request) -> None:
+            request.headers.update(tracer.headers())
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), event_hooks={"request": [hook]})
+
+        async def fetch(i: int) -> None:
+            with tracer.span("fetch", index=i):
+                await client.get(f"https://example.test/{i}")
+
+        with tracer.span("task", task_id="t-1") as root:
+            await asyncio.gather(*(asyncio.create_task(fetch(i)) for i in range(3)))
+            with tracer.span("reduce"):
+                await asyncio.sleep(0.01)
+
+        spans = [json.loads(line) for line in path.read_text().splitlines()]
+        by_name = {s["name"]: s for s in spans}
+        assert len(spans) == 5, spans
+        assert {s["trace_id"] for s in spans} == {root.trace_id}
+        assert all(s["parent_id"] == root.span_id for s in spans if s["name"] != "task")
+        assert by_name["reduce"]["duration_ms"] >= 10
+        print(f"✓ {len(spans)} spans in one trace, children parented to the task span")
+
+        fetch_ids = {s["span_id"] for s in spans if s["name"] == "fetch"}
+        assert {h.split("-")[2] for h in seen} == fetch_ids, seen
+        assert all(h.split("-")[1] == root.trace_id for h in seen)
+        print("✓ traceparent carries the trace id and the fetch span id")
+
+        for i in range(10):
+            with tracer.span("task", task_id=f"t-{i + 2}"):
+                pass
+        assert path.with_name("traces.jsonl.1").exists()
+        assert not path.with_name("traces.jsonl.2").exists()
+        assert path.stat().st_size <= 2000
+        print("✓ rotation keeps one backup under the size cap")
+
+    disabled = Tracer()
+    with disabled.span("task") as s:
+        s.set(ignored=True)
+        assert disabled.headers() == {}
+    print("✓ disabled tracer is a no-op")
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    asyncio.run(test_tracing())
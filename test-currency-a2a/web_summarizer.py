@@ -1,15 +1,27 @@
 # /web_summarizer.py
 from __future__ import annotations
+import asyncio
+import os
 import re
 from dataclasses import dataclass
 from typing import List, Optional, Iterable
+from urllib.parse import quote, urlsplit
 import math
 
 import httpx
 from trafilatura import extract as tf_extract
 
+from host_scheduler import HostScheduler, parse_retry_after
+from metrics import STAGE_DURATION
+from tracing import inject_headers, span
+
 USER_AGENT = "A2A-URL-Summarizer/1.0 (+https://example.local)"
 
+# Throttled responses are retried after Retry-After (or exponential backoff)
+RETRYABLE_STATUS = {429, 503}
+MAX_RETRIES = 2
+MAX_RETRY_AFTER = 30.0
+
 URL_RE = re.compile(
     r'\bhttps?://[^\s<>()"\'\]]+',
     re.IGNORECASE,
@@ -22,28 +34,106 @@ class Page:
     text: str
     word_count: int
 
+class ByteBudget:
+    """Byte allowance shared by all fetches of one request."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.remaining = limit
+
+    def take(self, n: int) -> int:
+        granted = min(n, self.remaining)
+        self.remaining -= granted
+        return granted
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining <= 0
+
 class LinkReader:
-    def __init__(self, client: Optional[httpx.AsyncClient] = None) -> None:
-        self._client = client or httpx.AsyncClient(timeout=20, follow_redirects=True, headers={"User-Agent": USER_AGENT})
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        scheduler: Optional[HostScheduler] = None,
+        fixture_base: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        # LINK_READER_FIXTURE_BASE serves every page from a local stand-in
+        # (see fixture_server.py); politeness still applies per original host
+        base = fixture_base or os.getenv("LINK_READER_FIXTURE_BASE")
+        self._fixture_base = base.rstrip("/") if base else None
+        self._scheduler = scheduler or HostScheduler(
+            rate=float(os.getenv("LINK_READER_HOST_RPS", "1.0")),
+            burst=int(os.getenv("LINK_READER_HOST_BURST", "3")),
+            per_host=int(os.getenv("LINK_READER_HOST_CONCURRENCY", "2")),
+            max_total=int(os.getenv("LINK_READER_MAX_CONNECTIONS", "16")),
+        )
+        self._client = client or httpx.AsyncClient(
+            timeout=20,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=self._scheduler.max_total),
+            transport=transport,
+            event_hooks={"request": [inject_headers]},
+        )
 
-    async def fetch_and_extract(self, url: str) -> Page:
-        # 1) Fetch HTML
-        r = await self._client.get(url)
-        r.raise_for_status()
-        html = r.text
+    @property
+    def scheduler(self) -> HostScheduler:
+        return self._scheduler
 
-        # 2) Extract main content (Trafilatura handles boilerplate removal)
-        # favor_precision=True -> less noise, higher precision
+    async def _fetch_html(self, url: str, budget: Optional[ByteBudget]) -> str:
+        target = url
+        if self._fixture_base:
+            target = f"{self._fixture_base}/pages?url={quote(url, safe='')}"
+        for attempt in range(MAX_RETRIES + 1):
+            async with self._scheduler.slot(url):
+                async with self._client.stream("GET", target) as r:
+                    if r.status_code in RETRYABLE_STATUS and attempt < MAX_RETRIES:
+                        delay = parse_retry_after(r.headers.get("Retry-After"))
+                        if delay is None:
+                            delay = 2.0 ** attempt
+                        # hold back the whole origin, even if this request gives up;
+                        # never longer than the cap, or queued fetches hang behind it
+                        self._scheduler.defer(url, min(delay, MAX_RETRY_AFTER))
+                        if delay <= MAX_RETRY_AFTER:
+                            # queue again behind the deferral
+                            continue
+                    r.raise_for_status()
+                    body = bytearray()
+                    async for data in r.aiter_bytes():
+                        granted = budget.take(len(data)) if budget else len(data)
+                        body += data[:granted]
+                        if granted < len(data):
+                            break
+                    return body.decode(r.charset_encoding or "utf-8", errors="replace")
+        raise RuntimeError(f"exhausted retries for {url}")  # unreachable
+
+    async def fetch_and_extract(self, url: str, budget: Optional[ByteBudget] = None) -> Page:
+        # 1) Fetch HTML (per-host politeness; stop once the byte budget is spent)
+        with STAGE_DURATION.labels("fetch").time(), span("fetch", url=url) as s:
+            html = await self._fetch_html(url, budget)
+            s.set(chars=len(html))
+
+        # 2) Extract main content off the event loop: it is CPU-bound, and
+        # concurrent fetches (and other requests) must not wait behind it
+        return await asyncio.to_thread(extract_page, html, url)
+
+
+def extract_page(html: str, url: str) -> Page:
+    """Main text, title and word count of a fetched page."""
+    # Trafilatura handles boilerplate removal
+    # favor_precision=True -> less noise, higher precision
+    with STAGE_DURATION.labels("extract").time(), span("extract", url=url):
         text = tf_extract(html, url=url, favor_precision=True) or ""
-        text = text.strip()
-        # Title: Trafilatura returns only text; a simple fallback from HTML <title>
-        title = None
-        m = re.search(r"<title[^>]*>(.*?)</title>", html, flags=re.I | re.S)
-        if m:
-            title = re.sub(r"\s+", " ", m.group(1)).strip()
+    text = text.strip()
+    # Title: Trafilatura returns only text; a simple fallback from HTML <title>
+    title = None
+    m = re.search(r"<title[^>]*>(.*?)</title>", html, flags=re.I | re.S)
+    if m:
+        title = re.sub(r"\s+", " ", m.group(1)).strip()
 
-        words = len(re.findall(r"\w+", text))
-        return Page(url=url, title=title, text=text, word_count=words)
+    words = len(re.findall(r"\w+", text))
+    return Page(url=url, title=title, text=text, word_count=words)
 
 def chunk_text(s: str, max_chars: int = 6000) -> List[str]:
     """Naive, stable chunker by sentence boundaries when possible."""
@@ -67,3 +157,14 @@ def chunk_text(s: str, max_chars: int = 6000) -> List[str]:
 def find_url(text: str) -> Optional[str]:
     m = URL_RE.search(text)
     return m.group(0) if m else None
+
+def find_urls(text: str) -> List[str]:
+    """All distinct URLs in `text`, in order of appearance."""
+    return list(dict.fromkeys(m.group(0).rstrip(".,;:!?") for m in URL_RE.finditer(text)))
+
+def is_http_url(value: object) -> bool:
+    """True for a single absolute http(s) URL with a host."""
+    if not isinstance(value, str) or any(c.isspace() for c in value.strip()):
+        return False
+    parts = urlsplit(value.strip())
+    return parts.scheme.lower() in ("http", "https") and bool(parts.hostname)